@@ -0,0 +1,18 @@
+"""
+Hashers de contraseñas propios.
+"""
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class PBKDF2ImportacionHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 con pocas iteraciones para altas masivas desde importaciones.
+
+    No es el hasher preferido (PASSWORD_HASHERS[0]): en el primer login
+    Django verifica la contraseña con este hash y la vuelve a hashear con
+    el hasher por defecto, así que el hash débil solo vive hasta que el
+    cliente entra por primera vez.
+    """
+
+    algorithm = 'pbkdf2_importacion'
+    iterations = 10000
@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib import admin
-from .models import Categoria, ConfiguracionFiltro, Producto, DefinicionAtributo, ProductoAtributo
+from . import services
+from .models import Categoria, ConfiguracionFiltro, Producto, DefinicionAtributo, ProductoAtributo, ValorAtributo
 
 
 class ConfiguracionFiltroInline(admin.TabularInline):
@@ -13,11 +15,37 @@ class DefinicionAtributoInline(admin.TabularInline):
     ordering = ('orden',)
 
 
+class ProductoAtributoForm(forms.ModelForm):
+    """
+    El valor se escribe como texto y se busca (o crea) en el diccionario de
+    la definición elegida: no se puede asignar un valor de otra definición.
+    """
+    texto = forms.CharField(max_length=500, label='Valor')
+
+    class Meta:
+        model = ProductoAtributo
+        fields = ['definicion']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.valor_id:
+            self.fields['texto'].initial = self.instance.valor.valor
+
+    def save(self, commit=True):
+        texto = self.cleaned_data['texto']
+        self.instance.valor_id = services.valores_atributo(self.instance.definicion_id, [texto])[texto]
+        return super().save(commit)
+
+
 class ProductoAtributoInline(admin.TabularInline):
     model = ProductoAtributo
+    form = ProductoAtributoForm
     extra = 1
     autocomplete_fields = ['definicion']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('valor')
+
 
 @admin.register(Categoria)
 class CategoriaAdmin(admin.ModelAdmin):
@@ -36,6 +64,15 @@ class DefinicionAtributoAdmin(admin.ModelAdmin):
     ordering = ('categoria', 'orden')
 
 
+@admin.register(ValorAtributo)
+class ValorAtributoAdmin(admin.ModelAdmin):
+    list_display = ('valor', 'definicion', 'valor_num')
+    list_filter = ('definicion__categoria',)
+    search_fields = ('valor', 'definicion__nombre', 'definicion__etiqueta')
+    list_select_related = ('definicion__categoria',)
+    ordering = ('definicion', 'valor')
+
+
 @admin.register(Producto)
 class ProductoAdmin(admin.ModelAdmin):
     list_display = ('sku', 'nombre', 'precio', 'stock', 'activo')
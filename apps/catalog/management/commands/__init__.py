@@ -0,0 +1 @@
+# Django automatically discovers management commands
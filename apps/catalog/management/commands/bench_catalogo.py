@@ -0,0 +1,307 @@
+"""
+Django management command to benchmark the customer catalog paths and the
+panel product list.
+Usage: python manage.py bench_catalogo --productos 50000 --salida bench_catalogo.json
+
+Seeds a synthetic catalog in a fresh test database and requests each
+scenario with Django's test client, reporting p50/p95 latency and the
+number of queries per request. With --comparar, exits with an error when
+a scenario needs more queries than in the previous report. With
+--verificar-indices, also checks with EXPLAIN that the main catalog
+queries use the catalog indexes (the same check apps.catalog.tests runs).
+"""
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import Usuario
+from apps.catalog import sinteticos
+from apps.catalog.models import Categoria, Producto, DefinicionAtributo, ProductoAtributo
+
+
+class Command(BaseCommand):
+    help = 'Benchmark catalog, product detail, cart, checkout and panel list requests on a seeded catalog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--productos', type=int, default=50000, help='Products to seed')
+        parser.add_argument('--atributos', type=int, default=6, help='Attributes per product')
+        parser.add_argument('--clientes', type=int, default=2000, help='Clients to seed')
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=30,
+            help='Measured requests per scenario (after one warm-up request)'
+        )
+        parser.add_argument(
+            '--escenarios',
+            help='Comma separated scenarios to run (default: all)'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Keep the seeded test database and reuse it on the next run'
+        )
+        parser.add_argument(
+            '--salida',
+            default='bench_catalogo.json',
+            help='Path of the JSON report'
+        )
+        parser.add_argument(
+            '--comparar',
+            help='Previous JSON report; fail if any scenario needs more queries'
+        )
+        parser.add_argument(
+            '--tolerancia-consultas',
+            type=int,
+            default=0,
+            help='Extra queries per request allowed before failing (default 0)'
+        )
+        parser.add_argument(
+            '--verificar-indices',
+            action='store_true',
+            help='Fail if EXPLAIN of the main catalog queries does not use the catalog indexes'
+        )
+
+    def handle(self, *args, **options):
+        escenarios = self._escenarios()
+        if options['escenarios']:
+            pedidos = [nombre.strip() for nombre in options['escenarios'].split(',') if nombre.strip()]
+            invalidos = [nombre for nombre in pedidos if nombre not in escenarios]
+            if invalidos:
+                raise CommandError(f'Unknown scenarios: {", ".join(invalidos)}')
+            escenarios = {nombre: escenarios[nombre] for nombre in pedidos}
+
+        if connection.vendor == 'sqlite':
+            # Archivo en disco en lugar de la base en memoria que usan los tests
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+                tempfile.gettempdir(), 'paginaflexs_bench_catalogo.sqlite3'
+            )
+
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        setup_test_environment(debug=False)
+        try:
+            datos = self._poblar(options)
+            planes = self._verificar_indices(datos) if options['verificar_indices'] else None
+            resultados = {}
+            for nombre, escenario in escenarios.items():
+                resultados[nombre] = self._medir(escenario, datos, options['repeticiones'])
+                r = resultados[nombre]
+                self.stdout.write(
+                    f'{nombre:<22} p50 {r["p50_ms"]:>8.1f} ms   p95 {r["p95_ms"]:>8.1f} ms   '
+                    f'{r["consultas"]:>3} queries'
+                )
+        finally:
+            teardown_test_environment()
+            if not options['keepdb']:
+                connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        reporte = {
+            'generado': timezone.now().isoformat(),
+            'base_de_datos': connection.vendor,
+            'parametros': {
+                'productos': datos['productos'],
+                'atributos': datos['atributos'],
+                'clientes': datos['clientes'],
+                'repeticiones': options['repeticiones'],
+            },
+            'escenarios': resultados,
+        }
+        if planes is not None:
+            reporte['planes'] = planes
+        with open(options['salida'], 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {options["salida"]}'))
+
+        if options['comparar']:
+            self._comparar(reporte, options['comparar'], options['tolerancia_consultas'])
+
+    def _poblar(self, options):
+        """Puebla el catálogo (salvo que --keepdb encuentre uno) y elige los datos de los escenarios."""
+        if not Producto.objects.exists():
+            self.stdout.write('Seeding catalog...')
+            inicio = time.perf_counter()
+            creados = sinteticos.poblar_catalogo(
+                productos=options['productos'],
+                atributos_por_producto=options['atributos'],
+                clientes=options['clientes'],
+            )
+            self.stdout.write(
+                f'  {creados["productos"]:,} products, {creados["atributos"]:,} attributes, '
+                f'{creados["clientes"]:,} clients in {time.perf_counter() - inicio:.1f}s'
+            )
+
+        # Subcategoría con productos y los dos primeros atributos de su rubro
+        subcategoria = Categoria.objects.filter(padre__isnull=False).order_by('id').first()
+        definiciones = list(DefinicionAtributo.objects.filter(categoria_id=subcategoria.padre_id).order_by('orden')[:2])
+        filtros = {'categoria': subcategoria.padre_id}
+        for definicion in definiciones:
+            valor = ProductoAtributo.objects.filter(
+                definicion=definicion, producto__categorias=subcategoria
+            ).values_list('valor__valor', flat=True).first()
+            filtros[f'attr_{definicion.nombre}'] = valor
+
+        admin, _ = Usuario.objects.get_or_create(
+            username='bench_admin', defaults={'rol': Usuario.Rol.ADMIN, 'email': 'bench_admin@example.com'}
+        )
+
+        return {
+            'productos': Producto.objects.count(),
+            'atributos': ProductoAtributo.objects.count(),
+            'clientes': Usuario.objects.filter(cliente__isnull=False).count(),
+            'producto_ids': list(Producto.objects.filter(activo=True).values_list('id', flat=True)[:5000]),
+            'usuarios': list(Usuario.objects.filter(cliente__isnull=False).order_by('id')[:50]),
+            'admin': admin,
+            'subcategoria': subcategoria.id,
+            'categoria': subcategoria.padre_id,
+            'filtros': filtros,
+            'busqueda': Producto.objects.values_list('nombre', flat=True).first().split()[0],
+            'filtro_1': Producto.objects.exclude(filtro_1='').values_list('filtro_1', flat=True).first(),
+        }
+
+    def _verificar_indices(self, datos):
+        """
+        EXPLAIN de la primera página de las consultas de CatalogoView
+        (sinteticos.planes_catalogo); falla si algún plan no usa ninguno de
+        sus índices esperados. Retorna los planes.
+        """
+        planes = {}
+        faltantes = []
+        for nombre, (plan, indices, usa) in sinteticos.planes_catalogo(datos).items():
+            planes[nombre] = plan
+            if usa:
+                self.stdout.write(f'{nombre:<22} uses {" / ".join(indices)}')
+            else:
+                faltantes.append(nombre)
+                self.stdout.write(self.style.ERROR(f'{nombre:<22} does not use {" / ".join(indices)}:'))
+                self.stdout.write(plan)
+
+        if faltantes:
+            raise CommandError(f'Catalog queries without their index: {", ".join(faltantes)}')
+        return planes
+
+    def _escenarios(self):
+        """
+        {nombre: escenario}; cada escenario recibe (client, datos, rnd) y
+        retorna (preparar, pedir): preparar corre sin medir y pedir hace
+        el request medido y retorna la respuesta.
+        """
+        lista = reverse('catalog:lista')
+
+        def catalogo(params):
+            def escenario(client, datos, rnd):
+                return None, lambda: client.get(lista, params(datos))
+            return escenario
+
+        def detalle(client, datos, rnd):
+            pk = rnd.choice(datos['producto_ids'])
+            return None, lambda: client.get(reverse('catalog:detalle', args=[pk]))
+
+        def carrito_agregar(client, datos, rnd):
+            pk = rnd.choice(datos['producto_ids'])
+            return None, lambda: client.post(reverse('cart:agregar', args=[pk]), {'cantidad': 2})
+
+        def crear_pedido(client, datos, rnd):
+            def preparar():
+                for pk in rnd.sample(datos['producto_ids'], 5):
+                    client.post(reverse('cart:agregar', args=[pk]), {'cantidad': rnd.randint(1, 10)})
+            return preparar, lambda: client.post(reverse('orders:crear'), {'nota': 'bench'})
+
+        def panel(params):
+            def escenario(client, datos, rnd):
+                return (
+                    lambda: client.force_login(datos['admin']),
+                    lambda: client.get(reverse('panel:productos'), params(datos))
+                )
+            return escenario
+
+        return {
+            'catalogo': catalogo(lambda datos: {}),
+            'catalogo_busqueda': catalogo(lambda datos: {'q': datos['busqueda']}),
+            'catalogo_categoria': catalogo(lambda datos: {'categoria': datos['categoria']}),
+            'catalogo_subcategoria': catalogo(lambda datos: {'categoria': datos['subcategoria']}),
+            'catalogo_atributos': catalogo(lambda datos: datos['filtros']),
+            'catalogo_rango': catalogo(
+                lambda datos: {'categoria': datos['categoria'], 'attr_ancho_min': 40, 'attr_ancho_max': 85}
+            ),
+            'catalogo_pagina': catalogo(lambda datos: {'categoria': datos['categoria'], 'page': 5}),
+            'detalle': detalle,
+            'carrito_agregar': carrito_agregar,
+            'crear_pedido': crear_pedido,
+            'panel_productos': panel(lambda datos: {}),
+            'panel_productos_orden': panel(lambda datos: {'orden': '-precio', 'page': 5}),
+            'panel_productos_categoria': panel(lambda datos: {'categoria': datos['categoria'], 'orden': 'stock'}),
+        }
+
+    def _medir(self, escenario, datos, repeticiones):
+        """Latencias (ms) y consultas por request de un escenario."""
+        rnd = random.Random(0)
+        tiempos = []
+        consultas = []
+        for i in range(repeticiones + 1):
+            client = Client()
+            client.force_login(datos['usuarios'][i % len(datos['usuarios'])])
+            preparar, pedir = escenario(client, datos, rnd)
+            if preparar:
+                preparar()
+
+            with CaptureQueriesContext(connection) as capturadas:
+                inicio = time.perf_counter()
+                respuesta = pedir()
+                duracion = time.perf_counter() - inicio
+            if respuesta.status_code >= 400:
+                raise CommandError(f'{respuesta.request["PATH_INFO"]} returned {respuesta.status_code}')
+
+            if i:  # El primer request calienta caches y templates
+                tiempos.append(duracion * 1000)
+                consultas.append(len(capturadas))
+
+        return {
+            'p50_ms': round(_percentil(tiempos, 50), 2),
+            'p95_ms': round(_percentil(tiempos, 95), 2),
+            'media_ms': round(statistics.fmean(tiempos), 2),
+            'max_ms': round(max(tiempos), 2),
+            'consultas': max(consultas),
+            'consultas_min': min(consultas),
+        }
+
+    def _comparar(self, reporte, ruta, tolerancia):
+        """Compara con un reporte anterior; falla si algún escenario hace más consultas."""
+        with open(ruta, encoding='utf-8') as f:
+            anterior = json.load(f).get('escenarios', {})
+
+        self.stdout.write(f'Compared with {ruta}:')
+        regresiones = []
+        for nombre, actual in reporte['escenarios'].items():
+            previo = anterior.get(nombre)
+            if not previo:
+                continue
+            linea = (
+                f'  {nombre:<22} p50 {previo["p50_ms"]:.1f} -> {actual["p50_ms"]:.1f} ms, '
+                f'p95 {previo["p95_ms"]:.1f} -> {actual["p95_ms"]:.1f} ms, '
+                f'queries {previo["consultas"]} -> {actual["consultas"]}'
+            )
+            if actual['consultas'] > previo['consultas'] + tolerancia:
+                regresiones.append(nombre)
+                self.stdout.write(self.style.ERROR(linea))
+            else:
+                self.stdout.write(linea)
+
+        if regresiones:
+            raise CommandError(f'Query count regressed in: {", ".join(regresiones)}')
+
+
+def _percentil(valores, percentil):
+    """Percentil por rango más cercano (sin interpolar)."""
+    ordenados = sorted(valores)
+    indice = max(0, -(-len(ordenados) * percentil // 100) - 1)
+    return ordenados[int(indice)]
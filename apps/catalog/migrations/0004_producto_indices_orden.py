@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_productoatributo_catalog_pro_definic_84506a_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['nombre', 'id'], name='catalog_pro_nombre_89ec1a_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['precio', 'id'], name='catalog_pro_precio_eb89fd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['stock', 'id'], name='catalog_pro_stock_6c332d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['updated_at', 'id'], name='catalog_pro_updated_a59a81_idx'),
+        ),
+    ]
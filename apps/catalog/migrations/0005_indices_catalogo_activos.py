@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:54
+
+from django.db import migrations, models
+
+from apps.core.db import AgregarIndiceConcurrente
+
+
+INDICE_CATEGORIA = 'catalog_prodcat_categoria_producto'
+
+
+def _tabla_categorias(apps):
+    return apps.get_model('catalog', 'Producto')._meta.get_field('categorias').remote_field.through._meta.db_table
+
+
+def crear_indice_categoria(apps, schema_editor):
+    """
+    (categoria_id, producto_id) en la tabla intermedia: los filtros por
+    categoría leen los producto_id solo del índice. La tabla la crea el
+    ManyToManyField, así que el índice va por SQL.
+    """
+    qn = schema_editor.quote_name
+    concurrente = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(
+        f'CREATE INDEX {concurrente}IF NOT EXISTS {qn(INDICE_CATEGORIA)} '
+        f'ON {qn(_tabla_categorias(apps))} ({qn("categoria_id")}, {qn("producto_id")})'
+    )
+
+
+def borrar_indice_categoria(apps, schema_editor):
+    concurrente = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    schema_editor.execute(f'DROP INDEX {concurrente}IF EXISTS {schema_editor.quote_name(INDICE_CATEGORIA)}')
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY en PostgreSQL: no puede correr en una transacción
+    atomic = False
+
+    dependencies = [
+        ('catalog', '0004_producto_indices_orden'),
+    ]
+
+    operations = [
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['nombre', 'id'], name='catalog_prod_activos_nombre'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['filtro_1'], name='catalog_prod_activos_filtro_1'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['filtro_2'], name='catalog_prod_activos_filtro_2'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['filtro_3'], name='catalog_prod_activos_filtro_3'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['filtro_4'], name='catalog_prod_activos_filtro_4'),
+        ),
+        AgregarIndiceConcurrente(
+            model_name='producto',
+            index=models.Index(condition=models.Q(('activo', True)), fields=['filtro_5'], name='catalog_prod_activos_filtro_5'),
+        ),
+        migrations.RunPython(crear_indice_categoria, borrar_indice_categoria),
+    ]
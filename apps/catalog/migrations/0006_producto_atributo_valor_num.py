@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:57
+
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models, transaction
+
+from apps.core.db import AgregarIndiceConcurrente
+
+
+LOTE = 5000
+
+
+def valor_numerico(valor):
+    """Copia de apps.catalog.models.valor_numerico al momento de esta migración."""
+    try:
+        numero = Decimal(str(valor).strip().replace(',', '.'))
+    except (InvalidOperation, ValueError):
+        return None
+    if not numero.is_finite() or abs(numero) >= 10 ** 10:
+        return None
+    return numero
+
+
+def completar_valor_num(apps, schema_editor):
+    """
+    Completa valor_num de los atributos existentes por lotes de ids: un
+    UPDATE por valor numérico distinto del lote (se repiten mucho).
+    """
+    ProductoAtributo = apps.get_model('catalog', 'ProductoAtributo')
+    ultimo = 0
+    while True:
+        filas = list(
+            ProductoAtributo.objects.filter(pk__gt=ultimo).order_by('pk').values_list('pk', 'valor')[:LOTE]
+        )
+        if not filas:
+            break
+        por_valor = {}
+        for pk, valor in filas:
+            numero = valor_numerico(valor)
+            if numero is not None:
+                por_valor.setdefault(numero, []).append(pk)
+        with transaction.atomic():
+            for numero, pks in por_valor.items():
+                ProductoAtributo.objects.filter(pk__in=pks).update(valor_num=numero)
+        ultimo = filas[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY en PostgreSQL: no puede correr en una transacción
+    atomic = False
+
+    dependencies = [
+        ('catalog', '0005_indices_catalogo_activos'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productoatributo',
+            name='valor_num',
+            field=models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True, verbose_name='Valor numérico'),
+        ),
+        migrations.RunPython(completar_valor_num, migrations.RunPython.noop),
+        AgregarIndiceConcurrente(
+            model_name='productoatributo',
+            index=models.Index(fields=['definicion', 'valor_num'], name='catalog_atrib_def_valor_num'),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from decimal import Decimal, InvalidOperation
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+LOTE = 5000
+
+
+def valor_numerico(valor):
+    """Copia de apps.catalog.models.valor_numerico al momento de esta migración."""
+    try:
+        numero = Decimal(str(valor).strip().replace(',', '.'))
+    except (InvalidOperation, ValueError):
+        return None
+    if not numero.is_finite() or abs(numero) >= 10 ** 10:
+        return None
+    return numero
+
+
+def llenar_diccionario(apps, schema_editor):
+    """
+    Un ValorAtributo por (definición, valor) distinto y cada ProductoAtributo
+    apuntando al suyo, por rangos de ids.
+    """
+    ProductoAtributo = apps.get_model('catalog', 'ProductoAtributo')
+    ValorAtributo = apps.get_model('catalog', 'ValorAtributo')
+
+    distintos = ProductoAtributo.objects.order_by().values_list('definicion_id', 'valor').distinct()
+    ValorAtributo.objects.bulk_create(
+        (
+            ValorAtributo(definicion_id=definicion_id, valor=valor, valor_num=valor_numerico(valor))
+            for definicion_id, valor in distintos.iterator()
+        ),
+        batch_size=LOTE
+    )
+
+    valor = ValorAtributo.objects.filter(
+        definicion_id=OuterRef('definicion_id'), valor=OuterRef('valor')
+    ).values('pk')[:1]
+    ultimo = ProductoAtributo.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+    for desde in range(0, ultimo, LOTE):
+        ProductoAtributo.objects.filter(pk__gt=desde, pk__lte=desde + LOTE).update(valor_ref=Subquery(valor))
+
+
+def restaurar_texto(apps, schema_editor):
+    ProductoAtributo = apps.get_model('catalog', 'ProductoAtributo')
+    ValorAtributo = apps.get_model('catalog', 'ValorAtributo')
+    valores = ValorAtributo.objects.filter(pk=OuterRef('valor_ref_id'))
+    ProductoAtributo.objects.update(
+        valor=Subquery(valores.values('valor')[:1]),
+        valor_num=Subquery(valores.values('valor_num')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    # Solo el diccionario y los datos: las columnas viejas se borran en 0008,
+    # en otra transacción (PostgreSQL no permite ALTER TABLE con eventos de
+    # triggers de FK diferidas pendientes de los UPDATE de esta migración)
+
+    dependencies = [
+        ('catalog', '0006_producto_atributo_valor_num'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ValorAtributo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('valor', models.CharField(max_length=500, verbose_name='Valor')),
+                ('valor_num', models.DecimalField(blank=True, decimal_places=4, editable=False, max_digits=14, null=True, verbose_name='Valor numérico')),
+                ('definicion', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='valores_distintos', to='catalog.definicionatributo')),
+            ],
+            options={
+                'verbose_name': 'Valor de Atributo',
+                'verbose_name_plural': 'Valores de Atributos',
+                'indexes': [models.Index(fields=['definicion', 'valor_num'], name='catalog_valor_def_valor_num')],
+                'unique_together': {('definicion', 'valor')},
+            },
+        ),
+        migrations.AddField(
+            model_name='productoatributo',
+            name='valor_ref',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='catalog.valoratributo'),
+        ),
+        migrations.RunPython(llenar_diccionario, restaurar_texto),
+    ]
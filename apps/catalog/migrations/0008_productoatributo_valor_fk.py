@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_valoratributo'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productoatributo',
+            name='catalog_pro_definic_84506a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='productoatributo',
+            name='catalog_atrib_def_valor_num',
+        ),
+        # Con default para que la columna se pueda volver a agregar al revertir
+        migrations.AlterField(
+            model_name='productoatributo',
+            name='valor',
+            field=models.CharField(default='', max_length=500, verbose_name='Valor'),
+        ),
+        migrations.RemoveField(
+            model_name='productoatributo',
+            name='valor',
+        ),
+        migrations.RemoveField(
+            model_name='productoatributo',
+            name='valor_num',
+        ),
+        migrations.RenameField(
+            model_name='productoatributo',
+            old_name='valor_ref',
+            new_name='valor',
+        ),
+        migrations.AlterField(
+            model_name='productoatributo',
+            name='valor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.RESTRICT, related_name='atributos', to='catalog.valoratributo', verbose_name='Valor'),
+        ),
+    ]
@@ -1,3 +1,5 @@
+from decimal import Decimal, InvalidOperation
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
@@ -122,6 +124,21 @@ class Producto(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['nombre']
+        indexes = [
+            # Columnas por las que se ordena el listado del panel (con id para un orden estable)
+            models.Index(fields=['nombre', 'id']),
+            models.Index(fields=['precio', 'id']),
+            models.Index(fields=['stock', 'id']),
+            models.Index(fields=['updated_at', 'id']),
+            # Catálogo de clientes: solo productos activos, ordenados por nombre
+            # y con los filtros legacy por igualdad (ver ConfiguracionFiltro)
+            models.Index(fields=['nombre', 'id'], condition=models.Q(activo=True), name='catalog_prod_activos_nombre'),
+            models.Index(fields=['filtro_1'], condition=models.Q(activo=True), name='catalog_prod_activos_filtro_1'),
+            models.Index(fields=['filtro_2'], condition=models.Q(activo=True), name='catalog_prod_activos_filtro_2'),
+            models.Index(fields=['filtro_3'], condition=models.Q(activo=True), name='catalog_prod_activos_filtro_3'),
+            models.Index(fields=['filtro_4'], condition=models.Q(activo=True), name='catalog_prod_activos_filtro_4'),
+            models.Index(fields=['filtro_5'], condition=models.Q(activo=True), name='catalog_prod_activos_filtro_5'),
+        ]
     
     def __str__(self):
         return f"{self.sku} - {self.nombre}"
@@ -190,6 +207,46 @@ class DefinicionAtributo(models.Model):
         return f"{self.categoria.nombre} - {self.etiqueta}"
 
 
+class ValorAtributo(models.Model):
+    """
+    Valor distinto de un atributo (diccionario). Los ProductoAtributo
+    apuntan acá con un entero en lugar de repetir el texto en cada fila.
+    """
+    definicion = models.ForeignKey(
+        DefinicionAtributo,
+        on_delete=models.CASCADE,
+        related_name='valores_distintos'
+    )
+    valor = models.CharField(max_length=500, verbose_name='Valor')
+    # valor como número (None si no lo es): filtros por rango y orden numérico
+    valor_num = models.DecimalField(
+        max_digits=14,
+        decimal_places=4,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='Valor numérico'
+    )
+    
+    class Meta:
+        verbose_name = 'Valor de Atributo'
+        verbose_name_plural = 'Valores de Atributos'
+        unique_together = ['definicion', 'valor']
+        indexes = [
+            models.Index(fields=['definicion', 'valor_num'], name='catalog_valor_def_valor_num'),
+        ]
+    
+    def __str__(self):
+        return self.valor
+    
+    def save(self, *args, **kwargs):
+        self.valor_num = valor_numerico(self.valor)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'valor' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'valor_num'}
+        super().save(*args, **kwargs)
+
+
 class ProductoAtributo(models.Model):
     """
     Valor de un atributo para un producto específico.
@@ -204,16 +261,39 @@ class ProductoAtributo(models.Model):
         on_delete=models.CASCADE,
         related_name='valores'
     )
-    valor = models.CharField(max_length=500, verbose_name='Valor')
+    # RESTRICT: no se puede borrar un valor del diccionario que usan atributos,
+    # salvo que se borren en la misma operación (p. ej. al borrar la definición)
+    valor = models.ForeignKey(
+        ValorAtributo,
+        on_delete=models.RESTRICT,
+        related_name='atributos',
+        verbose_name='Valor'
+    )
     
     class Meta:
         verbose_name = 'Atributo de Producto'
         verbose_name_plural = 'Atributos de Productos'
         unique_together = ['producto', 'definicion']
-        indexes = [
-            models.Index(fields=['definicion', 'valor']),
-        ]
     
     def __str__(self):
         return f"{self.producto.sku} - {self.definicion.etiqueta}: {self.valor}"
+    
+    def clean(self):
+        if self.valor_id and self.definicion_id and self.valor.definicion_id != self.definicion_id:
+            raise ValidationError({'valor': 'El valor no pertenece a la definición del atributo.'})
+
+
+def valor_numerico(valor):
+    """
+    Decimal de un valor de atributo ("85", "12,5"), o None si no es un
+    número o no entra en ValorAtributo.valor_num. bulk_create y
+    bulk_update no pasan por save(): quien los use asigna valor_num con esto.
+    """
+    try:
+        numero = Decimal(str(valor).strip().replace(',', '.'))
+    except (InvalidOperation, ValueError):
+        return None
+    if not numero.is_finite() or abs(numero) >= 10 ** 10:
+        return None
+    return numero
 
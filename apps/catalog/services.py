@@ -0,0 +1,198 @@
+"""
+Operaciones por conjuntos sobre el catálogo.
+
+Asignar o quitar una categoría a muchos productos se hace con una sola
+sentencia sobre la tabla intermedia (INSERT ... SELECT / DELETE con
+subconsulta), sin instanciar los productos. No se envía m2m_changed.
+
+Las ediciones masivas (precio, stock, activo) son UPDATE ... SET campo =
+expresión por lotes de ids, sin señales ni save().
+
+Los valores de atributos se guardan una vez por definición en ValorAtributo;
+quien crea ProductoAtributo en bloque resuelve los ids con valores_atributo().
+"""
+from decimal import Decimal
+from django.db import connection, transaction
+from django.db.models import DecimalField, F, Q, Value
+from django.db.models.constants import OnConflict
+from django.db.models.functions import Greatest, Round
+from django.utils import timezone
+
+from .models import Producto, ValorAtributo, valor_numerico
+
+
+ProductoCategoria = Producto.categorias.through
+
+EDICIONES = {
+    'precio_porcentaje': 'Ajustar precio en %',
+    'precio_monto': 'Sumar/restar $ al precio',
+    'stock': 'Fijar stock',
+    'activar': 'Activar',
+    'desactivar': 'Desactivar',
+}
+
+LOTE_EDICION = 2000
+
+# Topes de los valores de una edición masiva: más allá el precio o el stock
+# no entran en sus columnas (12 dígitos con 2 decimales, entero de 32 bits)
+MAXIMO_PORCENTAJE = 1000
+MAXIMO_MONTO = Decimal('10') ** 9
+MAXIMO_STOCK = 2 ** 31 - 1
+
+
+def asignar_categoria(categoria, productos):
+    """
+    Agrega la categoría a todos los productos del queryset.
+
+    Args:
+        categoria: Categoria a asignar
+        productos: QuerySet de Producto (no se evalúa)
+
+    Returns:
+        Cantidad de productos que no la tenían y se agregaron
+    """
+    qn = connection.ops.quote_name
+    sql, params = productos.order_by().values('id').query.sql_with_params()
+    # Los que ya la tienen se saltean por el índice único (producto, categoría)
+    insertar = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+    conflicto = connection.ops.on_conflict_suffix_sql([], OnConflict.IGNORE, None, None)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'{insertar} {qn(ProductoCategoria._meta.db_table)} ({qn("producto_id")}, {qn("categoria_id")}) '
+            f'SELECT p.{qn("id")}, %s FROM ({sql}) p {conflicto}',
+            [categoria.id, *params]
+        )
+        return cursor.rowcount
+
+
+def quitar_categoria(categoria, productos):
+    """
+    Quita la categoría de todos los productos del queryset.
+
+    Returns:
+        Cantidad de productos que la tenían y se quitaron
+    """
+    borrados, _ = ProductoCategoria.objects.filter(
+        categoria=categoria, producto_id__in=productos.order_by().values('id')
+    ).delete()
+    return borrados
+
+
+def _edicion(operacion, valor):
+    """
+    (campo, expresión, filtro de los productos que cambian) de una edición
+    masiva. Valida el valor y lanza ValueError si no corresponde.
+    """
+    if valor is not None and not valor.is_finite():
+        raise ValueError('Valor inválido.')
+    precio = DecimalField(max_digits=12, decimal_places=2)
+    if operacion in ('precio_porcentaje', 'precio_monto'):
+        if valor is None:
+            raise ValueError('Falta el valor.')
+        if operacion == 'precio_porcentaje':
+            if valor <= -100 or valor > MAXIMO_PORCENTAJE:
+                raise ValueError(f'El porcentaje tiene que ser mayor a -100 y de hasta {MAXIMO_PORCENTAJE}.')
+            nuevo = F('precio') * Value(1 + valor / 100)
+        else:
+            if abs(valor) >= MAXIMO_MONTO:
+                raise ValueError('El monto es demasiado grande.')
+            nuevo = F('precio') + Value(valor)
+        # Redondear en la base, igual que la vista previa, y no bajar de cero
+        expresion = Greatest(Round(nuevo, 2, output_field=precio), Value(Decimal('0'), output_field=precio))
+        # Solo cambian los que quedan con otro precio una vez redondeado
+        return 'precio', expresion, ~Q(precio=expresion)
+    if operacion == 'stock':
+        if valor is None or valor < 0 or valor > MAXIMO_STOCK or valor != int(valor):
+            raise ValueError('El stock tiene que ser un entero mayor o igual a 0.')
+        return 'stock', Value(int(valor)), ~Q(stock=int(valor))
+    if operacion in ('activar', 'desactivar'):
+        activo = operacion == 'activar'
+        return 'activo', Value(activo), Q(activo=not activo)
+    raise ValueError('Operación inválida.')
+
+
+def vista_previa_edicion(productos, operacion, valor=None, muestra=10):
+    """
+    Cuenta los productos que cambiarían y calcula el valor nuevo de una
+    muestra con la misma expresión del UPDATE, sin escribir nada.
+
+    Returns:
+        Tuple (cantidad, [(producto, valor_actual, valor_nuevo)])
+    """
+    campo, expresion, cambian = _edicion(operacion, valor)
+    afectados = productos.filter(cambian)
+    ejemplos = afectados.annotate(valor_nuevo=expresion).order_by('nombre')[:muestra]
+    return afectados.count(), [(p, getattr(p, campo), p.valor_nuevo) for p in ejemplos]
+
+
+def editar_productos(productos, operacion, valor=None, lote=LOTE_EDICION):
+    """
+    Aplica una edición masiva a los productos del queryset con UPDATE por
+    lotes de `lote` ids consecutivos, cada uno en su transacción para no
+    bloquear toda la tabla durante una actualización de miles de precios.
+
+    Returns:
+        Cantidad de productos modificados
+    """
+    campo, expresion, cambian = _edicion(operacion, valor)
+    afectados = productos.filter(cambian).order_by()
+    ids = afectados.order_by('id').values_list('id', flat=True)
+    ahora = timezone.now()
+
+    total = 0
+    ultimo = 0
+    while True:
+        # El id del último producto del lote marca el límite del UPDATE
+        tope = list(ids.filter(id__gt=ultimo)[lote - 1:lote])
+        actual = afectados.filter(id__gt=ultimo)
+        if tope:
+            actual = actual.filter(id__lte=tope[0])
+        with transaction.atomic():
+            total += actual.update(**{campo: expresion, 'updated_at': ahora})
+        if not tope:
+            return total
+        ultimo = tope[0]
+
+
+def valores_atributo(definicion_id, valores):
+    """
+    {valor: id de ValorAtributo} de una definición, creando los que falten
+    con un solo INSERT (los que ya existen se saltean por el índice único).
+    """
+    valores = set(valores)
+    ids = dict(
+        ValorAtributo.objects.filter(definicion_id=definicion_id, valor__in=valores).values_list('valor', 'id')
+    )
+    faltantes = valores - ids.keys()
+    if faltantes:
+        ValorAtributo.objects.bulk_create(
+            [
+                ValorAtributo(definicion_id=definicion_id, valor=valor, valor_num=valor_numerico(valor))
+                for valor in faltantes
+            ],
+            ignore_conflicts=True
+        )
+        ids.update(
+            ValorAtributo.objects.filter(definicion_id=definicion_id, valor__in=faltantes).values_list('valor', 'id')
+        )
+    return ids
+
+
+def sincronizar_opciones(definiciones):
+    """
+    Agrega a las opciones de las definiciones tipo lista los valores del
+    diccionario que todavía no figuran, respetando el orden de las que ya
+    están. Una consulta y a lo sumo un UPDATE por definición.
+    """
+    for definicion in definiciones:
+        if definicion.tipo != 'lista':
+            continue
+        actuales = set(definicion.opciones)
+        nuevas = [
+            valor for valor in
+            ValorAtributo.objects.filter(definicion=definicion).order_by('valor').values_list('valor', flat=True)
+            if valor not in actuales
+        ]
+        if nuevas:
+            definicion.opciones = [*definicion.opciones, *nuevas]
+            definicion.save(update_fields=['opciones'])
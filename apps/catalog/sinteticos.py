@@ -0,0 +1,167 @@
+"""
+Catálogo sintético para medir el rendimiento de las vistas de clientes, y
+verificación de los índices que usan las consultas del catálogo.
+"""
+import random
+from decimal import Decimal
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.test import RequestFactory
+from django.urls import reverse
+
+from apps.accounts.models import Usuario, Cliente
+from .models import Categoria, Producto, DefinicionAtributo, ProductoAtributo, ValorAtributo, valor_numerico
+from .views import CatalogoView
+
+
+LOTE = 2000
+PASSWORD = 'bench'
+
+MATERIALES = ['ACERO', 'INOX', 'GALV.', 'ZINCADO', 'BRONCE', 'ALUMINIO']
+MEDIDAS = ['1/4', '5/16', '3/8', '7/16', '1/2', '9/16', '5/8', '3/4', '7/8', '1', '1-1/4', '1-1/2', '2']
+ACABADOS = ['NATURAL', 'PINTADO', 'PULIDO', 'ARENADO']
+ATRIBUTOS = [
+    # (nombre, etiqueta, tipo, valores)
+    ('material', 'Material', 'lista', MATERIALES),
+    ('medida', 'Medida', 'lista', MEDIDAS),
+    ('ancho', 'Ancho', 'numero', ['20', '30', '40', '50', '60', '70', '85', '100']),
+    ('largo', 'Largo', 'numero', ['100', '120', '160', '200', '260', '300']),
+    ('acabado', 'Acabado', 'lista', ACABADOS),
+    ('forma', 'Forma', 'lista', ['CURVA', 'PLANA', 'SEMICURVA']),
+    ('rosca', 'Rosca', 'lista', ['UNC', 'UNF', 'METRICA', 'WHITWORTH']),
+    ('norma', 'Norma', 'lista', ['DIN', 'ISO', 'IRAM', 'SAE']),
+]
+
+# Consultas del catálogo y los índices que alguno de sus planes tiene que usar.
+# El de la tabla intermedia puede ser el de la migración 0005 o el que crea
+# el ManyToManyField sobre categoria_id (el nombre generado se compara por prefijo).
+INDICES_CATALOGO = {
+    'catalogo': lambda datos: ({}, ['catalog_prod_activos_nombre']),
+    'catalogo_categoria': lambda datos: (
+        {'categoria': datos['categoria']},
+        ['catalog_prodcat_categoria_producto', 'catalog_producto_categorias_categoria_id'],
+    ),
+    'catalogo_filtro': lambda datos: ({'filtro_1': datos['filtro_1']}, ['catalog_prod_activos_filtro_1']),
+}
+
+
+def poblar_catalogo(productos=50000, atributos_por_producto=6, clientes=2000,
+                    categorias=10, subcategorias=4, semilla=0):
+    """
+    Crea un catálogo sintético en la base actual.
+
+    Cada categoría raíz tiene `subcategorias` hijas y
+    `atributos_por_producto` definiciones de tipo lista; cada producto
+    pertenece a una subcategoría y tiene un valor por definición de su
+    categoría raíz (productos × atributos_por_producto ProductoAtributo).
+    Los usuarios de los clientes se llaman cliente00000.. con password
+    PASSWORD.
+
+    Returns:
+        Dict con la cantidad de registros creados por modelo
+    """
+    rnd = random.Random(semilla)
+    atributos_por_producto = min(atributos_por_producto, len(ATRIBUTOS))
+
+    with transaction.atomic():
+        raices = Categoria.objects.bulk_create([
+            Categoria(nombre=f'Rubro {i:02d}', orden=i) for i in range(categorias)
+        ])
+        hijas = Categoria.objects.bulk_create([
+            Categoria(nombre=f'{raiz.nombre} - Línea {j}', padre=raiz, orden=j)
+            for raiz in raices for j in range(subcategorias)
+        ])
+        definiciones = {
+            raiz.id: DefinicionAtributo.objects.bulk_create([
+                DefinicionAtributo(
+                    categoria=raiz, nombre=nombre, etiqueta=etiqueta,
+                    tipo=tipo, opciones=valores if tipo == 'lista' else [], orden=orden
+                )
+                for orden, (nombre, etiqueta, tipo, valores) in enumerate(ATRIBUTOS[:atributos_por_producto], 1)
+            ])
+            for raiz in raices
+        }
+        # Diccionario de valores: ids de ValorAtributo por definición
+        valores_por_nombre = {nombre: valores for nombre, _, _, valores in ATRIBUTOS}
+        valor_ids = {}
+        for valor in ValorAtributo.objects.bulk_create([
+            ValorAtributo(definicion=definicion, valor=valor, valor_num=valor_numerico(valor))
+            for definiciones_raiz in definiciones.values()
+            for definicion in definiciones_raiz
+            for valor in valores_por_nombre[definicion.nombre]
+        ]):
+            valor_ids.setdefault(valor.definicion_id, []).append(valor.id)
+
+        relacion = Producto.categorias.through
+        creados = {'productos': 0, 'atributos': 0}
+        for inicio in range(0, productos, LOTE):
+            lote = []
+            categorias_lote = []
+            for i in range(inicio, min(inicio + LOTE, productos)):
+                categoria = rnd.choice(hijas)
+                lote.append(Producto(
+                    sku=f'SK{i:07d}',
+                    nombre=f'{rnd.choice(MATERIALES)} {rnd.choice(MEDIDAS)} {rnd.choice(ACABADOS)} {i}',
+                    descripcion=f'Producto sintético {i}',
+                    precio=Decimal(rnd.randrange(10000, 5000000)) / 100,
+                    stock=rnd.randrange(0, 500),
+                    filtro_1=rnd.choice(MATERIALES),
+                    filtro_2=rnd.choice(MEDIDAS),
+                    activo=rnd.random() > 0.02,
+                ))
+                categorias_lote.append(categoria)
+            lote = Producto.objects.bulk_create(lote)
+
+            relacion.objects.bulk_create([
+                relacion(producto_id=producto.id, categoria_id=categoria.id)
+                for producto, categoria in zip(lote, categorias_lote)
+            ])
+            atributos = [
+                ProductoAtributo(producto_id=producto.id, definicion=definicion, valor_id=rnd.choice(valor_ids[definicion.id]))
+                for producto, categoria in zip(lote, categorias_lote)
+                for definicion in definiciones[categoria.padre_id]
+            ]
+            ProductoAtributo.objects.bulk_create(atributos, batch_size=LOTE)
+            creados['productos'] += len(lote)
+            creados['atributos'] += len(atributos)
+
+        # Un único hash para todos: make_password por cliente tardaría minutos
+        password = make_password(PASSWORD)
+        for inicio in range(0, clientes, LOTE):
+            usuarios = Usuario.objects.bulk_create([
+                Usuario(username=f'cliente{i:05d}', password=password, rol=Usuario.Rol.CLIENTE)
+                for i in range(inicio, min(inicio + LOTE, clientes))
+            ])
+            Cliente.objects.bulk_create([
+                Cliente(
+                    usuario=usuario,
+                    nombre=f'Cliente {usuario.username}',
+                    descuento=Decimal(rnd.choice((0, 0, 5, 10, 15))),
+                )
+                for usuario in usuarios
+            ])
+
+    creados.update(categorias=len(raices) + len(hijas), clientes=clientes)
+    return creados
+
+
+def planes_catalogo(datos):
+    """
+    EXPLAIN de la primera página de las consultas de CatalogoView.
+
+    Args:
+        datos: Dict con 'categoria' (id de una categoría raíz) y 'filtro_1'
+            (un valor existente) para armar las consultas
+
+    Returns:
+        Dict {nombre: (plan, índices esperados, si el plan usa alguno)}
+    """
+    factory = RequestFactory()
+    planes = {}
+    for nombre, consulta in INDICES_CATALOGO.items():
+        params, indices = consulta(datos)
+        vista = CatalogoView()
+        vista.setup(factory.get(reverse('catalog:lista'), params))
+        plan = vista.get_queryset()[:24].explain()
+        planes[nombre] = (plan, indices, any(indice in plan for indice in indices))
+    return planes
@@ -1,8 +1,8 @@
 from django.views.generic import ListView, DetailView
-from django.db.models import Q
+from django.db.models import Max, Min, Q
 from django.contrib.auth.mixins import LoginRequiredMixin
 
-from .models import Producto, Categoria, DefinicionAtributo, ProductoAtributo
+from .models import Producto, Categoria, DefinicionAtributo, ProductoAtributo, ValorAtributo, valor_numerico
 from apps.accounts.models import Cliente
 
 
@@ -46,19 +46,38 @@ class CatalogoView(LoginRequiredMixin, ListView):
                 queryset = queryset.filter(**{f'filtro_{i}': valor})
                 
         # Filtros por atributos dinámicos
+        rangos = {}
         for key, values in params.lists():
             if key.startswith('attr_'):
                 nombre_atributo = key[5:]
+                # attr_<nombre>_min / attr_<nombre>_max: rango sobre valor_num
+                limite = None
+                if nombre_atributo.endswith(('_min', '_max')):
+                    nombre_atributo, limite = nombre_atributo[:-4], nombre_atributo[-3:]
                 # Si estamos excluyendo este atributo, lo saltamos
                 if excluir_atributo and nombre_atributo == excluir_atributo:
                     continue
+                
+                if limite:
+                    numero = valor_numerico(values[-1]) if values[-1] else None
+                    if numero is not None:
+                        lookup = 'gte' if limite == 'min' else 'lte'
+                        rangos.setdefault(nombre_atributo, {})[f'valor_num__{lookup}'] = numero
+                    continue
                     
+                # Los valores se resuelven en el diccionario y se filtra por sus ids
                 valores = [v for v in values if v]
                 if valores:
-                    queryset = queryset.filter(
-                        atributos__definicion__nombre=nombre_atributo,
-                        atributos__valor__in=valores
-                    )
+                    queryset = queryset.filter(atributos__valor__in=ValorAtributo.objects.filter(
+                        definicion__nombre=nombre_atributo,
+                        valor__in=valores
+                    ))
+        
+        for nombre_atributo, limites in rangos.items():
+            queryset = queryset.filter(atributos__valor__in=ValorAtributo.objects.filter(
+                definicion__nombre=nombre_atributo,
+                **limites
+            ))
         
         return queryset
 
@@ -115,7 +134,9 @@ class CatalogoView(LoginRequiredMixin, ListView):
                 orden_tiene_seleccion = {}
                 for defn in sorted_definiciones:
                    sel = self.request.GET.getlist(f'attr_{defn.nombre}')
-                   if sel:
+                   if defn.tipo == 'numero':
+                       sel += [self.request.GET.get(f'attr_{defn.nombre}_min'), self.request.GET.get(f'attr_{defn.nombre}_max')]
+                   if any(sel):
                        orden_tiene_seleccion[defn.orden] = True
                 
                 # Determinar hasta qué orden mostrar
@@ -146,12 +167,30 @@ class CatalogoView(LoginRequiredMixin, ListView):
                         excluir_atributo=defn.nombre
                     )
                     
-                    valores_disponibles = ProductoAtributo.objects.filter(
+                    # Ids de los valores presentes en los productos filtrados
+                    valores_presentes = ValorAtributo.objects.filter(id__in=ProductoAtributo.objects.filter(
                         definicion=defn,
                         producto__in=qs_para_opciones
-                    ).values_list('valor', flat=True).distinct()
+                    ).values('valor_id'))
+                    
+                    # Numéricos: rango mínimo-máximo calculado en la base sobre valor_num
+                    if defn.tipo == 'numero':
+                        rango = valores_presentes.aggregate(minimo=Min('valor_num'), maximo=Max('valor_num'))
+                        
+                        if rango['minimo'] is not None:
+                            context['filtros_dinamicos'].append({
+                                'nombre': defn.nombre,
+                                'etiqueta': defn.etiqueta,
+                                'tipo': defn.tipo,
+                                'minimo': format(rango['minimo'].normalize(), 'f'),
+                                'maximo': format(rango['maximo'].normalize(), 'f'),
+                                'valor_min': self.request.GET.get(f'attr_{defn.nombre}_min', ''),
+                                'valor_max': self.request.GET.get(f'attr_{defn.nombre}_max', ''),
+                                'orden': defn.orden
+                            })
+                        continue
                     
-                    valores_validos = set(v for v in valores_disponibles if v)
+                    valores_validos = set(v for v in valores_presentes.values_list('valor', flat=True) if v)
                     
                     opciones_finales = []
                     if defn.tipo == 'lista' and defn.opciones:
@@ -200,6 +239,6 @@ class ProductoDetalleView(LoginRequiredMixin, DetailView):
                 pass
         
         # Atributos del producto organizados
-        context['atributos_producto'] = self.object.atributos.select_related('definicion').order_by('definicion__orden')
+        context['atributos_producto'] = self.object.atributos.select_related('definicion', 'valor').order_by('definicion__orden')
         
         return context
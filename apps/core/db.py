@@ -0,0 +1,58 @@
+"""
+Expresiones y operaciones de migración compartidas entre apps.
+"""
+from django.db.migrations.operations import AddIndex
+from django.db.models import Aggregate, CharField
+
+
+class Concatenar(Aggregate):
+    """
+    Concatena los valores de un grupo separados por ', '.
+
+    STRING_AGG en PostgreSQL (ordenado) y GROUP_CONCAT en SQLite y MySQL,
+    donde el orden es el de lectura.
+    """
+    function = 'STRING_AGG'
+    template = "%(function)s(%(expressions)s, ', ' ORDER BY %(expressions)s)"
+
+    def __init__(self, expression, **extra):
+        super().__init__(expression, output_field=CharField(), **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function='GROUP_CONCAT', template="%(function)s(%(expressions)s, ', ')",
+            **extra_context
+        )
+
+    def as_mysql(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler, connection, function='GROUP_CONCAT', template="%(function)s(%(expressions)s SEPARATOR ', ')",
+            **extra_context
+        )
+
+
+class AgregarIndiceConcurrente(AddIndex):
+    """
+    AddIndex que en PostgreSQL crea (y al revertir, borra) el índice con
+    CONCURRENTLY, sin bloquear las escrituras de la tabla mientras se
+    construye. La migración tiene que tener atomic = False. En las otras
+    bases es un AddIndex común.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, **_concurrente(schema_editor))
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, **_concurrente(schema_editor))
+
+
+def _concurrente(schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return {}
+    if schema_editor.connection.in_atomic_block:
+        raise ValueError('CREATE INDEX CONCURRENTLY no puede correr en una transacción: usar atomic = False.')
+    return {'concurrently': True}
@@ -0,0 +1,179 @@
+"""
+Instrumentación de requests: tiempos, consultas SQL, render y caché.
+
+Se activa con METRICAS_REQUEST_MUESTREO > 0 (fracción de requests
+medidos). Los requests medidos llevan el header Server-Timing y, si pasan
+los umbrales configurados, se loguean con sus consultas más lentas. Los
+requests no muestreados no tienen ningún overhead más allá de un random().
+"""
+import heapq
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_FALTA = object()
+
+
+class MedicionRequest:
+    """Métricas acumuladas durante un request."""
+
+    def __init__(self, top_consultas):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.tiempo_sql = 0.0
+        self.tiempo_render = 0.0
+        self.cache_aciertos = 0
+        self.cache_fallos = 0
+        self._top = top_consultas
+        self._lentas = []  # heap (duracion, orden, sql) de las más lentas
+
+    def medir_sql(self, execute, sql, params, many, context):
+        """execute_wrapper: cuenta y cronometra cada consulta."""
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tiempo_sql += duracion
+            entrada = (duracion, self.consultas, sql)
+            if len(self._lentas) < self._top:
+                heapq.heappush(self._lentas, entrada)
+            elif self._top:
+                heapq.heappushpop(self._lentas, entrada)
+
+    def consultas_lentas(self):
+        """[(ms, sql)] de las consultas más lentas, de mayor a menor."""
+        return [(round(duracion * 1000, 1), sql) for duracion, _, sql in sorted(self._lentas, reverse=True)]
+
+    @property
+    def duracion(self):
+        return time.perf_counter() - self.inicio
+
+
+class MetricasRequestMiddleware:
+    """
+    Mide un muestreo de requests.
+
+    Registra tiempo total, cantidad y tiempo de consultas (con
+    connection.execute_wrapper), tiempo de render de TemplateResponse y
+    aciertos/fallos de caché, y los expone en Server-Timing. El render de
+    las vistas que usan render() directamente queda dentro del tiempo de
+    la vista (app).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'METRICAS_REQUEST_MUESTREO', 0.0)
+        if self.muestreo <= 0:
+            raise MiddlewareNotUsed
+        self.lento_ms = getattr(settings, 'METRICAS_REQUEST_LENTO_MS', 1000)
+        self.max_consultas = getattr(settings, 'METRICAS_REQUEST_MAX_CONSULTAS', 100)
+        self.top_consultas = getattr(settings, 'METRICAS_REQUEST_TOP_CONSULTAS', 5)
+
+    def __call__(self, request):
+        if self.muestreo < 1 and random.random() >= self.muestreo:
+            return self.get_response(request)
+
+        medicion = MedicionRequest(self.top_consultas)
+        request._medicion = medicion
+        with ExitStack() as stack:
+            for alias in settings.DATABASES:
+                stack.enter_context(connections[alias].execute_wrapper(medicion.medir_sql))
+            for alias in settings.CACHES:
+                stack.callback(_instrumentar_cache(caches[alias], medicion))
+            response = self.get_response(request)
+
+        total_ms = medicion.duracion * 1000
+        response['Server-Timing'] = self._server_timing(medicion, total_ms)
+        if total_ms >= self.lento_ms or medicion.consultas >= self.max_consultas:
+            self._loguear(request, response, medicion, total_ms)
+        return response
+
+    def process_template_response(self, request, response):
+        """Cronometra el render de las TemplateResponse (se hace después de la vista)."""
+        medicion = getattr(request, '_medicion', None)
+        if medicion is None:
+            return response
+
+        render = response.render
+
+        def render_medido():
+            inicio = time.perf_counter()
+            try:
+                return render()
+            finally:
+                medicion.tiempo_render += time.perf_counter() - inicio
+
+        response.render = render_medido
+        return response
+
+    @staticmethod
+    def _server_timing(medicion, total_ms):
+        sql_ms = medicion.tiempo_sql * 1000
+        render_ms = medicion.tiempo_render * 1000
+        partes = [
+            f'db;dur={sql_ms:.1f};desc="{medicion.consultas} queries"',
+            f'tpl;dur={render_ms:.1f}',
+            f'app;dur={max(total_ms - sql_ms - render_ms, 0):.1f}',
+            f'total;dur={total_ms:.1f}',
+        ]
+        if medicion.cache_aciertos or medicion.cache_fallos:
+            partes.append(f'cache;desc="{medicion.cache_aciertos} hits, {medicion.cache_fallos} misses"')
+        return ', '.join(partes)
+
+    @staticmethod
+    def _loguear(request, response, medicion, total_ms):
+        lineas = [
+            f'Request lento: {request.method} {request.get_full_path()} -> {response.status_code} '
+            f'en {total_ms:.0f} ms ({medicion.consultas} consultas, {medicion.tiempo_sql * 1000:.0f} ms SQL, '
+            f'{medicion.tiempo_render * 1000:.0f} ms render, '
+            f'caché {medicion.cache_aciertos}/{medicion.cache_aciertos + medicion.cache_fallos})'
+        ]
+        for ms, sql in medicion.consultas_lentas():
+            lineas.append(f'  {ms:8.1f} ms  {sql[:500]}')
+        logger.warning('\n'.join(lineas))
+
+
+def _instrumentar_cache(cache, medicion):
+    """
+    Cuenta aciertos y fallos de get/get_many en la instancia de caché (una
+    por thread) durante el request; retorna la función que lo deshace.
+    """
+    get = cache.get
+    get_many = cache.get_many
+
+    def get_medido(key, default=None, version=None):
+        valor = get(key, _FALTA, version=version)
+        if valor is _FALTA:
+            medicion.cache_fallos += 1
+            return default
+        medicion.cache_aciertos += 1
+        return valor
+
+    def get_many_medido(keys, version=None):
+        keys = list(keys)
+        valores = get_many(keys, version=version)
+        medicion.cache_aciertos += len(valores)
+        medicion.cache_fallos += len(keys) - len(valores)
+        return valores
+
+    cache.get = get_medido
+    # El get_many de BaseCache llama a self.get: ya queda contado por get_medido
+    propio = type(cache).get_many is not BaseCache.get_many
+    if propio:
+        cache.get_many = get_many_medido
+
+    def deshacer():
+        del cache.get
+        if propio:
+            del cache.get_many
+    return deshacer
@@ -0,0 +1,253 @@
+"""
+Django management command to benchmark every importer end to end.
+Usage: python manage.py bench_imports --filas 1000,10000 --salida bench.json
+
+Each case (importer x size) runs in its own process against a fresh test
+database (SQLite file or PostgreSQL test_<name>, whichever DATABASE_URL
+points to), so the peak memory and the database state of one case do not
+leak into the next.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+from apps.imports import sinteticos
+from apps.imports.services.metrics import ImportMetrics
+from apps.imports.views import IMPORTERS
+
+
+class Command(BaseCommand):
+    help = 'Benchmark preview + execute of each importer on synthetic files and write a JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipos',
+            default=','.join(IMPORTERS),
+            help='Comma separated importers to run'
+        )
+        parser.add_argument(
+            '--filas',
+            default='1000,10000',
+            help='Comma separated file sizes (rows)'
+        )
+        parser.add_argument(
+            '--formato',
+            choices=['xlsx', 'csv'],
+            default='xlsx',
+            help='Format of the synthetic files'
+        )
+        parser.add_argument(
+            '--rondas',
+            type=int,
+            default=2,
+            help='Imports of the same file per case (1 = fresh import, 2+ = re-imports)'
+        )
+        parser.add_argument(
+            '--hash-lento',
+            action='store_true',
+            help='Hash client passwords with the default hasher (very slow) instead of the import hasher'
+        )
+        parser.add_argument(
+            '--salida',
+            default='bench_imports.json',
+            help='Path of the JSON report'
+        )
+        parser.add_argument(
+            '--comparar',
+            help='Previous JSON report to compare rows/s against'
+        )
+        parser.add_argument(
+            '--tolerancia',
+            type=float,
+            default=0.1,
+            help='Relative rows/s drop reported as a regression (default 0.1 = 10%%)'
+        )
+        # Uso interno: corre un caso en este proceso y escribe su resultado
+        parser.add_argument('--caso', nargs=2, metavar=('TIPO', 'ARCHIVO'), help=argparse.SUPPRESS)
+        parser.add_argument('--resultado', help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['caso']:
+            return self._correr_caso(options)
+
+        tipos = [tipo.strip() for tipo in options['tipos'].split(',') if tipo.strip()]
+        invalidos = [tipo for tipo in tipos if tipo not in IMPORTERS or tipo not in sinteticos.GENERADORES]
+        if invalidos:
+            raise CommandError(f'Unknown importers: {", ".join(invalidos)}')
+        tamanos = [int(filas) for filas in options['filas'].split(',') if filas.strip()]
+
+        casos = []
+        with tempfile.TemporaryDirectory() as tmp:
+            for tipo in tipos:
+                encabezados, generador = sinteticos.GENERADORES[tipo]
+                for filas in tamanos:
+                    archivo = os.path.join(tmp, f'{tipo}_{filas}.{options["formato"]}')
+                    escribir = sinteticos.escribir_csv if options['formato'] == 'csv' else sinteticos.escribir_xlsx
+                    escribir(archivo, encabezados, generador(filas))
+
+                    self.stdout.write(f'{tipo} x {filas}...')
+                    for caso in self._correr_en_proceso(tipo, archivo, options, tmp):
+                        caso['filas_archivo'] = filas
+                        caso['formato'] = options['formato']
+                        casos.append(caso)
+                        self.stdout.write(
+                            f'  round {caso["ronda"]}: {caso["total_s"]:.2f}s, '
+                            f'{caso["filas_por_segundo"]:,.0f} rows/s, {caso["consultas"]} queries, '
+                            f'+{caso["memoria_pico_mb"]} MB peak'
+                        )
+
+        reporte = {
+            'generado': timezone.now().isoformat(),
+            'commit': self._commit(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'base_de_datos': connection.vendor,
+            'cpus': os.cpu_count(),
+            'parametros': {
+                'tipos': tipos,
+                'filas': tamanos,
+                'formato': options['formato'],
+                'rondas': options['rondas'],
+                'hash_lento': options['hash_lento'],
+            },
+            'casos': casos,
+        }
+        with open(options['salida'], 'w', encoding='utf-8') as f:
+            json.dump(reporte, f, indent=2, ensure_ascii=False)
+        self.stdout.write(self.style.SUCCESS(f'Report written to {options["salida"]}'))
+
+        if options['comparar']:
+            self._comparar(reporte, options['comparar'], options['tolerancia'])
+
+    def _correr_en_proceso(self, tipo, archivo, options, tmp):
+        """Corre un caso en un proceso nuevo (python -m django bench_imports --caso ...)."""
+        resultado = os.path.join(tmp, 'resultado.json')
+        comando = [
+            sys.executable, '-m', 'django', 'bench_imports',
+            '--caso', tipo, archivo,
+            '--resultado', resultado,
+            '--rondas', str(options['rondas']),
+            '--settings', os.environ.get('DJANGO_SETTINGS_MODULE', 'paginaflexs.settings'),
+        ]
+        if options['hash_lento']:
+            comando.append('--hash-lento')
+        proceso = subprocess.run(comando, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if proceso.returncode != 0:
+            raise CommandError(f'Case {tipo} failed:\n{proceso.stderr[-2000:]}')
+        with open(resultado, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _correr_caso(self, options):
+        """Crea la base de prueba, importa el archivo las rondas pedidas y la destruye."""
+        tipo, archivo = options['caso']
+        # Medir la lectura y el parseo en cada ronda, sin la caché de archivos
+        settings.IMPORTS_CACHE_DIR = ''
+        if connection.vendor == 'sqlite':
+            # Archivo en disco en lugar de la base en memoria que usan los tests
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = os.path.join(
+                os.path.dirname(options['resultado']), 'bench.sqlite3'
+            )
+
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            opciones = {} if options['hash_lento'] else {'hash_rapido': True}
+            memoria_base = ImportMetrics.memoria_proceso_mb()
+            casos = []
+            for ronda in range(1, max(options['rondas'], 1) + 1):
+                casos.append(self._importar(tipo, archivo, opciones, ronda, memoria_base))
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+
+        with open(options['resultado'], 'w', encoding='utf-8') as f:
+            json.dump(casos, f)
+
+    def _importar(self, tipo, archivo, opciones, ronda, memoria_base):
+        """Preview + ejecutar de un archivo; retorna las métricas de la corrida."""
+        importer = IMPORTERS[tipo]['class'](archivo, opciones=dict(opciones))
+
+        inicio = time.perf_counter()
+        preview = importer.preview()
+        preview_s = time.perf_counter() - inicio
+        consultas_preview = importer.metricas.consultas
+
+        inicio = time.perf_counter()
+        log = importer.ejecutar()
+        ejecutar_s = time.perf_counter() - inicio
+
+        total_s = preview_s + ejecutar_s
+        return {
+            'tipo': tipo,
+            'ronda': ronda,
+            'filas': log.total_filas,
+            'preview_s': round(preview_s, 3),
+            'ejecutar_s': round(ejecutar_s, 3),
+            'total_s': round(total_s, 3),
+            'filas_por_segundo': round(log.total_filas / total_s, 1) if total_s else 0,
+            'consultas': log.consultas_sql,
+            'consultas_preview': consultas_preview,
+            'memoria_base_mb': memoria_base,
+            'memoria_pico_mb': log.memoria_pico_mb,
+            'tiempos': {
+                'lectura': log.tiempo_lectura,
+                'parseo': log.tiempo_parseo,
+                'busqueda': log.tiempo_busqueda,
+                'escritura': log.tiempo_escritura,
+            },
+            'a_crear': preview['a_crear'],
+            'a_actualizar': preview['a_actualizar'],
+            'creados': log.creados,
+            'actualizados': log.actualizados,
+            'sin_cambios': log.sin_cambios,
+            'errores': log.errores,
+        }
+
+    def _comparar(self, reporte, ruta, tolerancia):
+        """Compara rows/s por (tipo, filas, ronda) con un reporte anterior."""
+        with open(ruta, encoding='utf-8') as f:
+            anterior = json.load(f)
+        previos = {
+            (caso['tipo'], caso['filas_archivo'], caso['ronda']): caso
+            for caso in anterior.get('casos', [])
+        }
+
+        self.stdout.write(f'Compared with {ruta} (commit {anterior.get("commit") or "?"}):')
+        regresiones = 0
+        for caso in reporte['casos']:
+            previo = previos.get((caso['tipo'], caso['filas_archivo'], caso['ronda']))
+            if not previo or not previo['filas_por_segundo']:
+                continue
+            cambio = caso['filas_por_segundo'] / previo['filas_por_segundo'] - 1
+            linea = (
+                f'  {caso["tipo"]} x {caso["filas_archivo"]} round {caso["ronda"]}: '
+                f'{previo["filas_por_segundo"]:,.0f} -> {caso["filas_por_segundo"]:,.0f} rows/s ({cambio:+.0%}), '
+                f'queries {previo["consultas"]} -> {caso["consultas"]}'
+            )
+            if cambio < -tolerancia:
+                regresiones += 1
+                self.stdout.write(self.style.ERROR(linea))
+            else:
+                self.stdout.write(linea)
+
+        if regresiones:
+            self.stdout.write(self.style.WARNING(f'{regresiones} case(s) slower than the tolerance'))
+
+    @staticmethod
+    def _commit():
+        """Commit actual del repositorio, si se puede obtener."""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip() or None
+        except (OSError, subprocess.CalledProcessError):
+            return None
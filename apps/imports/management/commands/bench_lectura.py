@@ -0,0 +1,71 @@
+"""
+Django management command to benchmark the xlsx readers (openpyxl vs LectorXlsx).
+Usage: python manage.py bench_lectura --escala 50
+"""
+import glob
+import os
+import tempfile
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from apps.imports.views import IMPORTERS
+from apps.imports import sinteticos
+
+
+class Command(BaseCommand):
+    help = 'Benchmark reading xlsx files with openpyxl read_only vs the iterparse reader'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'archivos',
+            nargs='*',
+            help='Files to read (default: the sample files in data/)'
+        )
+        parser.add_argument(
+            '--escala',
+            type=int,
+            default=50,
+            help='Times the data rows of each file are repeated'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Runs per reader (the best one is reported)'
+        )
+
+    def handle(self, *args, **options):
+        archivos = options['archivos'] or sorted(glob.glob(os.path.join(settings.BASE_DIR, 'data', '*.xlsx')))
+        if not archivos:
+            raise CommandError('No xlsx files to read')
+
+        # Cualquier importador sirve: la lectura es la de BaseImporter
+        importer_class = IMPORTERS['productos']['class']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for archivo in archivos:
+                escalado = os.path.join(tmp, os.path.basename(archivo))
+                sinteticos.escalar_xlsx(archivo, escalado, options['escala'])
+                tamano = os.path.getsize(escalado) / 1024 / 1024
+                self.stdout.write(f'{os.path.basename(archivo)} x{options["escala"]} ({tamano:.1f} MB)')
+
+                resultados = {}
+                for nombre, lector_rapido in (('openpyxl', False), ('iterparse', True)):
+                    duraciones = []
+                    for _ in range(max(options['repeticiones'], 1)):
+                        importer = importer_class(escalado, opciones={'lector_rapido': lector_rapido})
+                        inicio = time.perf_counter()
+                        datos = importer.leer_archivo()
+                        duraciones.append(time.perf_counter() - inicio)
+                    resultados[nombre] = (min(duraciones), datos, importer.columnas)
+
+                base, datos_base, columnas_base = resultados['openpyxl']
+                for nombre, (duracion, datos, columnas) in resultados.items():
+                    if (datos, columnas) != (datos_base, columnas_base):
+                        raise CommandError(f'{nombre} rows differ from openpyxl for {archivo}')
+                    self.stdout.write(
+                        f'  {nombre}: {duracion:.2f}s, {len(datos) / duracion:,.0f} rows/s '
+                        f'(x{base / duracion:.1f})'
+                    )
+
+        self.stdout.write(self.style.SUCCESS('Done (both readers returned the same rows)'))
@@ -0,0 +1,83 @@
+"""
+Django management command to benchmark the parse/validate stage of an import.
+Usage: python manage.py bench_normalizacion --filas 200000 --workers 1,2,4
+"""
+import os
+import tempfile
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.imports.views import IMPORTERS
+from apps.imports import sinteticos
+
+
+class Command(BaseCommand):
+    help = 'Benchmark row normalization, serial vs process pool'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tipo',
+            default='abrazaderas',
+            choices=list(IMPORTERS),
+            help='Importer to benchmark'
+        )
+        parser.add_argument(
+            '--archivo',
+            help='Existing file to read (default: synthetic abrazaderas file)'
+        )
+        parser.add_argument(
+            '--filas',
+            type=int,
+            default=200000,
+            help='Rows of the synthetic file'
+        )
+        parser.add_argument(
+            '--workers',
+            default='1,2,4',
+            help='Comma separated worker counts (1 = serial)'
+        )
+
+    def handle(self, *args, **options):
+        workers_lista = [int(w) for w in options['workers'].split(',') if w.strip()]
+        archivo = options['archivo']
+
+        with tempfile.TemporaryDirectory() as tmp:
+            if not archivo:
+                if options['tipo'] != 'abrazaderas':
+                    raise CommandError('Synthetic files are only generated for abrazaderas; use --archivo')
+                archivo = os.path.join(tmp, 'abrazaderas.xlsx')
+                self.stdout.write(f'Generating {options["filas"]} rows...')
+                sinteticos.escribir_xlsx(
+                    archivo,
+                    sinteticos.ENCABEZADOS_ABRAZADERAS,
+                    sinteticos.filas_abrazaderas(options['filas'])
+                )
+
+            importer = IMPORTERS[options['tipo']]['class'](archivo)
+            importer.MIN_FILAS_PARALELO = 0  # Forzar el pool aunque el archivo sea chico
+
+            inicio = time.perf_counter()
+            importer.datos = importer.leer_archivo()
+            lectura = time.perf_counter() - inicio
+            total = len(importer.datos)
+            self.stdout.write(f'Read {total} rows in {lectura:.2f}s')
+
+            referencia = None
+            for workers in workers_lista:
+                importer.opciones['workers'] = workers
+                inicio = time.perf_counter()
+                resultado = list(importer.filas_normalizadas())
+                duracion = time.perf_counter() - inicio
+
+                errores = [(numero, error) for numero, datos, error in resultado if error]
+                if referencia is None:
+                    referencia = resultado
+                elif resultado != referencia:
+                    raise CommandError(f'Results with {workers} workers differ from the serial run')
+
+                self.stdout.write(
+                    f'  workers={workers}: {duracion:.2f}s, '
+                    f'{total / duracion:,.0f} rows/s, {len(errores)} errors '
+                    f'(first rows: {[numero for numero, _ in errores[:3]]})'
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Done ({os.cpu_count()} CPUs available)'))
@@ -0,0 +1,71 @@
+"""
+Django management command to benchmark the abrazaderas description parser.
+Usage: python manage.py bench_parser --filas 200000
+"""
+import time
+from django.core.management.base import BaseCommand
+from apps.imports import sinteticos
+from apps.imports.parsers import abrazaderas
+from apps.imports.parsers.abrazaderas import AbrazaderaParser
+
+
+class Command(BaseCommand):
+    help = 'Benchmark AbrazaderaParser per-row vs batch throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--filas',
+            type=int,
+            default=200000,
+            help='Synthetic descriptions to parse'
+        )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=500,
+            help='Batch size for parsear_lote'
+        )
+        parser.add_argument(
+            '--repeticiones',
+            type=int,
+            default=3,
+            help='Runs per mode (the best one is reported)'
+        )
+
+    def handle(self, *args, **options):
+        textos = [descripcion for descripcion, _, _ in sinteticos.filas_abrazaderas(options['filas'])]
+        total = len(textos)
+        tam_lote = options['lote']
+        self.stdout.write(f'{total} descriptions, {len(set(textos))} distinct')
+
+        def sin_cache():
+            for texto in textos:
+                AbrazaderaParser._parsear_texto(texto.strip().upper())
+
+        def por_fila():
+            for texto in textos:
+                AbrazaderaParser.parsear(texto)
+
+        def por_lote():
+            for inicio in range(0, total, tam_lote):
+                AbrazaderaParser.parsear_lote(textos[inicio:inicio + tam_lote])
+
+        corridas = [
+            ('per-row, no cache', sin_cache),
+            ('per-row parsear', por_fila),
+            (f'parsear_lote({tam_lote})', por_lote),
+        ]
+        for nombre, funcion in corridas:
+            duraciones = []
+            for _ in range(max(options['repeticiones'], 1)):
+                abrazaderas._parsear_cacheado.cache_clear()
+                inicio = time.perf_counter()
+                funcion()
+                duraciones.append(time.perf_counter() - inicio)
+            duracion = min(duraciones)
+            self.stdout.write(f'  {nombre}: {duracion:.2f}s, {total / duracion:,.0f} rows/s')
+
+        info = abrazaderas._parsear_cacheado.cache_info()
+        self.stdout.write(self.style.SUCCESS(
+            f'Done (cache: {info.hits} hits, {info.misses} misses, {info.currsize} entries)'
+        ))
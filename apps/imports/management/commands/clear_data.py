@@ -1,14 +1,19 @@
 """
-Django management command to clear all clients and products from the database.
+Django management command to clear all orders, clients and products from the database.
 Usage: python manage.py clear_data
+
+Deletes in batches (see apps.panel.borrado): orders first, then clients
+and their users, then products.
 """
 from django.core.management.base import BaseCommand
-from apps.accounts.models import Cliente
-from apps.catalog.models import Producto
+
+from apps.panel import borrado
+from apps.panel import estadisticas
+from apps.panel.models import BorradoMasivo
 
 
 class Command(BaseCommand):
-    help = 'Clear all clients and products from the database'
+    help = 'Clear all orders, clients and products from the database'
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -16,56 +21,54 @@ class Command(BaseCommand):
             action='store_true',
             help='Confirm deletion without prompting'
         )
+        parser.add_argument(
+            '--lote',
+            type=int,
+            default=borrado.LOTE,
+            help=f'Rows deleted per transaction (default {borrado.LOTE})'
+        )
 
     def handle(self, *args, **options):
-        from apps.orders.models import Pedido
-        
-        confirm = options['confirm']
-
-        # Count items
-        client_count = Cliente.objects.count()
-        product_count = Producto.objects.count()
-        order_count = Pedido.objects.count()
+        tipos = [
+            (BorradoMasivo.Tipo.PEDIDOS, 'orders'),
+            (BorradoMasivo.Tipo.CLIENTES, 'clients'),
+            (BorradoMasivo.Tipo.PRODUCTOS, 'products'),
+        ]
 
-        if client_count == 0 and product_count == 0 and order_count == 0:
+        # Count items (clients and products with orders are counted as deletable:
+        # the orders go first)
+        conteos = {tipo: sum(borrado.contar(tipo)) for tipo, _ in tipos}
+        if not any(conteos.values()):
             self.stdout.write(
                 self.style.SUCCESS('Database is already empty - nothing to clear')
             )
             return
 
         self.stdout.write(
-            f'Found {order_count} orders, {client_count} clients and {product_count} products'
+            'Found ' + ', '.join(f'{conteos[tipo]} {nombre}' for tipo, nombre in tipos)
         )
 
-        # Delete all
-        if confirm or (client_count + product_count + order_count) < 100:  # Auto-confirm if few items
-            self.stdout.write('Clearing database...')
-            
-            # Delete orders first (they reference clients)
-            if order_count > 0:
-                deleted_orders = Pedido.objects.all().delete()
-                self.stdout.write(
-                    self.style.SUCCESS(f'Deleted {deleted_orders[0]} orders')
-                )
-            
-            # Delete clients (this also deletes associated users)
-            if client_count > 0:
-                deleted_clients = Cliente.objects.all().delete()
-                self.stdout.write(
-                    self.style.SUCCESS(f'Deleted {deleted_clients[0]} clients')
-                )
-            
-            # Delete products
-            if product_count > 0:
-                deleted_products = Producto.objects.all().delete()
-                self.stdout.write(
-                    self.style.SUCCESS(f'Deleted {deleted_products[0]} products')
-                )
-            
-            self.stdout.write(
-                self.style.SUCCESS('Database cleared successfully!')
-            )
-        else:
+        if not (options['confirm'] or sum(conteos.values()) < 100):  # Auto-confirm if few items
             self.stdout.write(
                 self.style.WARNING('Use --confirm flag to delete data')
             )
+            return
+
+        self.stdout.write('Clearing database...')
+        for tipo, nombre in tipos:
+            total, protegidos = borrado.contar(tipo)
+            if not total and not protegidos:
+                continue
+            borrados = 0
+            for cantidad in borrado.borrar_por_lotes(tipo, lote=options['lote']):
+                borrados += cantidad
+                self.stdout.write(f'  {nombre}: {borrados}/{total}', ending='\r')
+                self.stdout.flush()
+            self.stdout.write(self.style.SUCCESS(f'Deleted {borrados} {nombre}'))
+            if protegidos:
+                self.stdout.write(self.style.WARNING(f'Kept {protegidos} {nombre} referenced by orders'))
+
+        estadisticas.invalidar()
+        self.stdout.write(
+            self.style.SUCCESS('Database cleared successfully!')
+        )
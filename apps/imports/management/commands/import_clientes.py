@@ -22,6 +22,11 @@ class Command(BaseCommand):
             action='store_true',
             help='Update passwords for existing clients'
         )
+        parser.add_argument(
+            '--fast-hash',
+            action='store_true',
+            help='Hash passwords with the low-iteration import hasher (re-hashed on first login)'
+        )
         parser.add_argument(
             '--skip-if-exists',
             action='store_true',
@@ -57,6 +62,8 @@ class Command(BaseCommand):
             with open(file_path, 'rb') as f:
                 # Create importer
                 opciones = {'actualizar_passwords': update_passwords}
+                if options['fast_hash']:
+                    opciones['hash_rapido'] = True
                 importer = ClientImporter(f, opciones=opciones)
 
                 # Preview (analyze)
@@ -2,6 +2,7 @@
 Django management command to import products from an Excel/CSV file.
 Usage: python manage.py import_productos <file_path>
 """
+import argparse
 import os
 from django.core.management.base import BaseCommand, CommandError
 from apps.imports.services.products import ProductImporter
@@ -22,6 +23,12 @@ class Command(BaseCommand):
             action='store_true',
             help='Skip import if products already exist in database'
         )
+        parser.add_argument(
+            '--staging',
+            action=argparse.BooleanOptionalAction,
+            default=None,
+            help='Force (or disable with --no-staging) the staging-table import; by default it is used for large files'
+        )
 
     def handle(self, *args, **options):
         from apps.catalog.models import Producto
@@ -50,7 +57,10 @@ class Command(BaseCommand):
             # Open file
             with open(file_path, 'rb') as f:
                 # Create importer
-                importer = ProductImporter(f)
+                opciones = {}
+                if options['staging'] is not None:
+                    opciones['staging'] = options['staging']
+                importer = ProductImporter(f, opciones=opciones)
 
                 # Preview (analyze)
                 self.stdout.write('Analyzing file...')
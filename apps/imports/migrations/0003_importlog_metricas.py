@@ -0,0 +1,53 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imports', '0002_alter_importlog_estado_alter_importlog_tipo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='consultas_sql',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='duracion',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='filas_por_segundo',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='memoria_pico_mb',
+            field=models.FloatField(blank=True, help_text='Pico de memoria residente del proceso (MB)', null=True),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='tiempo_busqueda',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='tiempo_escritura',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='tiempo_lectura',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name='importlog',
+            name='tiempo_parseo',
+            field=models.FloatField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imports', '0003_importlog_metricas'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='importlog',
+            name='sin_cambios',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imports', '0004_importlog_sin_cambios'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importlog',
+            name='memoria_pico_mb',
+            field=models.FloatField(blank=True, help_text='Aumento de la memoria residente del proceso durante la importación (MB)', null=True),
+        ),
+    ]
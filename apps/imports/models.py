@@ -36,9 +36,24 @@ class ImportLog(models.Model):
     total_filas = models.IntegerField(default=0)
     creados = models.IntegerField(default=0)
     actualizados = models.IntegerField(default=0)
+    sin_cambios = models.IntegerField(default=0)  # Filas existentes idénticas (no se escriben)
     errores = models.IntegerField(default=0)
     procesados = models.IntegerField(default=0)  # Para barra de progreso
-    
+
+    # Métricas de rendimiento (segundos, salvo indicación)
+    tiempo_lectura = models.FloatField(default=0)
+    tiempo_parseo = models.FloatField(default=0)
+    tiempo_busqueda = models.FloatField(default=0)
+    tiempo_escritura = models.FloatField(default=0)
+    duracion = models.FloatField(default=0)
+    filas_por_segundo = models.FloatField(default=0)
+    memoria_pico_mb = models.FloatField(
+        null=True,
+        blank=True,
+        help_text='Aumento de la memoria residente del proceso durante la importación (MB)'
+    )
+    consultas_sql = models.IntegerField(default=0)
+
     # Fechas
     created_at = models.DateTimeField(auto_now_add=True)
     completed_at = models.DateTimeField(null=True, blank=True)
@@ -3,6 +3,75 @@ Parser de descripción para Abrazaderas.
 Extrae atributos automáticamente del nombre/descripción del producto.
 """
 import re
+from functools import lru_cache
+
+
+# Patrones compilados una sola vez a nivel de módulo
+REGEX_DIMENSIONES = re.compile(r'\s*X\s*(\d+)')
+REGEX_FRACCION = re.compile(r'\b(\d+(?:-\d+)?/\d+)\b')
+REGEX_ENTERO = re.compile(r'\b(1|2|3|4)\b(?!\d)')
+# Tramos de caracteres de medida ([0-9/-]) precedidos por espacio o "DE"
+REGEX_TRAMO_MEDIDA = re.compile(r'(?: |DE)([\d/-]+)')
+# Tramo de caracteres de medida al final del texto
+REGEX_TRAMO_FINAL = re.compile(r'[\d/-]+$')
+
+
+class BuscadorPalabras:
+    """
+    Busca palabras clave de varias categorías en una sola pasada.
+
+    Compila todas las palabras en una alternancia dentro de un lookahead,
+    así se encuentran también las coincidencias superpuestas. Para cada
+    categoría gana el valor de menor prioridad encontrado, igual que
+    recorrer los diccionarios en orden y quedarse con el primero.
+    """
+
+    def __init__(self, categorias):
+        """
+        Args:
+            categorias: {categoria: [(valor, [palabras]), ...]} en orden de prioridad
+        """
+        self._info = {}
+        por_categoria = []
+        for categoria, valores in categorias.items():
+            palabras_categoria = []
+            for prioridad, (valor, palabras) in enumerate(valores):
+                for palabra in palabras:
+                    if palabra not in self._info:
+                        self._info[palabra] = (categoria, prioridad, valor)
+                        palabras_categoria.append(palabra)
+            por_categoria.append(palabras_categoria)
+
+        # En una posición la alternancia reporta solo la primera palabra que
+        # coincide: si una palabra es prefijo de otra de distinta categoría
+        # se necesita un patrón por categoría para no perder coincidencias.
+        todas = [p for palabras in por_categoria for p in palabras]
+        if self._hay_prefijos_cruzados(todas):
+            grupos = por_categoria
+        else:
+            grupos = [todas]
+        self._patrones = [
+            re.compile('(?=(' + '|'.join(re.escape(p) for p in grupo) + '))')
+            for grupo in grupos if grupo
+        ]
+
+    def _hay_prefijos_cruzados(self, palabras):
+        for a in palabras:
+            for b in palabras:
+                if a != b and b.startswith(a) and self._info[a][0] != self._info[b][0]:
+                    return True
+        return False
+
+    def buscar(self, texto):
+        """Retorna {categoria: valor} con el valor prioritario de cada categoría."""
+        mejores = {}
+        for patron in self._patrones:
+            for palabra in patron.findall(texto):
+                categoria, prioridad, valor = self._info[palabra]
+                actual = mejores.get(categoria)
+                if actual is None or prioridad < actual[0]:
+                    mejores[categoria] = (prioridad, valor)
+        return {categoria: valor for categoria, (prioridad, valor) in mejores.items()}
 
 
 class AbrazaderaParser:
@@ -27,6 +96,9 @@ class AbrazaderaParser:
         'ZINC': ['ZINC', 'ZINCADO'],
     }
     
+    # Formas comunes (búsqueda simple si no matcheo la regex estricta)
+    FORMAS_COMUNES = ['CURVA', 'PLANA', 'SEMICURVA', '/S/CURVA', 'RECTA']
+
     # Medidas estándar en pulgadas
     MEDIDAS_ESTANDAR = [
         '1/4', '5/16', '3/8', '7/16', '1/2', '9/16', '5/8', '11/16',
@@ -41,17 +113,50 @@ class AbrazaderaParser:
         re.IGNORECASE
     )
 
+    # Tamaño de la memoria de descripciones ya parseadas
+    TAMANO_CACHE = 16384
+
     @classmethod
     def parsear(cls, texto):
         """
         Parsea un texto (nombre o descripción) y extrae atributos.
         Intenta primero con el formato estricto, luego fallback a búsqueda por palabras clave.
+
+        Los resultados se memorizan por descripción normalizada: las listas
+        de precios repiten mucho las mismas descripciones.
         """
         if not texto:
             return {'atributos': {}, 'warnings': []}
         
-        texto = texto.strip()
-        texto_upper = texto.upper()
+        return cls._copiar(_parsear_cacheado(texto.strip().upper()))
+
+    @classmethod
+    def parsear_lote(cls, textos):
+        """
+        Parsea una lista de textos y retorna los resultados en el mismo orden.
+
+        Comparte la memoria de parsear(): las descripciones repetidas, dentro
+        del lote o entre lotes, se parsean una sola vez.
+        """
+        parsear_cacheado = _parsear_cacheado
+        copiar = cls._copiar
+        return [
+            copiar(parsear_cacheado(texto.strip().upper())) if texto
+            else {'atributos': {}, 'warnings': []}
+            for texto in textos
+        ]
+
+    @staticmethod
+    def _copiar(resultado):
+        """Copia un resultado memorizado para que el llamador pueda modificarlo."""
+        return {
+            'atributos': dict(resultado['atributos']),
+            'warnings': list(resultado['warnings'])
+        }
+
+    @classmethod
+    def _parsear_texto(cls, texto_upper):
+        """Parsea un texto ya normalizado (strip + mayúsculas), sin memoria."""
         atributos = {}
         warnings = []
         
@@ -72,20 +177,12 @@ class AbrazaderaParser:
                 'warnings': []
             }
             
-        # 2. Fallback: Búsqueda por palabras clave (Lógica anterior mejorada)
+        # 2. Fallback: Búsqueda por palabras clave (una sola pasada)
+        encontrados = BUSCADOR_PALABRAS.buscar(texto_upper)
         
         # Detectar tipo de fabricación
-        tipo_encontrado = None
-        for tipo, palabras in cls.TIPOS_FABRICACION.items():
-            for palabra in palabras:
-                if palabra in texto_upper:
-                    tipo_encontrado = tipo
-                    break
-            if tipo_encontrado:
-                break
-        
-        if tipo_encontrado:
-            atributos['tipo_fabricacion'] = tipo_encontrado
+        if 'tipo_fabricacion' in encontrados:
+            atributos['tipo_fabricacion'] = encontrados['tipo_fabricacion']
         else:
             warnings.append('No se detectó tipo de fabricación (TREFILADA/LAMINADA)')
         
@@ -98,31 +195,19 @@ class AbrazaderaParser:
             
         # Detectar ancho y largo si aparecen con formato "X numero" pero sin estructura fija
         # Buscamos patrones como "X 85" o "X85"
-        dimensiones = re.findall(r'\s*X\s*(\d+)', texto_upper)
+        dimensiones = REGEX_DIMENSIONES.findall(texto_upper)
         if len(dimensiones) >= 1:
             atributos['ancho'] = dimensiones[0]
         if len(dimensiones) >= 2:
             atributos['largo'] = dimensiones[1]
         
         # Detectar material
-        material_encontrado = None
-        for material, palabras in cls.MATERIALES.items():
-            for palabra in palabras:
-                if palabra in texto_upper:
-                    material_encontrado = material
-                    break
-            if material_encontrado:
-                break
+        if 'material' in encontrados:
+            atributos['material'] = encontrados['material']
         
-        if material_encontrado:
-            atributos['material'] = material_encontrado
-            
-        # Detectar forma (búsqueda simple al final si no matcheo regex)
-        formas_comunes = ['CURVA', 'PLANA', 'SEMICURVA', '/S/CURVA', 'RECTA']
-        for forma in formas_comunes:
-            if forma in texto_upper:
-                atributos['forma'] = forma
-                break
+        # Detectar forma
+        if 'forma' in encontrados:
+            atributos['forma'] = encontrados['forma']
         
         return {
             'atributos': atributos,
@@ -132,26 +217,30 @@ class AbrazaderaParser:
     @classmethod
     def _extraer_medida(cls, texto):
         """Extrae la medida del texto."""
-        # Primero buscar medidas estándar conocidas
-        for medida in cls.MEDIDAS_ESTANDAR:
-            # Buscar la medida con contexto (espacio o DE antes)
-            if f' {medida}' in texto or f'DE {medida}' in texto or f'DE{medida}' in texto:
-                return medida
-            # Buscar al final del texto
-            if texto.endswith(medida) or texto.endswith(f' {medida}"') or texto.endswith(f' {medida}'):
-                return medida
+        # Primero buscar medidas estándar conocidas: una medida aparece con
+        # contexto (" 1/2", "DE1/2") si es prefijo de un tramo de caracteres
+        # de medida, o al final del texto si es sufijo del tramo final.
+        mejor = None
+        for tramo in REGEX_TRAMO_MEDIDA.findall(texto):
+            indice = _indice_medida_prefijo(tramo)
+            if indice is not None and (mejor is None or indice < mejor):
+                mejor = indice
+        final = REGEX_TRAMO_FINAL.search(texto)
+        if final:
+            indice = _indice_medida_sufijo(final.group())
+            if indice is not None and (mejor is None or indice < mejor):
+                mejor = indice
+        if mejor is not None:
+            return cls.MEDIDAS_ESTANDAR[mejor]
         
         # Buscar patrones de fracciones: X/Y o X-Y/Z
-        patron_fraccion = r'\b(\d+(?:-\d+)?/\d+)\b'
-        fracciones = re.findall(patron_fraccion, texto)
-        if fracciones:
-            return fracciones[0]
+        fraccion = REGEX_FRACCION.search(texto)
+        if fraccion:
+            return fraccion.group(1)
         
         # Buscar números enteros que puedan ser medidas (1, 2, 3, 4)
-        patron_entero = r'\b(1|2|3|4)\b(?!\d)'
-        enteros = re.findall(patron_entero, texto)
         # Evitar falsos positivos - solo si está cerca de palabras clave
-        for entero in enteros:
+        for entero in REGEX_ENTERO.findall(texto):
             if f' {entero}"' in texto or f' {entero} ' in texto:
                 return entero
         
@@ -173,3 +262,33 @@ class AbrazaderaParser:
         medida = medida.replace('"', '').replace("'", '').strip()
         
         return medida
+
+
+BUSCADOR_PALABRAS = BuscadorPalabras({
+    'tipo_fabricacion': list(AbrazaderaParser.TIPOS_FABRICACION.items()),
+    'material': list(AbrazaderaParser.MATERIALES.items()),
+    'forma': [(forma, [forma]) for forma in AbrazaderaParser.FORMAS_COMUNES],
+})
+
+
+@lru_cache(maxsize=AbrazaderaParser.TAMANO_CACHE)
+def _parsear_cacheado(texto_upper):
+    return AbrazaderaParser._parsear_texto(texto_upper)
+
+
+@lru_cache(maxsize=1024)
+def _indice_medida_prefijo(tramo):
+    """Índice de la primera medida estándar que es prefijo del tramo."""
+    for indice, medida in enumerate(AbrazaderaParser.MEDIDAS_ESTANDAR):
+        if tramo.startswith(medida):
+            return indice
+    return None
+
+
+@lru_cache(maxsize=1024)
+def _indice_medida_sufijo(tramo):
+    """Índice de la primera medida estándar que es sufijo del tramo."""
+    for indice, medida in enumerate(AbrazaderaParser.MEDIDAS_ESTANDAR):
+        if tramo.endswith(medida):
+            return indice
+    return None
@@ -3,6 +3,9 @@ Abrazaderas Importer - Importador especializado con anti-duplicado.
 Extrae atributos automáticamente de la descripción.
 """
 from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+from apps.catalog import services as catalog_services
 from apps.catalog.models import Producto, Categoria, DefinicionAtributo, ProductoAtributo
 from .base import BaseImporter
 from ..parsers.abrazaderas import AbrazaderaParser
@@ -20,6 +23,11 @@ class AbrazaderaImporter(BaseImporter):
     TIPO = 'abrazaderas'
     COLUMNAS_REQUERIDAS = ['codigo', 'descripcion']
     COLUMNAS_OPCIONALES = ['precio', 'stock']
+    # Nombres alternativos aceptados (la comparación ignora mayúsculas)
+    COLUMNAS_ALIAS = {
+        'codigo': ['SKU', 'Código'],
+        'descripcion': ['Descripción', 'Nombre'],
+    }
     
     def __init__(self, archivo, usuario=None, opciones=None):
         super().__init__(archivo, usuario, opciones)
@@ -114,21 +122,19 @@ class AbrazaderaImporter(BaseImporter):
         self._asegurar_definiciones_base()
         return super().preview()
     
-    def procesar_fila(self, fila, dry_run=False):
-        """Procesa una fila de abrazadera extrayendo atributos de la descripción."""
-        # Obtener valores - aceptar variaciones de nombres de columna
-        sku = self.get_valor(fila, 'codigo', '') or self.get_valor(fila, 'SKU', '') or self.get_valor(fila, 'Codigo', '')
-        sku = str(sku).strip()
+    def normalizar_fila(self, fila):
+        """Valida la fila y extrae los atributos de la descripción (sin acceso a la base)."""
+        # Obtener valores (las variaciones de nombres se resuelven con COLUMNAS_ALIAS)
+        sku = str(self.get_valor(fila, 'codigo', '')).strip()
         if not sku:
             raise ValueError("Codigo/SKU es requerido")
         
-        descripcion = self.get_valor(fila, 'descripcion', '') or self.get_valor(fila, 'Descripcion', '') or self.get_valor(fila, 'nombre', '') or self.get_valor(fila, 'Nombre', '')
-        descripcion = str(descripcion).strip()
+        descripcion = str(self.get_valor(fila, 'descripcion', '')).strip()
         if not descripcion:
             raise ValueError("Descripcion es requerida")
         
         # Precio (opcional)
-        precio_raw = self.get_valor(fila, 'precio', '') or self.get_valor(fila, 'Precio', '')
+        precio_raw = self.get_valor(fila, 'precio', '')
         precio = None
         if precio_raw:
             try:
@@ -142,7 +148,7 @@ class AbrazaderaImporter(BaseImporter):
                 pass
         
         # Stock (opcional)
-        stock_raw = self.get_valor(fila, 'stock', '') or self.get_valor(fila, 'Stock', '')
+        stock_raw = self.get_valor(fila, 'stock', '')
         stock = None
         if stock_raw:
             try:
@@ -152,7 +158,22 @@ class AbrazaderaImporter(BaseImporter):
         
         # PARSEAR ATRIBUTOS DE LA DESCRIPCIÓN
         resultado_parser = AbrazaderaParser.parsear(descripcion)
-        atributos_detectados = resultado_parser['atributos']
+        
+        return {
+            'sku': sku,
+            'descripcion': descripcion,
+            'precio': precio,
+            'stock': stock,
+            'atributos': resultado_parser['atributos'],
+        }
+    
+    def procesar_fila(self, fila, dry_run=False):
+        """Procesa una fila de abrazadera ya normalizada."""
+        sku = fila['sku']
+        descripcion = fila['descripcion']
+        precio = fila['precio']
+        stock = fila['stock']
+        atributos_detectados = fila['atributos']
         
         # Verificar si el producto existe (anti-duplicado)
         try:
@@ -191,19 +212,174 @@ class AbrazaderaImporter(BaseImporter):
         if self.categoria_abrazaderas not in producto.categorias.all():
             producto.categorias.add(self.categoria_abrazaderas)
         
-        # Crear/actualizar atributos detectados
+        # Crear/actualizar atributos detectados (las opciones se completan al final)
         for nombre_attr, valor in atributos_detectados.items():
             if valor and nombre_attr in self.definiciones:
+                defn = self.definiciones[nombre_attr]
+                valor = str(valor).strip()
                 ProductoAtributo.objects.update_or_create(
                     producto=producto,
-                    definicion=self.definiciones[nombre_attr],
-                    defaults={'valor': str(valor).strip()}
+                    definicion=defn,
+                    defaults={'valor_id': catalog_services.valores_atributo(defn.pk, [valor])[valor]}
                 )
-                
-                # Agregar valor a las opciones si no existe (para filtros tipo lista)
-                defn = self.definiciones[nombre_attr]
-                if defn.tipo == 'lista' and valor not in defn.opciones:
-                    defn.opciones.append(valor)
-                    defn.save(update_fields=['opciones'])
         
         return (accion, producto)
+    
+    def procesar_lote(self, filas, dry_run=False):
+        """
+        Procesa un lote con operaciones en bloque.
+        
+        En lugar de ~15 consultas por fila, resuelve el lote con una lectura
+        de productos, una de atributos y bulk_create/bulk_update. Si algo
+        falla (ej: un valor demasiado largo para la columna) el lote se
+        revierte y se reprocesa fila por fila para aislar el error.
+        """
+        validas = [(numero_fila, datos) for numero_fila, datos, error in filas if not error]
+        if not validas:
+            return super().procesar_lote(filas, dry_run)
+        
+        try:
+            if dry_run:
+                acciones = self._previsualizar_lote(validas)
+            else:
+                with transaction.atomic():
+                    acciones = self._guardar_lote(validas)
+        except Exception:
+            return super().procesar_lote(filas, dry_run)
+        
+        return [
+            (numero_fila, None, error) if error else (numero_fila, acciones[numero_fila], None)
+            for numero_fila, datos, error in filas
+        ]
+    
+    def _previsualizar_lote(self, validas):
+        """Acción de cada fila del lote con una sola consulta."""
+        existentes = set(
+            Producto.objects.filter(
+                sku__in={datos['sku'] for _, datos in validas}
+            ).values_list('sku', flat=True)
+        )
+        return {
+            numero_fila: 'actualizar' if datos['sku'] in existentes else 'crear'
+            for numero_fila, datos in validas
+        }
+    
+    def _guardar_lote(self, validas):
+        """
+        Guarda un lote de filas válidas.
+        
+        Returns:
+            Dict {numero_fila: accion}
+        """
+        if not self.categoria_abrazaderas:
+            self._inicializar_categoria()
+            self._asegurar_definiciones_base()
+        
+        productos = Producto.objects.in_bulk(
+            {datos['sku'] for _, datos in validas},
+            field_name='sku'
+        )
+        
+        # Aplicar las filas en orden: un SKU repetido en el lote se crea en
+        # su primera aparición y se actualiza en las siguientes
+        acciones = {}
+        nuevos = {}
+        modificados = {}
+        atributos = {}  # sku -> {nombre_definicion: valor}
+        for numero_fila, datos in validas:
+            sku = datos['sku']
+            producto = productos.get(sku)
+            if producto is None:
+                producto = Producto(
+                    sku=sku,
+                    nombre=datos['descripcion'],
+                    precio=datos['precio'] or Decimal('0'),
+                    stock=datos['stock'] or 0
+                )
+                productos[sku] = nuevos[sku] = producto
+                acciones[numero_fila] = 'crear'
+            else:
+                producto.nombre = datos['descripcion']
+                if datos['precio'] is not None:
+                    producto.precio = datos['precio']
+                if datos['stock'] is not None:
+                    producto.stock = datos['stock']
+                if sku not in nuevos:
+                    modificados[sku] = producto
+                acciones[numero_fila] = 'actualizar'
+            
+            valores = atributos.setdefault(sku, {})
+            for nombre_attr, valor in datos['atributos'].items():
+                if valor and nombre_attr in self.definiciones:
+                    valores[nombre_attr] = str(valor).strip()
+        
+        # Productos
+        if nuevos:
+            Producto.objects.bulk_create(nuevos.values())
+            if any(producto.pk is None for producto in nuevos.values()):
+                # Motores sin RETURNING: recuperar las claves por SKU
+                pks = dict(Producto.objects.filter(sku__in=nuevos).values_list('sku', 'pk'))
+                for sku, producto in nuevos.items():
+                    producto.pk = pks[sku]
+        if modificados:
+            ahora = timezone.now()  # bulk_update no aplica auto_now
+            for producto in modificados.values():
+                producto.updated_at = ahora
+            Producto.objects.bulk_update(
+                modificados.values(),
+                ['nombre', 'precio', 'stock', 'updated_at']
+            )
+        
+        # Asignar categoría Abrazaderas a los que no la tienen
+        ProductoCategoria = Producto.categorias.through
+        ProductoCategoria.objects.bulk_create(
+            [
+                ProductoCategoria(producto_id=producto.pk, categoria_id=self.categoria_abrazaderas.pk)
+                for producto in productos.values()
+            ],
+            ignore_conflicts=True
+        )
+        
+        # Atributos: leer los existentes del lote y aplicar solo la diferencia
+        existentes = {}
+        if modificados:
+            existentes = {
+                (atributo.producto_id, atributo.definicion_id): atributo
+                for atributo in ProductoAtributo.objects.filter(
+                    producto__in=[producto.pk for producto in modificados.values()],
+                    definicion__in=[defn.pk for defn in self.definiciones.values()]
+                )
+            }
+        
+        # Ids de los valores en el diccionario: una lectura (y un INSERT si hay nuevos) por definición
+        por_definicion = {}
+        for valores in atributos.values():
+            for nombre_attr, valor in valores.items():
+                por_definicion.setdefault(nombre_attr, set()).add(valor)
+        valor_ids = {
+            nombre_attr: catalog_services.valores_atributo(self.definiciones[nombre_attr].pk, textos)
+            for nombre_attr, textos in por_definicion.items()
+        }
+        
+        a_crear = []
+        a_actualizar = []
+        for sku, valores in atributos.items():
+            producto = productos[sku]
+            for nombre_attr, valor in valores.items():
+                defn = self.definiciones[nombre_attr]
+                valor_id = valor_ids[nombre_attr][valor]
+                atributo = existentes.get((producto.pk, defn.pk))
+                if atributo is None:
+                    a_crear.append(ProductoAtributo(producto=producto, definicion=defn, valor_id=valor_id))
+                elif atributo.valor_id != valor_id:
+                    atributo.valor_id = valor_id
+                    a_actualizar.append(atributo)
+        
+        ProductoAtributo.objects.bulk_create(a_crear)
+        ProductoAtributo.objects.bulk_update(a_actualizar, ['valor'])
+        
+        return acciones
+    
+    def finalizar_procesamiento(self):
+        """Completa una sola vez las opciones de las definiciones con los valores del diccionario."""
+        catalog_services.sincronizar_opciones(self.definiciones.values())
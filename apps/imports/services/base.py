@@ -4,12 +4,25 @@ Base Importer - Clase base para todos los importadores.
 import os
 import csv
 import io
+import logging
 from abc import ABC, abstractmethod
-from django.db import transaction
+from itertools import chain, islice
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
 from django.utils import timezone
 import openpyxl
 
 from ..models import ImportLog, ImportError
+from . import cache
+from .metrics import ImportMetrics, gc_congelado, gc_pausado
+from .lector_csv import abrir_csv
+from .paralelo import normalizar_en_paralelo
+from .xlsx import LectorXlsx
+
+logger = logging.getLogger(__name__)
+
+# Comienzos de fórmula que la exportación del panel escapa con un apóstrofo
+PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
 
 
 class BaseImporter(ABC):
@@ -18,7 +31,15 @@ class BaseImporter(ABC):
     TIPO = None  # 'productos', 'clientes', 'categorias'
     COLUMNAS_REQUERIDAS = []  # Lista de columnas obligatorias
     COLUMNAS_OPCIONALES = []  # Lista de columnas opcionales
+    COLUMNAS_ALIAS = {}  # {'columna': ['alias1', 'alias2']} nombres alternativos aceptados
     BATCH_SIZE = 500  # Tamaño de lote para procesamiento
+    MIN_FILAS_PARALELO = 5000  # Debajo de esto el costo de levantar el pool no se amortiza
+    MIN_BYTES_LECTOR_RAPIDO = 1024 * 1024  # Excel desde este tamaño se lee con LectorXlsx
+    USAR_CACHE = True  # Guardar las filas leídas y normalizadas en la caché (ver cache.py)
+    VERSION_CACHE = 1  # Subir al cambiar la lectura o normalizar_fila() para invalidar la caché
+    STAGING_MODELO = None  # Modelo destino del procesamiento con tabla de staging
+    CAMPOS_STAGING = ()  # Campos que se cargan en la tabla de staging (vacío = sin staging)
+    CLAVE_STAGING = None  # Campo que identifica la fila en el modelo destino
     
     def __init__(self, archivo, usuario=None, opciones=None):
         """
@@ -33,18 +54,30 @@ class BaseImporter(ABC):
         self.usuario = usuario
         self.opciones = opciones or {}
         self.datos = []
+        self.columnas = []
+        self._indices = {}
+        self._normalizadas = None  # Filas ya normalizadas (preview o caché)
+        self._clave_cache = None
         self.errores = []
         self.preview_data = {
             'filas': [],
             'a_crear': 0,
             'a_actualizar': 0,
+            'sin_cambios': 0,
             'errores': [],
             'total': 0
         }
         self.log = None
+        self.metricas = ImportMetrics()
     
     def leer_archivo(self):
-        """Lee el archivo Excel o CSV y retorna lista de diccionarios."""
+        """
+        Lee el archivo Excel o CSV y retorna una lista de tuplas.
+        
+        Cada fila es una tupla posicional (numero_fila, valor1, valor2, ...)
+        en el orden de los encabezados; las columnas se resuelven una sola
+        vez por archivo con resolver_columnas().
+        """
         nombre = self.archivo.name if hasattr(self.archivo, 'name') else str(self.archivo)
         extension = os.path.splitext(nombre)[1].lower()
         
@@ -56,81 +89,199 @@ class BaseImporter(ABC):
             raise ValueError(f"Formato no soportado: {extension}. Use .xlsx o .csv")
     
     def _leer_excel(self):
-        """Lee archivo Excel usando openpyxl de forma eficiente en memoria."""
-        if hasattr(self.archivo, 'read'):
-            wb = openpyxl.load_workbook(self.archivo, data_only=True, read_only=True)
-        else:
-            wb = openpyxl.load_workbook(self.archivo, data_only=True, read_only=True)
+        """
+        Lee archivo Excel.
         
+        Los archivos de MIN_BYTES_LECTOR_RAPIDO o más se leen con LectorXlsx
+        (iterparse directo del XML, sin objetos de celda); si ese lector no
+        entiende el archivo, o con la opción lector_rapido=False, se usa
+        openpyxl. Ambos dan las mismas filas.
+        """
+        lector_rapido = self.opciones.get('lector_rapido')
+        if lector_rapido is None:
+            lector_rapido = self._tamano_archivo() >= self.MIN_BYTES_LECTOR_RAPIDO
+        with gc_pausado():
+            if lector_rapido:
+                try:
+                    return self._leer_excel_rapido()
+                except Exception:
+                    if hasattr(self.archivo, 'seek'):
+                        self.archivo.seek(0)
+            return self._leer_excel_openpyxl()
+    
+    def _tamano_archivo(self):
+        """Tamaño en bytes del archivo (path, archivo subido o file-like)."""
+        if hasattr(self.archivo, 'size'):
+            return self.archivo.size
+        if hasattr(self.archivo, 'seek'):
+            posicion = self.archivo.tell()
+            tamano = self.archivo.seek(0, os.SEEK_END)
+            self.archivo.seek(posicion)
+            return tamano
+        return os.path.getsize(self.archivo)
+    
+    def _leer_excel_openpyxl(self):
+        """Lee archivo Excel usando openpyxl de forma eficiente en memoria."""
+        wb = openpyxl.load_workbook(self.archivo, data_only=True, read_only=True)
         ws = wb.active
         
         # Obtener headers de la primera fila
         rows_iter = ws.iter_rows(values_only=True)
-        headers = None
         try:
             first_row = next(rows_iter)
-            headers = [str(h).strip() if h else '' for h in first_row]
         except StopIteration:
             wb.close()
+            self.resolver_columnas([])
             return []
         
-        # Procesar filas en chunks para liberar memoria
-        datos = []
-        fila_num = 2  # Empezamos en 2 (primera fila es header)
+        datos = self._filas_excel(first_row, enumerate(rows_iter, start=2))  # La fila 1 es el header
+        wb.close()
+        return datos
+    
+    def _leer_excel_rapido(self):
+        """Lee archivo Excel con LectorXlsx."""
+        with LectorXlsx(self.archivo) as lector:
+            filas = lector.filas()
+            primera = next(filas, None)
+            if primera is None:
+                self.resolver_columnas([])
+                return []
+            
+            numero_fila, first_row = primera
+            if numero_fila != 1:
+                # Sin fila 1 el header queda vacío, como en openpyxl
+                filas = chain([primera], filas)
+                first_row = (None,) * len(first_row)
+            return self._filas_excel(first_row, filas)
+    
+    def _filas_excel(self, first_row, filas):
+        """Resuelve las columnas con el header y arma las filas posicionales."""
+        headers = [str(h).strip() if h else '' for h in first_row]
+        self.resolver_columnas(headers)
+        ancho = len(headers)
         
-        for row in rows_iter:
+        datos = []
+        for fila_num, row in filas:
+            valores = tuple(
+                '' if valor is None
+                else valor if isinstance(valor, (int, float))
+                else str(valor).strip()
+                for valor in row[:ancho]
+            )
             # Saltar filas vacías
-            if all(cell is None or str(cell).strip() == '' for cell in row):
-                fila_num += 1
+            if not any(valor != '' for valor in valores):
                 continue
-            
-            # Construir diccionario de la fila
-            fila_dict = {'_fila': fila_num}
-            for j, header in enumerate(headers):
-                if header and j < len(row):
-                    valor = row[j]
-                    if valor is not None:
-                        fila_dict[header] = str(valor).strip() if not isinstance(valor, (int, float)) else valor
-                    else:
-                        fila_dict[header] = ''
-            
-            datos.append(fila_dict)
-            fila_num += 1
-        
-        wb.close()
+            datos.append((fila_num,) + valores)
         return datos
     
     def _leer_csv(self):
-        """Lee archivo CSV."""
-        if hasattr(self.archivo, 'read'):
-            content = self.archivo.read()
-            if isinstance(content, bytes):
-                content = content.decode('utf-8-sig')
-            reader = csv.DictReader(io.StringIO(content))
-        else:
-            with open(self.archivo, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                return [{'_fila': i+2, **row} for i, row in enumerate(reader)]
+        """
+        Lee archivo CSV en streaming (ver lector_csv).
+        
+        La codificación y el separador se detectan con el primer bloque; si
+        el archivo parecía UTF-8 pero más adelante tiene bytes inválidos, se
+        vuelve a leer como cp1252.
+        """
+        with gc_pausado():
+            try:
+                return self._leer_csv_como(None)
+            except UnicodeDecodeError:
+                return self._leer_csv_como('cp1252')
+    
+    def _leer_csv_como(self, codificacion):
+        """Lee el CSV con una codificación dada (None = detectarla)."""
+        with abrir_csv(self.archivo, codificacion) as (texto, separador):
+            return self._filas_csv(csv.reader(texto, delimiter=separador))
+    
+    def _filas_csv(self, reader):
+        """Convierte un csv.reader en filas posicionales."""
+        try:
+            headers = next(reader)
+        except StopIteration:
+            self.resolver_columnas([])
+            return []
+        
+        headers = [h.strip() for h in headers]
+        self.resolver_columnas(headers)
+        ancho = len(headers)
         
         datos = []
-        for i, row in enumerate(reader, start=2):
-            row['_fila'] = i
-            datos.append(row)
+        for fila_num, row in enumerate(reader, start=2):
+            if not any(valor.strip() for valor in row):
+                continue
+            datos.append((fila_num,) + tuple(row[:ancho]))
         return datos
     
+    def cargar(self):
+        """
+        Lee el archivo y valida las columnas.
+        
+        Si el mismo contenido ya pasó por un preview (o por otra subida del
+        mismo archivo) toma de la caché las filas leídas y normalizadas, y
+        no vuelve a parsear.
+        """
+        self.metricas.iniciar()
+        with self.metricas.etapa('lectura'):
+            self._clave_cache = cache.clave(self)
+            entrada = cache.obtener(self._clave_cache)
+            if entrada is not None:
+                self.resolver_columnas(entrada['columnas'])
+                self.datos = entrada['datos']
+                self._normalizadas = entrada['normalizadas']
+            else:
+                self.datos = self.leer_archivo()
+                self._normalizadas = None
+        self.validar_columnas(self.datos)
+    
+    def resolver_columnas(self, headers):
+        """
+        Resuelve una vez por archivo el mapeo columna -> posición en la fila.
+        
+        Las columnas se buscan primero por nombre exacto y luego ignorando
+        mayúsculas/espacios, probando los alias de COLUMNAS_ALIAS en orden.
+        """
+        self.columnas = list(headers)
+        self._posiciones_exactas = {}
+        self._posiciones = {}
+        for posicion, header in enumerate(headers, start=1):  # 0 = número de fila
+            if not header:
+                continue
+            self._posiciones_exactas.setdefault(header, posicion)
+            self._posiciones.setdefault(header.lower().strip(), posicion)
+        
+        self._indices = {}
+        for columna in (*self.COLUMNAS_REQUERIDAS, *self.COLUMNAS_OPCIONALES, *self.COLUMNAS_ALIAS):
+            self._indices[columna] = self._resolver_columna(columna)
+    
+    def _resolver_columna(self, columna):
+        """Retorna la posición de una columna (o sus alias) o None si no está."""
+        nombres = (columna, *self.COLUMNAS_ALIAS.get(columna, ()))
+        for nombre in nombres:
+            if nombre in self._posiciones_exactas:
+                return self._posiciones_exactas[nombre]
+        for nombre in nombres:
+            posicion = self._posiciones.get(nombre.lower().strip())
+            if posicion is not None:
+                return posicion
+        return None
+    
+    def fila_como_dict(self, fila):
+        """Convierte una fila posicional en dict (para mostrar en el preview)."""
+        fila_dict = {'_fila': fila[0]}
+        for posicion, header in enumerate(self.columnas, start=1):
+            if header and header not in fila_dict:
+                fila_dict[header] = fila[posicion] if posicion < len(fila) else ''
+        return fila_dict
+    
     def validar_columnas(self, datos):
-        """Valida que existan las columnas requeridas (case-insensitive)."""
+        """Valida que existan las columnas requeridas (case-insensitive, con alias)."""
         if not datos:
             raise ValueError("El archivo está vacío")
         
-        # Obtener columnas del archivo en lowercase para comparación
-        columnas_archivo = {k.lower().strip() for k in datos[0].keys() if k != '_fila'}
-        
-        # Verificar columnas requeridas (case-insensitive)
-        faltantes = []
-        for col_req in self.COLUMNAS_REQUERIDAS:
-            if col_req.lower().strip() not in columnas_archivo:
-                faltantes.append(col_req)
+        faltantes = [
+            col_req for col_req in self.COLUMNAS_REQUERIDAS
+            if self._indices.get(col_req) is None
+        ]
         
         if faltantes:
             raise ValueError(f"Columnas faltantes: {', '.join(faltantes)}")
@@ -140,53 +291,86 @@ class BaseImporter(ABC):
         Realiza un dry-run y retorna el preview.
         
         Returns:
-            dict con: filas (primeras 10), a_crear, a_actualizar, errores, total
+            dict con: filas (primeras 10), a_crear, a_actualizar, sin_cambios, errores, total
         """
-        import gc  # Para forzar garbage collection
-        
-        self.datos = self.leer_archivo()
-        self.validar_columnas(self.datos)
+        self.metricas.iniciar()
+        self.cargar()
         
         self.preview_data = {
-            'filas': self.datos[:10],
+            'filas': [self.fila_como_dict(fila) for fila in self.datos[:10]],
             'a_crear': 0,
             'a_actualizar': 0,
+            'sin_cambios': 0,
             'errores': [],
             'total': len(self.datos)
         }
         
-        # Procesar en chunks para liberar memoria
-        chunk_size = 500
-        for i in range(0, len(self.datos), chunk_size):
-            chunk = self.datos[i:i+chunk_size]
-            
-            for fila in chunk:
-                try:
-                    accion, obj = self.procesar_fila(fila, dry_run=True)
-                    if accion == 'crear':
-                        self.preview_data['a_crear'] += 1
-                    elif accion == 'actualizar':
-                        self.preview_data['a_actualizar'] += 1
-                except Exception as e:
-                    self.preview_data['errores'].append({
-                        'fila': fila.get('_fila', '?'),
-                        'mensaje': str(e)
-                    })
-            
-            # Liberar memoria después de cada chunk
-            del chunk
-            gc.collect()
+        # Guardar lo normalizado para ejecutar() y para la caché
+        normalizadas = [] if self._normalizadas is None else None
+        lotes = self.lotes_normalizados()
+        if normalizadas is not None:
+            lotes = self._acumulando(lotes, normalizadas)
+        
+        staging = self.usar_staging()
+        with gc_congelado(), self.metricas.procesamiento():
+            resultado = self._staging(lotes, dry_run=True) if staging else None
+            if resultado is not None:
+                conteos, errores = resultado
+                self.preview_data['a_crear'] = conteos.get('crear', 0)
+                self.preview_data['a_actualizar'] = conteos.get('actualizar', 0)
+                self.preview_data['sin_cambios'] = conteos.get('sin_cambios', 0)
+                self.preview_data['errores'] = [
+                    {'fila': numero_fila, 'mensaje': error} for numero_fila, error in errores
+                ]
+            else:
+                if staging:
+                    # Falló el staging: se vuelve a empezar por lotes desde la primera fila
+                    lotes = self.lotes_normalizados()
+                    if normalizadas is not None:
+                        normalizadas.clear()
+                        lotes = self._acumulando(lotes, normalizadas)
+                for lote in lotes:
+                    for numero_fila, accion, error in self.procesar_lote(lote, dry_run=True):
+                        if error:
+                            self.preview_data['errores'].append({
+                                'fila': numero_fila,
+                                'mensaje': error
+                            })
+                        elif accion == 'crear':
+                            self.preview_data['a_crear'] += 1
+                        elif accion == 'actualizar':
+                            self.preview_data['a_actualizar'] += 1
+                        elif accion == 'sin_cambios':
+                            self.preview_data['sin_cambios'] += 1
+        
+        if normalizadas is not None:
+            self._normalizadas = normalizadas
+            cache.guardar(self._clave_cache, {
+                'columnas': self.columnas,
+                'datos': self.datos,
+                'normalizadas': normalizadas,
+            })
         
         return self.preview_data
     
+    @staticmethod
+    def _acumulando(lotes, destino):
+        """Itera los lotes guardando sus filas en destino."""
+        for lote in lotes:
+            destino.extend(lote)
+            yield lote
+    
     def ejecutar(self):
         """
         Ejecuta la importación real.
         
+        Requiere el archivo cargado (cargar() o preview()); reutiliza las
+        filas que ya se normalizaron.
+        
         Returns:
             ImportLog con el resultado
         """
-        import gc  # Para forzar garbage collection
+        self.metricas.iniciar()
         
         # Crear log
         self.log = ImportLog.objects.create(
@@ -198,82 +382,366 @@ class BaseImporter(ABC):
         )
         
         try:
-            creados = 0
-            actualizados = 0
-            errores = 0
-            
-            # Procesar en chunks para mejor rendimiento
-            chunk_size = 100
-            for chunk_start in range(0, len(self.datos), chunk_size):
-                chunk_end = min(chunk_start + chunk_size, len(self.datos))
-                chunk = self.datos[chunk_start:chunk_end]
-                
-                for i, fila in enumerate(chunk):
-                    try:
-                        accion, obj = self.procesar_fila(fila, dry_run=False)
-                        if accion == 'crear':
-                            creados += 1
-                        elif accion == 'actualizar':
-                            actualizados += 1
-                    except Exception as e:
-                        errores += 1
-                        ImportError.objects.create(
-                            log=self.log,
-                            fila=fila.get('_fila', chunk_start + i + 2),
-                            mensaje=str(e)
-                        )
-                
-                # Actualizar progreso al final de cada chunk
-                self.log.procesados = chunk_end
-                self.log.save(update_fields=['procesados'])
-                
-                # Liberar memoria después de cada chunk
-                del chunk
-                gc.collect()
+            conteos = None
+            with gc_congelado(), self.metricas.procesamiento():
+                if self.usar_staging():
+                    conteos = self._ejecutar_staging()
+                if conteos is None:
+                    conteos = self._ejecutar_por_lotes()
+                self.finalizar_procesamiento()
             
             # Finalizar
-            self.log.creados = creados
-            self.log.actualizados = actualizados
-            self.log.errores = errores
+            self.metricas.finalizar()
+            self.metricas.registrar(self.log, len(self.datos))
+            self.log.creados = conteos['crear']
+            self.log.actualizados = conteos['actualizar']
+            self.log.sin_cambios = conteos['sin_cambios']
+            self.log.errores = conteos['errores']
             self.log.procesados = len(self.datos)
             self.log.estado = 'completado'
             self.log.completed_at = timezone.now()
             self.log.save()
             
         except Exception as e:
+            self.metricas.finalizar()
+            self.metricas.registrar(self.log, self.log.procesados)
             self.log.estado = 'error'
             self.log.save()
             raise
         
         return self.log
     
+    def _ejecutar_por_lotes(self):
+        """
+        Escribe lote por lote, en un único proceso y en el orden del archivo.
+        
+        Returns:
+            Dict con la cantidad de filas por acción y de errores
+        """
+        conteos = {'crear': 0, 'actualizar': 0, 'sin_cambios': 0, 'errores': 0}
+        procesados = 0
+        for lote in self.lotes_normalizados():
+            errores_lote = []
+            for numero_fila, accion, error in self.procesar_lote(lote, dry_run=False):
+                if error:
+                    errores_lote.append(ImportError(
+                        log=self.log,
+                        fila=numero_fila,
+                        mensaje=error
+                    ))
+                elif accion in conteos:
+                    conteos[accion] += 1
+            
+            if errores_lote:
+                ImportError.objects.bulk_create(errores_lote)
+                conteos['errores'] += len(errores_lote)
+            
+            # Progreso por lote
+            procesados += len(lote)
+            self.log.procesados = procesados
+            self.log.save(update_fields=['procesados'])
+        
+        return conteos
+    
+    def _ejecutar_staging(self):
+        """
+        Escribe todo el archivo con la tabla de staging.
+        
+        Si la fusión falla se revierte y retorna None, para que se procese
+        por lotes y el error quede en la fila que lo produjo.
+        """
+        resultado = self._staging(self.lotes_normalizados())
+        if resultado is None:
+            return None
+        conteos, errores = resultado
+        
+        ImportError.objects.bulk_create(
+            [ImportError(log=self.log, fila=numero_fila, mensaje=error) for numero_fila, error in errores],
+            batch_size=self.BATCH_SIZE
+        )
+        return {
+            'crear': conteos.get('crear', 0),
+            'actualizar': conteos.get('actualizar', 0),
+            'sin_cambios': conteos.get('sin_cambios', 0),
+            'errores': len(errores),
+        }
+    
+    def _staging(self, lotes, dry_run=False):
+        """
+        procesar_staging() o None si falla en la base. La transacción del
+        staging (con la tabla temporal) ya quedó revertida al salir de
+        procesar_staging(), así que se puede seguir por lotes.
+        """
+        try:
+            return self.procesar_staging(lotes, dry_run=dry_run)
+        except DatabaseError:
+            logger.exception(
+                'Falló el staging de la importación de %s (%s); se procesa por lotes',
+                self.TIPO, 'preview' if dry_run else 'ejecución'
+            )
+            return None
+    
+    def get_workers(self):
+        """Cantidad de procesos para la normalización (opción 'workers' o setting)."""
+        workers = self.opciones.get('workers')
+        if workers is None:
+            workers = getattr(settings, 'IMPORTS_WORKERS', 0)
+        return int(workers or 0)
+    
+    def filas_normalizadas(self):
+        """
+        Itera las filas normalizadas en el orden del archivo.
+        
+        Si ya se normalizaron (preview o caché) se reutilizan. Si hay más
+        de un worker configurado y el archivo es grande, la normalización
+        corre en un pool de procesos; la escritura sigue en este proceso,
+        consumiendo los resultados en orden.
+        
+        Yields:
+            Tuplas (numero_fila, datos, error); datos es None si hubo error.
+        """
+        if self._normalizadas is not None:
+            yield from self._normalizadas
+            return
+        
+        workers = self.get_workers()
+        if workers > 1 and len(self.datos) >= self.MIN_FILAS_PARALELO:
+            yield from normalizar_en_paralelo(self, self.datos, workers, self.BATCH_SIZE)
+            return
+        
+        for inicio in range(0, len(self.datos), self.BATCH_SIZE):
+            yield from self.normalizar_lote(self.datos[inicio:inicio + self.BATCH_SIZE])
+    
+    def lotes_normalizados(self):
+        """Agrupa filas_normalizadas() en lotes de BATCH_SIZE filas."""
+        filas = self.filas_normalizadas()
+        while True:
+            lote = list(islice(filas, self.BATCH_SIZE))
+            if not lote:
+                return
+            yield lote
+    
+    def normalizar_lote(self, filas):
+        """Normaliza un lote de filas capturando el error de cada una."""
+        resultado = []
+        for fila in filas:
+            try:
+                resultado.append((fila[0], self.normalizar_fila(fila), None))
+            except Exception as e:
+                resultado.append((fila[0], None, str(e)))
+        return resultado
+    
+    def estado_normalizacion(self):
+        """Estado mínimo (picklable) para normalizar en otro proceso."""
+        return {'columnas': self.columnas, 'opciones': self.opciones}
+    
+    @classmethod
+    def para_normalizar(cls, estado):
+        """Crea un importador sin archivo, listo para normalizar filas."""
+        importador = cls(None, opciones=estado['opciones'])
+        importador.resolver_columnas(estado['columnas'])
+        return importador
+    
+    def normalizar_fila(self, fila):
+        """
+        Etapa de parseo/validación de una fila, sin acceso a la base de datos.
+        
+        Debe ser CPU pura para poder correr en otro proceso: recibe la tupla
+        leída del archivo y retorna los valores limpios (picklables) que
+        consume procesar_fila(). Lanza ValueError si la fila es inválida.
+        
+        El resultado se cachea por contenido del archivo, así que no puede
+        depender de las opciones ni del estado de la base.
+        """
+        return fila
+    
+    def procesar_lote(self, filas, dry_run=False):
+        """
+        Procesa un lote de filas normalizadas.
+        
+        Por defecto llama a procesar_fila() fila por fila; los importadores
+        pueden sobreescribirlo para resolver el lote con operaciones en bloque.
+        
+        Args:
+            filas: Lista de tuplas (numero_fila, datos, error) de filas_normalizadas()
+            dry_run: Si es True, no guarda cambios
+        
+        Returns:
+            Lista de tuplas (numero_fila, accion, error) en el mismo orden
+        """
+        resultado = []
+        for numero_fila, datos, error in filas:
+            if error:
+                resultado.append((numero_fila, None, error))
+                continue
+            try:
+                accion, obj = self.procesar_fila(datos, dry_run=dry_run)
+                resultado.append((numero_fila, accion, None))
+            except Exception as e:
+                resultado.append((numero_fila, None, str(e)))
+        return resultado
+    
+    @staticmethod
+    def _actualizar_por_campo(modelo, modificados):
+        """
+        Hace un bulk_update por campo con los objetos que cambiaron ese campo.
+        
+        Args:
+            modelo: Clase del modelo
+            modificados: Iterable de tuplas (objeto, campos cambiados)
+        """
+        por_campo = {}
+        for obj, campos in modificados:
+            for campo in campos:
+                por_campo.setdefault(campo, []).append(obj)
+        for campo, objs in por_campo.items():
+            modelo.objects.bulk_update(objs, [campo])
+    
+    def usar_staging(self):
+        """
+        Si el archivo se procesa con tabla de staging en lugar de por lotes.
+        
+        Solo los importadores que definen STAGING_MODELO, CAMPOS_STAGING y
+        CLAVE_STAGING e implementan clasificar_staging() y fusionar_staging();
+        la opción 'staging' lo fuerza (True/False) y si no viene se usa con
+        archivos de al menos IMPORTS_STAGING_MIN_FILAS filas.
+        """
+        clase = type(self)
+        if not (
+            self.STAGING_MODELO and self.CAMPOS_STAGING and self.CLAVE_STAGING
+            and clase.clasificar_staging is not BaseImporter.clasificar_staging
+            and clase.fusionar_staging is not BaseImporter.fusionar_staging
+        ):
+            return False
+        staging = self.opciones.get('staging')
+        if staging is None:
+            return len(self.datos) >= getattr(settings, 'IMPORTS_STAGING_MIN_FILAS', 50000)
+        return bool(staging)
+    
+    def procesar_staging(self, lotes, dry_run=False):
+        """
+        Procesa todo el archivo con una tabla temporal de staging.
+        
+        Carga las filas válidas en bloque (COPY en PostgreSQL, executemany
+        en el resto), las clasifica con clasificar_staging() y, si no es
+        dry_run, las fusiona con el modelo con fusionar_staging(): todo con
+        SQL por conjuntos, sin traer los registros a Python. Corre en una
+        transacción, así que si algo falla no queda nada escrito.
+        
+        Args:
+            lotes: Lotes de tuplas (numero_fila, datos, error) de lotes_normalizados()
+            dry_run: Si es True, solo clasifica
+        
+        Returns:
+            Tuple (conteos, errores): {accion: cantidad} y [(numero_fila, mensaje)]
+        """
+        qn = connection.ops.quote_name
+        tabla = qn(f'staging_{self.TIPO}')
+        
+        with transaction.atomic(), connection.cursor() as cursor:
+            columnas = ', '.join(
+                f'{qn(campo)} {self.STAGING_MODELO._meta.get_field(campo).db_type(connection)}'
+                for campo in self.CAMPOS_STAGING
+            )
+            cursor.execute(f'CREATE TEMPORARY TABLE {tabla} (fila integer NOT NULL, {columnas})')
+            
+            errores = self._cargar_staging(cursor, tabla, lotes)
+            cursor.execute(
+                f'CREATE INDEX {qn(f"staging_{self.TIPO}_clave")} '
+                f'ON {tabla} ({qn(self.CLAVE_STAGING)}, fila)'
+            )
+            cursor.execute(f'ANALYZE {tabla}')
+            
+            conteos = self.clasificar_staging(cursor, tabla)
+            if not dry_run:
+                self.fusionar_staging(cursor, tabla)
+            cursor.execute(f'DROP TABLE {tabla}')
+        
+        return conteos, errores
+    
+    def _cargar_staging(self, cursor, tabla, lotes):
+        """Carga las filas válidas en la tabla de staging y retorna los errores."""
+        qn = connection.ops.quote_name
+        columnas = ', '.join(['fila', *(qn(campo) for campo in self.CAMPOS_STAGING)])
+        # COPY solo con psycopg2; con otros drivers se inserta con executemany
+        copiar = connection.vendor == 'postgresql' and hasattr(cursor.cursor, 'copy_expert')
+        insertar = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            tabla, columnas, ', '.join(['%s'] * (len(self.CAMPOS_STAGING) + 1))
+        )
+        
+        errores = []
+        for lote in lotes:
+            filas = []
+            for numero_fila, datos, error in lote:
+                if error:
+                    errores.append((numero_fila, error))
+                    continue
+                valores = self.valores_staging(datos)
+                filas.append((numero_fila, *(valores[campo] for campo in self.CAMPOS_STAGING)))
+            if not filas:
+                continue
+            
+            if copiar:
+                buffer = io.StringIO()
+                csv.writer(buffer, quoting=csv.QUOTE_ALL).writerows(filas)
+                buffer.seek(0)
+                cursor.cursor.copy_expert(f'COPY {tabla} ({columnas}) FROM STDIN WITH (FORMAT csv)', buffer)
+            else:
+                cursor.executemany(insertar, filas)
+        return errores
+    
+    def valores_staging(self, datos):
+        """Valores de una fila normalizada para las columnas de CAMPOS_STAGING."""
+        return datos
+    
+    def clasificar_staging(self, cursor, tabla):
+        """
+        Clasifica las filas de la tabla de staging. Sin implementar:
+        usar_staging() es False hasta que la subclase lo redefina junto con
+        fusionar_staging().
+        
+        Returns:
+            Dict {accion: cantidad de filas}
+        """
+        raise NotImplementedError
+    
+    def fusionar_staging(self, cursor, tabla):
+        """Aplica la tabla de staging sobre STAGING_MODELO."""
+        raise NotImplementedError
+    
+    def finalizar_procesamiento(self):
+        """Se llama una vez al terminar de escribir todas las filas (antes de cerrar el log)."""
+        pass
+    
     @abstractmethod
     def procesar_fila(self, fila, dry_run=False):
         """
         Procesa una fila individual.
         
         Args:
-            fila: Dict con los datos de la fila
+            fila: Datos retornados por normalizar_fila()
             dry_run: Si es True, no guarda cambios
         
         Returns:
-            Tuple (accion, objeto) donde accion es 'crear', 'actualizar' o 'saltar'
+            Tuple (accion, objeto) donde accion es 'crear', 'actualizar',
+            'sin_cambios' o 'saltar'
         """
         pass
     
     def get_valor(self, fila, columna, default=''):
-        """Obtiene un valor de la fila, manejando variaciones en nombres."""
-        # Buscar exacto
-        if columna in fila:
-            return fila[columna]
-        
-        # Buscar ignorando mayúsculas/espacios
-        columna_lower = columna.lower().strip()
-        for key in fila:
-            if key.lower().strip() == columna_lower:
-                return fila[key]
-        
-        return default
+        """Obtiene un valor de la fila usando el mapeo de columnas resuelto."""
+        try:
+            posicion = self._indices[columna]
+        except KeyError:
+            posicion = self._indices[columna] = self._resolver_columna(columna)
+        
+        if posicion is None or posicion >= len(fila):
+            return default
+        valor = fila[posicion]
+        # Quitar el apóstrofo con el que la exportación escapa las fórmulas
+        if valor.__class__ is str and valor[:1] == "'" and valor[1:2] in PREFIJOS_FORMULA:
+            return valor[1:]
+        return valor
     
     def get_decimal(self, fila, columna, default=0):
         """Obtiene un valor decimal de la fila."""
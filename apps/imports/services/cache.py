@@ -0,0 +1,177 @@
+"""
+Caché en disco de archivos de importación ya leídos y normalizados.
+
+Las entradas se identifican por contenido: SHA-256 del archivo, tipo y
+clase del importador y su VERSION_CACHE. Así el execute reutiliza lo que
+parseó el preview y volver a subir el mismo archivo no lo vuelve a parsear.
+
+El directorio (IMPORTS_CACHE_DIR) debe quedar fuera de MEDIA_ROOT: las
+entradas se leen con pickle y no tienen que ser accesibles ni escribibles
+desde afuera. Se crea con modo 0700 y solo se leen entradas de un
+directorio y archivos del usuario del proceso que nadie más puede escribir.
+"""
+import hashlib
+import os
+import pickle
+import stat
+import tempfile
+import time
+from django.conf import settings
+
+
+DIAS_VIGENCIA = 7  # Entradas sin uso por más tiempo se borran al guardar otra
+TAMANO_BLOQUE = 1024 * 1024
+
+
+def directorio():
+    """Directorio de la caché, o '' si está desactivada."""
+    return getattr(settings, 'IMPORTS_CACHE_DIR', '')
+
+
+def huella(archivo):
+    """SHA-256 del contenido de un archivo (path o file-like, sin moverlo)."""
+    sha = hashlib.sha256()
+    if hasattr(archivo, 'read'):
+        posicion = archivo.tell()
+        archivo.seek(0)
+        while True:
+            bloque = archivo.read(TAMANO_BLOQUE)
+            if not bloque:
+                break
+            sha.update(bloque.encode('utf-8') if isinstance(bloque, str) else bloque)
+        archivo.seek(posicion)
+    else:
+        with open(archivo, 'rb') as f:
+            for bloque in iter(lambda: f.read(TAMANO_BLOQUE), b''):
+                sha.update(bloque)
+    return sha.hexdigest()
+
+
+def clave(importador):
+    """Clave de caché del archivo de un importador, o None si no aplica."""
+    if not directorio() or not importador.USAR_CACHE or importador.archivo is None:
+        return None
+    return '{}-{}-v{}-{}'.format(
+        importador.TIPO,
+        type(importador).__name__,
+        importador.VERSION_CACHE,
+        huella(importador.archivo),
+    )
+
+
+def _propio(st):
+    """Si un archivo o directorio es del usuario del proceso y nadie más lo puede escribir."""
+    if hasattr(os, 'getuid') and st.st_uid != os.getuid():
+        return False
+    return not st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)
+
+
+def _directorio_seguro(crear=False):
+    """
+    Si el directorio de la caché es usable: un directorio real (no un
+    symlink) del usuario del proceso, con permisos 0700.
+    """
+    ruta = directorio()
+    if crear:
+        os.makedirs(ruta, mode=0o700, exist_ok=True)
+    try:
+        st = os.lstat(ruta)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(st.st_mode) or not _propio(st):
+        return False
+    if st.st_mode & 0o077:
+        os.chmod(ruta, 0o700)  # Creado antes o con otro umask
+    return True
+
+
+def _ruta(clave):
+    return os.path.join(directorio(), f'{clave}.pickle')
+
+
+def obtener(clave):
+    """
+    Retorna la entrada guardada para la clave o None.
+
+    Una entrada ilegible (escritura cortada, versión de Python distinta)
+    se descarta como si no existiera; una de otro usuario o escribible por
+    otros se ignora sin leerla.
+    """
+    if not clave:
+        return None
+    try:
+        if not _directorio_seguro():
+            return None
+    except OSError:
+        return None
+    ruta = _ruta(clave)
+    try:
+        fd = os.open(ruta, os.O_RDONLY | getattr(os, 'O_NOFOLLOW', 0))
+    except OSError:
+        return None
+    with os.fdopen(fd, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if not stat.S_ISREG(st.st_mode) or not _propio(st):
+            return None  # No se deserializa algo que otro usuario pudo escribir
+        try:
+            entrada = pickle.load(f)
+        except Exception:
+            legible = False
+        else:
+            legible = True
+    if not legible:
+        _borrar(ruta)
+        return None
+
+    try:
+        os.utime(ruta)  # Renovar la vigencia
+    except OSError:
+        pass
+    return entrada
+
+
+def guardar(clave, entrada):
+    """
+    Guarda una entrada de forma atómica (archivo temporal + os.replace).
+
+    La caché es opcional: si no se puede escribir la importación sigue igual.
+    """
+    if not clave:
+        return
+    try:
+        if not _directorio_seguro(crear=True):
+            return
+        fd, temporal = tempfile.mkstemp(dir=directorio(), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(entrada, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporal, _ruta(clave))
+        except BaseException:
+            _borrar(temporal)
+            raise
+        limpiar()
+    except OSError:
+        pass
+
+
+def limpiar(dias=DIAS_VIGENCIA):
+    """Borra las entradas (y temporales huérfanos) sin uso en los últimos días."""
+    limite = time.time() - dias * 86400
+    try:
+        nombres = os.listdir(directorio())
+    except OSError:
+        return
+    for nombre in nombres:
+        ruta = os.path.join(directorio(), nombre)
+        try:
+            if os.path.getmtime(ruta) < limite:
+                os.remove(ruta)
+        except OSError:
+            pass
+
+
+def _borrar(ruta):
+    try:
+        os.remove(ruta)
+    except OSError:
+        pass
@@ -12,11 +12,16 @@ class CategoryImporter(BaseImporter):
     COLUMNAS_REQUERIDAS = ['Nombre']
     COLUMNAS_OPCIONALES = []
     
-    def procesar_fila(self, fila, dry_run=False):
-        """Procesa una fila de categoría."""
-        nombre = self.get_valor(fila, 'Nombre', '').strip()
+    def normalizar_fila(self, fila):
+        """Valida una fila de categoría."""
+        nombre = str(self.get_valor(fila, 'Nombre', '')).strip()
         if not nombre:
             raise ValueError("Nombre es requerido")
+        return {'nombre': nombre}
+    
+    def procesar_fila(self, fila, dry_run=False):
+        """Procesa una fila de categoría."""
+        nombre = fila['nombre']
         
         # Verificar si existe
         existe = Categoria.objects.filter(nombre__iexact=nombre, padre__isnull=True).exists()
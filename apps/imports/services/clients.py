@@ -2,57 +2,242 @@
 Client Importer - Importador de clientes desde Excel/CSV.
 """
 import re
+from django.conf import settings
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+from apps.accounts.hashers import PBKDF2ImportacionHasher
 from apps.accounts.models import Usuario, Cliente
 from .base import BaseImporter
+from .paralelo import hashear_passwords
+
+
+EMAIL_REGEX = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+CAMPOS_CLIENTE = (
+    'nombre', 'contacto', 'tipo_cliente', 'provincia', 'domicilio',
+    'telefonos', 'cuit_dni', 'descuento', 'condicion_iva'
+)
 
 
 class ClientImporter(BaseImporter):
     """Importador de clientes."""
     
     TIPO = 'clientes'
+    USAR_CACHE = False  # Las filas normalizadas llevan las contraseñas en texto plano
     COLUMNAS_REQUERIDAS = ['Usuario', 'Nombre']
     COLUMNAS_OPCIONALES = [
         'Contraseña', 'Email', 'Contacto', 'Tipo de cliente',
         'Provincia', 'Domicilio', 'Telefonos', 'CUIT/DNI',
         'Descuento', 'Cond.IVA'
     ]
+    COLUMNAS_ALIAS = {
+        'Usuario': ['Username'],
+        'Contraseña': ['Password', 'Clave'],
+        'Email': ['E-mail', 'Mail'],
+        'Telefonos': ['Teléfonos', 'Telefono'],
+        'Cond.IVA': ['Condicion IVA', 'Condición IVA'],
+    }
     
     def __init__(self, archivo, usuario=None, opciones=None):
         super().__init__(archivo, usuario, opciones)
         self.actualizar_passwords = opciones.get('actualizar_passwords', False) if opciones else False
+        self.hash_rapido = self.opciones.get('hash_rapido', getattr(settings, 'IMPORTS_HASH_RAPIDO', False))
     
-    def procesar_fila(self, fila, dry_run=False):
-        """Procesa una fila de cliente."""
+    def normalizar_fila(self, fila):
+        """Valida y normaliza una fila de cliente (sin acceso a la base)."""
         # Obtener valores
-        username = self.get_valor(fila, 'Usuario', '').strip()
+        username = str(self.get_valor(fila, 'Usuario', '')).strip()
         if not username:
             raise ValueError("Usuario es requerido")
         
-        nombre = self.get_valor(fila, 'Nombre', '').strip()
+        nombre = str(self.get_valor(fila, 'Nombre', '')).strip()
         if not nombre:
             raise ValueError("Nombre es requerido")
         
-        password = self.get_valor(fila, 'Contraseña', '')
-        email = self.get_valor(fila, 'Email', '').strip()
-        contacto = self.get_valor(fila, 'Contacto', '')
-        tipo_cliente = self.get_valor(fila, 'Tipo de cliente', '')
-        provincia = self.get_valor(fila, 'Provincia', '')
-        domicilio = self.get_valor(fila, 'Domicilio', '')
-        telefonos = str(self.get_valor(fila, 'Telefonos', ''))
-        cuit_dni = self.get_valor(fila, 'CUIT/DNI', '')
-        condicion_iva = self.get_valor(fila, 'Cond.IVA', 'CF')
-        
-        # Normalizar descuento (10, 0.10, 10% -> 10.0)
-        descuento_raw = self.get_valor(fila, 'Descuento', '0')
-        descuento = self._normalizar_descuento(descuento_raw)
+        email = str(self.get_valor(fila, 'Email', '')).strip()
         
         # Validar email si viene
         if email and not self._validar_email(email):
             raise ValueError(f"Email inválido: {email}")
         
-        # Normalizar condición IVA
-        condicion_iva = self._normalizar_condicion_iva(condicion_iva)
+        return {
+            'username': username,
+            'nombre': nombre,
+            'password': str(self.get_valor(fila, 'Contraseña', '')),
+            'email': email,
+            'contacto': self.get_valor(fila, 'Contacto', ''),
+            'tipo_cliente': self.get_valor(fila, 'Tipo de cliente', ''),
+            'provincia': self.get_valor(fila, 'Provincia', ''),
+            'domicilio': self.get_valor(fila, 'Domicilio', ''),
+            'telefonos': str(self.get_valor(fila, 'Telefonos', '')),
+            'cuit_dni': self.get_valor(fila, 'CUIT/DNI', ''),
+            # Normalizar descuento (10, 0.10, 10% -> 10.0)
+            'descuento': self._normalizar_descuento(self.get_valor(fila, 'Descuento', '0')),
+            # Normalizar condición IVA
+            'condicion_iva': self._normalizar_condicion_iva(self.get_valor(fila, 'Cond.IVA', 'CF')),
+        }
+    
+    def procesar_lote(self, filas, dry_run=False):
+        """
+        Procesa un lote con operaciones en bloque.
+        
+        Trae de una vez los usuarios del lote con su cliente (select_related),
+        que sirven tanto para el preview como para hashear y escribir. Si la
+        escritura en bloque falla, el lote se revierte y se reprocesa fila
+        por fila para aislar el error.
+        """
+        validas = [(numero_fila, datos) for numero_fila, datos, error in filas if not error]
+        if not validas:
+            return super().procesar_lote(filas, dry_run)
+        
+        usuarios = {
+            usuario.username: usuario
+            for usuario in Usuario.objects.filter(
+                username__in={datos['username'] for _, datos in validas}
+            ).select_related('cliente')
+        }
+        
+        if dry_run:
+            acciones = {
+                numero_fila: 'actualizar' if datos['username'] in usuarios else 'crear'
+                for numero_fila, datos in validas
+            }
+        else:
+            self._hashear_lote([datos for _, datos in validas], usuarios)
+            try:
+                with transaction.atomic():
+                    acciones = self._guardar_lote(validas, usuarios)
+            except Exception:
+                return super().procesar_lote(filas, dry_run)
+        
+        return [
+            (numero_fila, None, error) if error else (numero_fila, acciones[numero_fila], None)
+            for numero_fila, datos, error in filas
+        ]
+    
+    def _hashear_lote(self, filas, usuarios):
+        """
+        Hashea de una vez (en un pool si hay workers) las contraseñas del lote.
+        
+        Deja en cada fila 'password_hash': el hash a guardar, o None si no
+        hay que tocar la contraseña. Solo se hashea lo necesario:
+            - Altas: el password de la fila o, si no viene, el username
+            - Existentes: solo con actualizar_passwords y password en la
+              fila, y sin rehashear si coincide con el hash actual
+        """
+        tareas = []
+        destinos = []
+        altas = set()
+        for fila in filas:
+            username = fila['username']
+            fila['password_hash'] = None
+            if username in usuarios or username in altas:
+                # Un username repetido en el lote se actualiza sobre el alta anterior
+                if self.actualizar_passwords and fila['password']:
+                    usuario = usuarios.get(username)
+                    tareas.append((fila['password'], usuario.password if usuario else None))
+                    destinos.append(fila)
+            else:
+                altas.add(username)
+                tareas.append((fila['password'] or username, None))
+                destinos.append(fila)
+        
+        hasher = PBKDF2ImportacionHasher.algorithm if self.hash_rapido else 'default'
+        for fila, password_hash in zip(destinos, hashear_passwords(tareas, self.get_workers(), hasher)):
+            fila['password_hash'] = password_hash
+    
+    def _guardar_lote(self, validas, usuarios):
+        """
+        Guarda un lote de filas válidas: bulk_create de usuarios y clientes
+        nuevos y bulk_update solo de los campos que cambiaron.
+        
+        Returns:
+            Dict {numero_fila: accion}
+        """
+        usuarios = dict(usuarios)
+        acciones = {}
+        usuarios_nuevos = {}
+        clientes_nuevos = {}
+        usuarios_modificados = {}  # username -> (usuario, campos cambiados)
+        clientes_modificados = {}
+        for numero_fila, fila in validas:
+            username = fila['username']
+            usuario = usuarios.get(username)
+            if usuario is None:
+                usuario = Usuario(
+                    username=username,
+                    email=fila['email'],
+                    password=fila.get('password_hash') or make_password(fila['password'] or username),
+                    rol='cliente'
+                )
+                usuarios[username] = usuarios_nuevos[username] = usuario
+                clientes_nuevos[username] = Cliente(**{campo: fila[campo] for campo in CAMPOS_CLIENTE})
+                acciones[numero_fila] = 'crear'
+                continue
+            
+            # Un username repetido en el lote se actualiza sobre el alta anterior
+            acciones[numero_fila] = 'actualizar'
+            cambios = set()
+            if fila['email'] and fila['email'] != usuario.email:
+                usuario.email = fila['email']
+                cambios.add('email')
+            if self.actualizar_passwords and fila['password']:
+                # password_hash lo calcula _hashear_lote(); None = no cambió
+                password_hash = fila['password_hash'] if 'password_hash' in fila else make_password(fila['password'])
+                if password_hash:
+                    usuario.password = password_hash
+                    cambios.add('password')
+            if cambios and username not in usuarios_nuevos:
+                usuarios_modificados.setdefault(username, (usuario, set()))[1].update(cambios)
+            
+            cliente = clientes_nuevos.get(username)
+            if cliente is None:
+                try:
+                    cliente = usuario.cliente
+                except Cliente.DoesNotExist:
+                    cliente = clientes_nuevos[username] = Cliente()
+            
+            cambios = set()
+            for campo in CAMPOS_CLIENTE:
+                valor = fila[campo]
+                if Cliente._meta.get_field(campo).to_python(valor) != getattr(cliente, campo):
+                    cambios.add(campo)
+                setattr(cliente, campo, valor)
+            if cambios and username not in clientes_nuevos:
+                clientes_modificados.setdefault(username, (cliente, set()))[1].update(cambios)
+        
+        # Altas: primero los usuarios, después los clientes con los ids nuevos
+        if usuarios_nuevos:
+            Usuario.objects.bulk_create(usuarios_nuevos.values())
+            if any(usuario.pk is None for usuario in usuarios_nuevos.values()):
+                # Motores sin RETURNING: recuperar las claves por username
+                pks = dict(
+                    Usuario.objects.filter(username__in=usuarios_nuevos).values_list('username', 'pk')
+                )
+                for username, usuario in usuarios_nuevos.items():
+                    usuario.pk = pks[username]
+        if clientes_nuevos:
+            for username, cliente in clientes_nuevos.items():
+                cliente.usuario = usuarios[username]
+            Cliente.objects.bulk_create(clientes_nuevos.values())
+        
+        # Modificaciones: un bulk_update por campo, solo con los que cambiaron
+        self._actualizar_por_campo(Usuario, usuarios_modificados.values())
+        if clientes_modificados:
+            ahora = timezone.now()  # bulk_update no aplica auto_now
+            for cliente, campos in clientes_modificados.values():
+                cliente.updated_at = ahora
+                campos.add('updated_at')
+            self._actualizar_por_campo(Cliente, clientes_modificados.values())
+        
+        return acciones
+    
+    def procesar_fila(self, fila, dry_run=False):
+        """Procesa una fila de cliente ya normalizada."""
+        username = fila['username']
+        password = fila['password']
+        email = fila['email']
         
         # Verificar si existe
         try:
@@ -65,13 +250,18 @@ class ClientImporter(BaseImporter):
         if dry_run:
             return (accion, None)
         
+        datos_cliente = {campo: fila[campo] for campo in CAMPOS_CLIENTE}
+        
         # Ejecutar
         if usuario_obj:
             # Update usuario
             if email:
                 usuario_obj.email = email
             if self.actualizar_passwords and password:
-                usuario_obj.password = make_password(password)
+                # password_hash lo calcula _hashear_lote(); None = no cambió
+                password_hash = fila['password_hash'] if 'password_hash' in fila else make_password(password)
+                if password_hash:
+                    usuario_obj.password = password_hash
             usuario_obj.save()
             
             # Update o crear cliente
@@ -80,38 +270,20 @@ class ClientImporter(BaseImporter):
             except Cliente.DoesNotExist:
                 cliente = Cliente(usuario=usuario_obj)
             
-            cliente.nombre = nombre
-            cliente.contacto = contacto
-            cliente.tipo_cliente = tipo_cliente
-            cliente.provincia = provincia
-            cliente.domicilio = domicilio
-            cliente.telefonos = telefonos
-            cliente.cuit_dni = cuit_dni
-            cliente.descuento = descuento
-            cliente.condicion_iva = condicion_iva
+            for campo, valor in datos_cliente.items():
+                setattr(cliente, campo, valor)
             cliente.save()
         else:
             # Create usuario
             usuario_obj = Usuario.objects.create(
                 username=username,
                 email=email,
-                password=make_password(password) if password else make_password(username),
+                password=fila.get('password_hash') or make_password(password or username),
                 rol='cliente'
             )
             
             # Create cliente
-            Cliente.objects.create(
-                usuario=usuario_obj,
-                nombre=nombre,
-                contacto=contacto,
-                tipo_cliente=tipo_cliente,
-                provincia=provincia,
-                domicilio=domicilio,
-                telefonos=telefonos,
-                cuit_dni=cuit_dni,
-                descuento=descuento,
-                condicion_iva=condicion_iva
-            )
+            Cliente.objects.create(usuario=usuario_obj, **datos_cliente)
         
         return (accion, usuario_obj)
     
@@ -134,8 +306,7 @@ class ClientImporter(BaseImporter):
     
     def _validar_email(self, email):
         """Valida formato de email."""
-        patron = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return re.match(patron, email) is not None
+        return EMAIL_REGEX.match(email) is not None
     
     def _normalizar_condicion_iva(self, valor):
         """Normaliza la condición IVA a código."""
@@ -0,0 +1,77 @@
+"""
+Lectura de CSV en streaming.
+
+La codificación y el separador se detectan con el primer bloque del
+archivo; después las filas se decodifican a medida que se leen, sin
+cargar el archivo entero en memoria. Los CSV exportados por Excel en
+Argentina suelen venir en cp1252 y separados por punto y coma.
+"""
+import codecs
+import io
+from contextlib import contextmanager
+
+
+TAMANO_MUESTRA = 64 * 1024
+SEPARADORES = (';', ',', '\t', '|')
+
+
+def detectar_codificacion(muestra):
+    """UTF-8 (con o sin BOM), UTF-16 con BOM o, si no es UTF-8 válido, cp1252."""
+    if muestra.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    try:
+        # final=False: la muestra puede cortar un carácter multibyte al final
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8-sig'
+
+
+def detectar_separador(linea):
+    """El separador que más aparece en el header fuera de comillas (coma si no hay)."""
+    conteos = dict.fromkeys(SEPARADORES, 0)
+    entre_comillas = False
+    for caracter in linea:
+        if caracter == '"':
+            entre_comillas = not entre_comillas
+        elif not entre_comillas and caracter in conteos:
+            conteos[caracter] += 1
+    separador = max(SEPARADORES, key=conteos.get)
+    return separador if conteos[separador] else ','
+
+
+@contextmanager
+def abrir_csv(archivo, codificacion=None):
+    """
+    Abre un CSV (path o archivo binario) como texto en streaming.
+
+    Args:
+        archivo: Path o file-like (archivo subido, open(..., 'rb'))
+        codificacion: Forzar una codificación en lugar de detectarla
+
+    Yields:
+        Tuple (texto, separador): texto es un stream para csv.reader
+    """
+    propio = not hasattr(archivo, 'read')
+    binario = open(archivo, 'rb') if propio else archivo
+    try:
+        binario.seek(0)
+        muestra = binario.read(TAMANO_MUESTRA)
+        binario.seek(0)
+
+        if isinstance(muestra, str):
+            # Archivo ya abierto en modo texto
+            yield binario, detectar_separador(muestra.lstrip('\ufeff').split('\n', 1)[0])
+            return
+
+        codificacion = codificacion or detectar_codificacion(muestra)
+        header = muestra.decode(codificacion, errors='ignore').lstrip('\ufeff').split('\n', 1)[0]
+        texto = io.TextIOWrapper(binario, encoding=codificacion, newline='')
+        try:
+            yield texto, detectar_separador(header)
+        finally:
+            # No cerrar el archivo del llamador al descartar el wrapper
+            texto.detach()
+    finally:
+        if propio:
+            binario.close()
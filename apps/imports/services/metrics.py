@@ -0,0 +1,244 @@
+"""
+Import Metrics - Instrumentación de tiempos, memoria y consultas de una importación.
+"""
+import gc
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from django.db import connection
+
+try:
+    import resource
+except ImportError:  # Windows no tiene el módulo resource
+    resource = None
+
+
+class ImportMetrics:
+    """
+    Acumula métricas de una corrida de importación.
+
+    Etapas medidas:
+        - lectura: lectura del archivo (openpyxl / csv)
+        - parseo: normalización de valores y trabajo en Python (incluye el
+          overhead del ORM y los commits, que no pasan por execute)
+        - busqueda: tiempo en consultas SELECT
+        - escritura: tiempo en INSERT/UPDATE/DELETE
+    """
+
+    ETAPAS = ('lectura', 'parseo', 'busqueda', 'escritura')
+
+    def __init__(self):
+        self.tiempos = dict.fromkeys(self.ETAPAS, 0.0)
+        self.consultas = 0
+        self.colecciones_gc = 0
+        self._inicio = None
+        self._fin = None
+        self._rss_inicio = None
+        self._rss_pico = None
+        self._pico_reiniciado = False
+
+    def iniciar(self):
+        """Marca el inicio de la corrida (solo la primera vez)."""
+        if self._inicio is None:
+            self._inicio = time.perf_counter()
+            self._rss_inicio = self._rss_pico = _memoria_kb('VmRSS')
+            self._pico_reiniciado = self._rss_inicio is not None and _reiniciar_pico()
+
+    def finalizar(self):
+        """Marca el fin de la corrida."""
+        self._fin = time.perf_counter()
+        self._muestrear_memoria()
+
+    @property
+    def duracion(self):
+        """Duración total en segundos desde el inicio de la corrida."""
+        if self._inicio is None:
+            return 0.0
+        fin = self._fin if self._fin is not None else time.perf_counter()
+        return fin - self._inicio
+
+    @contextmanager
+    def etapa(self, nombre):
+        """Mide el tiempo de un bloque y lo suma a la etapa indicada."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.tiempos[nombre] += time.perf_counter() - inicio
+            self._muestrear_memoria()
+
+    @contextmanager
+    def procesamiento(self):
+        """
+        Mide un bloque de procesamiento de filas.
+
+        El tiempo en SQL se clasifica en busqueda/escritura según el tipo de
+        sentencia; el resto del tiempo del bloque se cuenta como parseo.
+        """
+        sql_antes = self.tiempos['busqueda'] + self.tiempos['escritura']
+        gc_antes = self._contar_colecciones()
+        inicio = time.perf_counter()
+        try:
+            with connection.execute_wrapper(self._medir_sql):
+                yield
+        finally:
+            total = time.perf_counter() - inicio
+            sql = self.tiempos['busqueda'] + self.tiempos['escritura'] - sql_antes
+            self.tiempos['parseo'] += max(total - sql, 0.0)
+            self.colecciones_gc += self._contar_colecciones() - gc_antes
+            self._muestrear_memoria()
+
+    def _medir_sql(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            etapa = 'busqueda' if sql.lstrip()[:6].upper() == 'SELECT' else 'escritura'
+            self.tiempos[etapa] += time.perf_counter() - inicio
+            self.consultas += 1
+
+    @staticmethod
+    def _contar_colecciones():
+        """Cantidad de colecciones completas (generación 2) hechas por el GC."""
+        return gc.get_stats()[2]['collections']
+
+    def _muestrear_memoria(self):
+        """
+        Actualiza el pico de RSS de la corrida: VmHWM si se pudo reiniciar al
+        iniciar (cubre los picos dentro de una etapa), si no el RSS actual al
+        terminar cada etapa.
+        """
+        if self._rss_inicio is None:
+            return
+        actual = _memoria_kb('VmHWM' if self._pico_reiniciado else 'VmRSS')
+        if actual is not None:
+            self._rss_pico = max(self._rss_pico, actual)
+
+    def memoria_pico_mb(self):
+        """
+        Cuánto creció la memoria residente (RSS) del proceso durante la
+        corrida, en MB: pico de la corrida menos el RSS al iniciarla. En un
+        worker de larga vida ru_maxrss arrastra el pico de importaciones
+        anteriores, así que no sirve por corrida. None si no se puede medir
+        (sin /proc).
+        """
+        if self._rss_inicio is None:
+            return None
+        self._muestrear_memoria()
+        return round(max(self._rss_pico - self._rss_inicio, 0) / 1024, 1)
+
+    @staticmethod
+    def memoria_proceso_mb():
+        """
+        Pico de memoria residente (RSS) del proceso en MB, o None si no se
+        puede medir. En Linux cuenta desde el último iniciar() de una corrida,
+        que reinicia el pico.
+        """
+        if resource is None:
+            return None
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        if sys.platform == 'darwin':
+            pico /= 1024  # macOS informa bytes, Linux kilobytes
+        return round(pico / 1024, 1)
+
+    def filas_por_segundo(self, filas):
+        """Throughput de la corrida completa."""
+        if not self.duracion:
+            return 0
+        return round(filas / self.duracion, 1)
+
+    def registrar(self, log, filas):
+        """Copia las métricas al ImportLog (no guarda)."""
+        log.tiempo_lectura = round(self.tiempos['lectura'], 3)
+        log.tiempo_parseo = round(self.tiempos['parseo'], 3)
+        log.tiempo_busqueda = round(self.tiempos['busqueda'], 3)
+        log.tiempo_escritura = round(self.tiempos['escritura'], 3)
+        log.duracion = round(self.duracion, 3)
+        log.filas_por_segundo = self.filas_por_segundo(filas)
+        log.memoria_pico_mb = self.memoria_pico_mb()
+        log.consultas_sql = self.consultas
+
+
+def _memoria_kb(campo):
+    """Un campo de memoria (VmRSS, VmHWM) de /proc/self/status en kB, o None fuera de Linux."""
+    try:
+        with open('/proc/self/status') as f:
+            for linea in f:
+                if linea.startswith(campo + ':'):
+                    return int(linea.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _reiniciar_pico():
+    """
+    Lleva VmHWM al RSS actual (Linux 4.0+) para medir el pico desde ahora.
+    Es del proceso: otra importación simultánea lo reinicia también, y el
+    pico queda acotado por los muestreos de fin de etapa. Retorna si se pudo.
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+    except OSError:
+        return False
+    return True
+
+
+# gc.freeze() y gc.disable() son de todo el proceso: con importaciones
+# anidadas o en threads simultáneos solo el primero que entra los aplica y
+# solo el último que sale los revierte
+_gc_lock = threading.Lock()
+_gc_congelados = 0
+_gc_pausados = 0
+_gc_estaba_activo = True
+
+
+@contextmanager
+def gc_congelado():
+    """
+    Congela los objetos existentes durante una importación.
+
+    Las filas leídas y el estado de Django son objetos de larga vida sin
+    ciclos: se liberan por conteo de referencias, así que forzar
+    gc.collect() no recupera memoria y solo recorre el heap completo.
+    Con gc.freeze() las colecciones automáticas que disparan los objetos
+    temporales del ORM no vuelven a recorrer esos objetos.
+    """
+    global _gc_congelados
+    with _gc_lock:
+        _gc_congelados += 1
+        if _gc_congelados == 1:
+            gc.freeze()
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_congelados -= 1
+            if _gc_congelados == 0:
+                gc.unfreeze()
+
+
+@contextmanager
+def gc_pausado():
+    """
+    Pausa las colecciones automáticas durante un bloque sin ciclos.
+
+    Al leer un archivo se crean millones de objetos (tuplas, strings,
+    elementos XML) que se liberan por conteo de referencias; cada colección
+    automática solo vuelve a recorrer la lista de filas que va creciendo.
+    """
+    global _gc_pausados, _gc_estaba_activo
+    with _gc_lock:
+        _gc_pausados += 1
+        if _gc_pausados == 1:
+            _gc_estaba_activo = gc.isenabled()
+            gc.disable()
+    try:
+        yield
+    finally:
+        with _gc_lock:
+            _gc_pausados -= 1
+            if _gc_pausados == 0 and _gc_estaba_activo:
+                gc.enable()
@@ -0,0 +1,95 @@
+"""
+Etapas paralelas de las importaciones: normalización de filas y hash de contraseñas.
+
+Este módulo no importa modelos a nivel de módulo: los procesos del pool lo
+cargan antes de que Django esté inicializado (ver _inicializar_worker).
+"""
+import os
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _inicializar_worker(settings_module):
+    """Inicializa Django en cada proceso del pool."""
+    if settings_module:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def _normalizar_lote(clase, estado, filas):
+    """Normaliza un lote de filas dentro de un proceso del pool."""
+    importador = clase.para_normalizar(estado)
+    return importador.normalizar_lote(filas)
+
+
+def normalizar_en_paralelo(importador, filas, workers, tam_lote):
+    """
+    Normaliza las filas en un ProcessPoolExecutor y las devuelve en orden.
+
+    Mantiene a lo sumo 2 lotes por worker en vuelo para que la memoria no
+    crezca si la etapa de escritura es más lenta que la de normalización.
+
+    Yields:
+        Tuplas (numero_fila, datos, error) en el mismo orden que `filas`.
+    """
+    clase = type(importador)
+    estado = importador.estado_normalizacion()
+    # spawn: los procesos no heredan conexiones abiertas a la base de datos
+    contexto = multiprocessing.get_context('spawn')
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=contexto,
+        initializer=_inicializar_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),)
+    ) as executor:
+        pendientes = deque()
+        for inicio in range(0, len(filas), tam_lote):
+            pendientes.append(
+                executor.submit(_normalizar_lote, clase, estado, filas[inicio:inicio + tam_lote])
+            )
+            if len(pendientes) >= workers * 2:
+                yield from pendientes.popleft().result()
+
+        while pendientes:
+            yield from pendientes.popleft().result()
+
+
+def _hashear_password(tarea):
+    """Hashea un password; retorna None si coincide con el hash actual."""
+    from django.contrib.auth.hashers import check_password, make_password
+
+    password, hash_actual, hasher = tarea
+    if hash_actual and check_password(password, hash_actual):
+        return None
+    return make_password(password, hasher=hasher)
+
+
+def hashear_passwords(tareas, workers, hasher='default'):
+    """
+    Hashea contraseñas, en un ProcessPoolExecutor si hay más de un worker.
+
+    Cada hash PBKDF2 cuesta del orden de medio segundo de CPU, así que el
+    pool se amortiza incluso con lotes chicos.
+
+    Args:
+        tareas: Lista de tuplas (password, hash_actual); hash_actual puede ser None
+        workers: Cantidad de procesos (0 o 1 = en este proceso)
+        hasher: Nombre del hasher para make_password()
+
+    Returns:
+        Lista de hashes en el mismo orden (None = el password no cambió)
+    """
+    tareas = [(password, hash_actual, hasher) for password, hash_actual in tareas]
+    if workers <= 1 or len(tareas) <= 1:
+        return [_hashear_password(tarea) for tarea in tareas]
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_inicializar_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),)
+    ) as executor:
+        return list(executor.map(_hashear_password, tareas))
@@ -2,25 +2,54 @@
 Product Importer - Importador de productos desde Excel/CSV.
 """
 from decimal import Decimal, InvalidOperation
+from django.db import connection, transaction
+from django.utils import timezone
 from apps.catalog.models import Producto, Categoria
 from .base import BaseImporter
 
 
 class ProductImporter(BaseImporter):
-    """Importador de productos."""
+    """
+    Importador de productos.
+    
+    En modo diferencial (por defecto) compara cada fila con los valores
+    actuales del producto y no escribe las que no cambiaron: se informan
+    como 'sin_cambios' y su updated_at se mantiene. Con la opción
+    diferencial=False se reescriben todas las filas existentes.
+    
+    Los archivos grandes se procesan con tabla de staging (ver
+    BaseImporter.usar_staging): la clasificación y la fusión con
+    catalog_producto se hacen con SQL por conjuntos.
+    """
     
     TIPO = 'productos'
     COLUMNAS_REQUERIDAS = ['SKU', 'Nombre', 'Precio']
     COLUMNAS_OPCIONALES = ['Stock', 'filtro_1', 'filtro_2', 'filtro_3', 'filtro_4', 'filtro_5']
+    COLUMNAS_ALIAS = {
+        'SKU': ['Codigo', 'Código'],
+    }
+    STAGING_MODELO = Producto
+    CAMPOS_STAGING = (
+        'sku', 'nombre', 'precio', 'stock',
+        'filtro_1', 'filtro_2', 'filtro_3', 'filtro_4', 'filtro_5'
+    )
+    CLAVE_STAGING = 'sku'
+    VERSION_CACHE = 2  # 2: validación de largos en normalizar_fila()
     
-    def procesar_fila(self, fila, dry_run=False):
-        """Procesa una fila de producto."""
+    def __init__(self, archivo, usuario=None, opciones=None):
+        super().__init__(archivo, usuario, opciones)
+        self.diferencial = self.opciones.get('diferencial', True)
+        # Dry-run: valores de la última aparición de cada SKU ya clasificado
+        self._vistos = {}
+    
+    def normalizar_fila(self, fila):
+        """Valida y normaliza una fila de producto (sin acceso a la base)."""
         # Obtener valores
-        sku = self.get_valor(fila, 'SKU', '').strip()
+        sku = str(self.get_valor(fila, 'SKU', '')).strip()
         if not sku:
             raise ValueError("SKU es requerido")
         
-        nombre = self.get_valor(fila, 'Nombre', '').strip()
+        nombre = str(self.get_valor(fila, 'Nombre', '')).strip()
         if not nombre:
             raise ValueError("Nombre es requerido")
         
@@ -49,48 +78,267 @@ class ProductImporter(BaseImporter):
         if stock < 0:
             stock = 0
         
-        # Filtros dinámicos
-        filtro_1 = self.get_valor(fila, 'filtro_1', '')
-        filtro_2 = self.get_valor(fila, 'filtro_2', '')
-        filtro_3 = self.get_valor(fila, 'filtro_3', '')
-        filtro_4 = self.get_valor(fila, 'filtro_4', '')
-        filtro_5 = self.get_valor(fila, 'filtro_5', '')
+        datos = {
+            'sku': sku,
+            'nombre': nombre,
+            'precio': precio,
+            'stock': stock,
+            # Filtros dinámicos
+            'filtro_1': self.get_valor(fila, 'filtro_1', ''),
+            'filtro_2': self.get_valor(fila, 'filtro_2', ''),
+            'filtro_3': self.get_valor(fila, 'filtro_3', ''),
+            'filtro_4': self.get_valor(fila, 'filtro_4', ''),
+            'filtro_5': self.get_valor(fila, 'filtro_5', ''),
+        }
+        
+        # Largos y dígitos de las columnas: un valor que no entra haría fallar
+        # el lote (o toda la carga del staging) en lugar de solo esta fila
+        for campo in ('sku', 'nombre', 'filtro_1', 'filtro_2', 'filtro_3', 'filtro_4', 'filtro_5'):
+            max_length = Producto._meta.get_field(campo).max_length
+            if datos[campo] is not None and len(str(datos[campo])) > max_length:
+                raise ValueError(f"{campo} supera los {max_length} caracteres")
+        campo_precio = Producto._meta.get_field('precio')
+        if precio >= 10 ** (campo_precio.max_digits - campo_precio.decimal_places):
+            raise ValueError(f"Precio demasiado grande: {precio_raw}")
+        
+        return datos
+    
+    def _valores(self, fila):
+        """Valores de la fila convertidos al tipo de cada campo de Producto."""
+        return {
+            campo: Producto._meta.get_field(campo).to_python(valor)
+            for campo, valor in fila.items()
+        }
+    
+    def _cambios(self, producto, valores):
+        """Campos cuyo valor difiere del actual (todos si no es diferencial)."""
+        return {
+            campo: valor for campo, valor in valores.items()
+            if campo != 'sku' and (not self.diferencial or getattr(producto, campo) != valor)
+        }
+    
+    def procesar_lote(self, filas, dry_run=False):
+        """
+        Procesa un lote con operaciones en bloque.
+        
+        Trae los productos del lote en una consulta, compara en memoria y
+        aplica bulk_create/bulk_update solo con lo que cambió. Si la
+        escritura en bloque falla, el lote se revierte y se reprocesa fila
+        por fila para aislar el error.
+        """
+        validas = [(numero_fila, datos) for numero_fila, datos, error in filas if not error]
+        if not validas:
+            return super().procesar_lote(filas, dry_run)
+        
+        try:
+            productos = Producto.objects.in_bulk(
+                {datos['sku'] for _, datos in validas},
+                field_name='sku'
+            )
+            if dry_run:
+                acciones = {}
+                vistos = {}  # Se suman a self._vistos solo si el lote entero se clasifica
+                for numero_fila, datos in validas:
+                    acciones[numero_fila] = self._accion_dry_run(
+                        productos.get(datos['sku']), self._valores(datos), vistos
+                    )
+                self._vistos.update(vistos)
+            else:
+                with transaction.atomic():
+                    acciones = self._guardar_lote(validas, productos)
+        except Exception:
+            return super().procesar_lote(filas, dry_run)
+        
+        return [
+            (numero_fila, None, error) if error else (numero_fila, acciones[numero_fila], None)
+            for numero_fila, datos, error in filas
+        ]
+    
+    def _accion_dry_run(self, producto, valores, vistos):
+        """
+        Acción de una fila en un dry-run. Como no se guarda nada, un SKU que
+        ya apareció en el archivo se compara contra esa aparición, igual que
+        en ejecutar(), y no contra el producto guardado ni como 'crear'.
+        """
+        sku = valores['sku']
+        anterior = vistos[sku] if sku in vistos else self._vistos.get(sku)
+        vistos[sku] = valores
+        if anterior is not None:
+            cambia = not self.diferencial or any(
+                anterior[campo] != valor for campo, valor in valores.items() if campo != 'sku'
+            )
+        elif producto is None:
+            return 'crear'
+        else:
+            cambia = bool(self._cambios(producto, valores))
+        return 'actualizar' if cambia else 'sin_cambios'
+    
+    def _guardar_lote(self, validas, productos):
+        """
+        Guarda un lote de filas válidas.
+        
+        Returns:
+            Dict {numero_fila: accion}
+        """
+        # Aplicar las filas en orden: un SKU repetido en el lote se crea en
+        # su primera aparición y se compara contra ella en las siguientes
+        acciones = {}
+        nuevos = {}
+        modificados = {}  # sku -> (producto, campos cambiados)
+        for numero_fila, datos in validas:
+            sku = datos['sku']
+            valores = self._valores(datos)
+            producto = productos.get(sku)
+            if producto is None:
+                productos[sku] = nuevos[sku] = Producto(**valores)
+                acciones[numero_fila] = 'crear'
+                continue
+            
+            cambios = self._cambios(producto, valores)
+            if not cambios:
+                acciones[numero_fila] = 'sin_cambios'
+                continue
+            
+            for campo, valor in cambios.items():
+                setattr(producto, campo, valor)
+            if sku not in nuevos:
+                modificados.setdefault(sku, (producto, set()))[1].update(cambios)
+            acciones[numero_fila] = 'actualizar'
+        
+        if nuevos:
+            Producto.objects.bulk_create(nuevos.values())
+        if modificados:
+            ahora = timezone.now()  # bulk_update no aplica auto_now
+            for producto, campos in modificados.values():
+                producto.updated_at = ahora
+                campos.add('updated_at')
+            self._actualizar_por_campo(Producto, modificados.values())
+        
+        return acciones
+    
+    def valores_staging(self, datos):
+        """Valores de la fila ya convertidos al tipo de cada campo."""
+        return self._valores(datos)
+    
+    def _distintos(self, pares):
+        """Condición SQL: alguno de los pares (expresión, expresión) difiere."""
+        if not self.diferencial:
+            return '1 = 1'
+        return '(' + ' OR '.join(f'{izquierda} <> {derecha}' for izquierda, derecha in pares) + ')'
+    
+    def clasificar_staging(self, cursor, tabla):
+        """
+        Cuenta las filas por acción con una consulta sobre staging + productos.
+        
+        Igual que por lotes, un SKU repetido en el archivo se compara contra
+        su aparición anterior (LAG) y no contra el producto guardado.
+        """
+        qn = connection.ops.quote_name
+        campos = [campo for campo in self.CAMPOS_STAGING if campo != 'sku']
+        ventana = 'OVER (PARTITION BY s.sku ORDER BY s.fila)'
+        anteriores = ', '.join(
+            f'LAG(s.{qn(campo)}) {ventana} AS {qn("anterior_" + campo)}' for campo in campos
+        )
+        cambia_anterior = self._distintos([(f'o.{qn(campo)}', f'o.{qn("anterior_" + campo)}') for campo in campos])
+        cambia_producto = self._distintos([(f'o.{qn(campo)}', f'p.{qn(campo)}') for campo in campos])
+        cursor.execute(f'''
+            SELECT accion, COUNT(*) FROM (
+                SELECT CASE
+                    WHEN o.orden > 1 THEN
+                        CASE WHEN {cambia_anterior} THEN 'actualizar' ELSE 'sin_cambios' END
+                    WHEN p.{qn(Producto._meta.pk.column)} IS NULL THEN 'crear'
+                    WHEN {cambia_producto} THEN 'actualizar'
+                    ELSE 'sin_cambios'
+                END AS accion
+                FROM (
+                    SELECT s.*, ROW_NUMBER() {ventana} AS orden, {anteriores}
+                    FROM {tabla} s
+                ) o
+                LEFT JOIN {qn(Producto._meta.db_table)} p ON p.sku = o.sku
+            ) clasificadas
+            GROUP BY accion
+        ''')
+        return dict(cursor.fetchall())
+    
+    def fusionar_staging(self, cursor, tabla):
+        """
+        Aplica la última aparición de cada SKU: un UPDATE de los productos
+        que cambiaron y un INSERT ... SELECT de los nuevos.
+        """
+        qn = connection.ops.quote_name
+        producto = qn(Producto._meta.db_table)
+        campos = [campo for campo in self.CAMPOS_STAGING if campo != 'sku']
+        ahora = connection.ops.adapt_datetimefield_value(timezone.now())
+        
+        # Un SKU repetido queda con los valores de su última fila
+        cursor.execute(f'''
+            DELETE FROM {tabla} WHERE EXISTS (
+                SELECT 1 FROM {tabla} s WHERE s.sku = {tabla}.sku AND s.fila > {tabla}.fila
+            )
+        ''')
+        
+        if connection.vendor == 'postgresql':
+            asignaciones = ', '.join(f'{qn(campo)} = s.{qn(campo)}' for campo in campos)
+            cambia = self._distintos([(f's.{qn(campo)}', f'p.{qn(campo)}') for campo in campos])
+            cursor.execute(f'''
+                UPDATE {producto} p SET {asignaciones}, updated_at = %s
+                FROM {tabla} s
+                WHERE p.sku = s.sku AND {cambia}
+            ''', [ahora])
+        else:
+            # Sin UPDATE ... FROM: asignación de fila con subconsulta correlacionada
+            cambia = self._distintos([(f's.{qn(campo)}', f'{producto}.{qn(campo)}') for campo in campos])
+            cursor.execute(f'''
+                UPDATE {producto} SET
+                    ({', '.join(qn(campo) for campo in campos)}) = (
+                        SELECT {', '.join(f's.{qn(campo)}' for campo in campos)}
+                        FROM {tabla} s WHERE s.sku = {producto}.sku
+                    ),
+                    updated_at = %s
+                WHERE EXISTS (
+                    SELECT 1 FROM {tabla} s WHERE s.sku = {producto}.sku AND {cambia}
+                )
+            ''', [ahora])
+        
+        # Los campos que no vienen en el archivo toman el valor que les da el ORM al crear
+        cursor.execute(f'''
+            INSERT INTO {producto} (
+                {', '.join(qn(campo) for campo in self.CAMPOS_STAGING)},
+                descripcion, imagen, activo, created_at, updated_at
+            )
+            SELECT {', '.join(f's.{qn(campo)}' for campo in self.CAMPOS_STAGING)}, %s, %s, %s, %s, %s
+            FROM {tabla} s
+            WHERE NOT EXISTS (SELECT 1 FROM {producto} p WHERE p.sku = s.sku)
+            ORDER BY s.fila
+        ''', ['', '', True, ahora, ahora])
+    
+    def procesar_fila(self, fila, dry_run=False):
+        """Procesa una fila de producto ya normalizada."""
+        sku = fila['sku']
+        valores = self._valores(fila)
+        
+        if dry_run:
+            producto = Producto.objects.filter(sku=sku).first()
+            return (self._accion_dry_run(producto, valores, self._vistos), None)
         
         # Verificar si existe
         try:
             producto = Producto.objects.get(sku=sku)
-            accion = 'actualizar'
+            cambios = self._cambios(producto, valores)
+            accion = 'actualizar' if cambios else 'sin_cambios'
         except Producto.DoesNotExist:
             producto = None
             accion = 'crear'
         
-        if dry_run:
-            return (accion, None)
-        
         # Ejecutar
         if producto:
-            # Update
-            producto.nombre = nombre
-            producto.precio = precio
-            producto.stock = stock
-            producto.filtro_1 = filtro_1
-            producto.filtro_2 = filtro_2
-            producto.filtro_3 = filtro_3
-            producto.filtro_4 = filtro_4
-            producto.filtro_5 = filtro_5
-            producto.save()
+            # Update (solo los campos que cambiaron)
+            if cambios:
+                for campo, valor in cambios.items():
+                    setattr(producto, campo, valor)
+                producto.save(update_fields=[*cambios, 'updated_at'])
         else:
             # Create
-            producto = Producto.objects.create(
-                sku=sku,
-                nombre=nombre,
-                precio=precio,
-                stock=stock,
-                filtro_1=filtro_1,
-                filtro_2=filtro_2,
-                filtro_3=filtro_3,
-                filtro_4=filtro_4,
-                filtro_5=filtro_5
-            )
+            producto = Producto.objects.create(**valores)
         
         return (accion, producto)
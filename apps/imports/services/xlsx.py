@@ -0,0 +1,220 @@
+"""
+Lector rápido de xlsx: recorre el XML de la hoja con iterparse.
+
+openpyxl (aun en read_only) arma un objeto por celda; acá se leen
+directamente sheetN.xml y sharedStrings.xml y se arma una tupla por fila.
+Los valores son los mismos que da openpyxl con data_only=True: hoja
+activa, números como int/float, fechas como datetime según el formato de
+la celda y filas completadas hasta el ancho de la dimensión de la hoja.
+"""
+import posixpath
+import zipfile
+from xml.etree.ElementTree import iterparse, parse
+
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.cell import column_index_from_string, range_boundaries
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+
+
+NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PAQUETE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+TAG_FILA = f'{NS}row'
+TAG_VALOR = f'{NS}v'
+TAG_TEXTO = f'{NS}t'
+TAG_TRAMO = f'{NS}r'
+TAG_INLINE = f'{NS}is'
+TAG_DIMENSION = f'{NS}dimension'
+TAG_STRING = f'{NS}si'
+
+TIPO_DOCUMENTO = '/officeDocument'
+TIPO_STRINGS = '/sharedStrings'
+TIPO_ESTILOS = '/styles'
+
+
+class LectorXlsx:
+    """
+    Itera las filas de la hoja activa de un xlsx.
+
+    Uso:
+        with LectorXlsx(archivo) as lector:
+            for numero_fila, valores in lector.filas():
+                ...
+    """
+
+    def __init__(self, archivo):
+        self._zip = zipfile.ZipFile(archivo)
+        try:
+            self._leer_libro()
+        except Exception:
+            self._zip.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def _relaciones(self, parte):
+        """{id: (tipo, ruta)} de las relaciones de una parte del paquete."""
+        carpeta, nombre = posixpath.split(parte)
+        ruta = posixpath.join(carpeta, '_rels', f'{nombre}.rels')
+        relaciones = {}
+        for rel in parse(self._zip.open(ruta)).getroot().iter(f'{NS_PAQUETE}Relationship'):
+            destino = rel.get('Target')
+            if destino.startswith('/'):
+                destino = destino[1:]
+            else:
+                destino = posixpath.normpath(posixpath.join(carpeta, destino))
+            relaciones[rel.get('Id')] = (rel.get('Type'), destino)
+        return relaciones
+
+    def _leer_libro(self):
+        """Ubica la hoja activa, los strings compartidos y los formatos de fecha."""
+        libro = next(
+            ruta for tipo, ruta in self._relaciones('').values() if tipo.endswith(TIPO_DOCUMENTO)
+        )
+        raiz = parse(self._zip.open(libro)).getroot()
+        relaciones = self._relaciones(libro)
+
+        propiedades = raiz.find(f'{NS}workbookPr')
+        fecha_1904 = propiedades is not None and propiedades.get('date1904') in ('1', 'true')
+        self.epoch = CALENDAR_MAC_1904 if fecha_1904 else CALENDAR_WINDOWS_1900
+
+        activa = 0
+        for vista in raiz.iter(f'{NS}workbookView'):
+            if vista.get('activeTab') is not None:
+                activa = int(vista.get('activeTab'))
+                break
+        hojas = [hoja.get(f'{NS_REL}id') for hoja in raiz.iter(f'{NS}sheet') if hoja.get(f'{NS_REL}id')]
+        self._hoja = relaciones[hojas[activa]][1]
+
+        self.strings = []
+        self.formatos_fecha = set()
+        self.formatos_duracion = set()
+        for tipo, ruta in relaciones.values():
+            if tipo.endswith(TIPO_STRINGS):
+                self.strings = self._leer_strings(ruta)
+            elif tipo.endswith(TIPO_ESTILOS):
+                self._leer_estilos(ruta)
+
+    def _leer_strings(self, ruta):
+        """Tabla de strings compartidos (texto plano de cada <si>)."""
+        strings = []
+        for _, nodo in iterparse(self._zip.open(ruta)):
+            if nodo.tag != TAG_STRING:
+                continue
+            strings.append(_texto(nodo).replace('x005F_', ''))
+            nodo.clear()
+        return strings
+
+    def _leer_estilos(self, ruta):
+        """Índices de estilo de celda con formato de fecha u hora."""
+        raiz = parse(self._zip.open(ruta)).getroot()
+        propios = {
+            int(formato.get('numFmtId')): formato.get('formatCode')
+            for formato in raiz.iter(f'{NS}numFmt')
+        }
+        estilos = raiz.find(f'{NS}cellXfs')
+        if estilos is None:
+            return
+        for indice, estilo in enumerate(estilos.iter(f'{NS}xf')):
+            id_formato = int(estilo.get('numFmtId', 0))
+            formato = propios.get(id_formato) or builtin_format_code(id_formato)
+            if is_date_format(formato):
+                self.formatos_fecha.add(indice)
+            if is_timedelta_format(formato):
+                self.formatos_duracion.add(indice)
+
+    def filas(self):
+        """
+        Itera (numero_fila, valores) de las filas presentes en la hoja.
+
+        valores es una tupla con None en las celdas vacías, del ancho de
+        la dimensión de la hoja (o hasta la última celda de la fila si la
+        hoja no declara dimensión).
+        """
+        strings = self.strings
+        formatos_fecha = self.formatos_fecha
+        columnas = {}  # 'AB' -> 28
+        ancho = None
+        ultima_fila = None
+        numero_fila = 0
+
+        for _, nodo in iterparse(self._zip.open(self._hoja)):
+            tag = nodo.tag
+            if tag == TAG_DIMENSION:
+                _, _, ancho, ultima_fila = range_boundaries(nodo.get('ref'))
+                continue
+            if tag != TAG_FILA:
+                continue
+
+            referencia = nodo.get('r')
+            numero_fila = int(referencia) if referencia else numero_fila + 1
+            if ultima_fila is not None and numero_fila > ultima_fila:
+                break
+
+            celdas = {}
+            columna = 0
+            for celda in nodo:
+                referencia = celda.get('r')
+                if referencia:
+                    letras = referencia.rstrip('0123456789')
+                    columna = columnas.get(letras)
+                    if columna is None:
+                        columna = columnas[letras] = column_index_from_string(letras)
+                else:
+                    columna += 1
+
+                tipo = celda.get('t')
+                if tipo == 'inlineStr':
+                    inline = celda.find(TAG_INLINE)
+                    if inline is not None:
+                        celdas[columna] = _texto(inline)
+                    continue
+
+                valor = celda.findtext(TAG_VALOR)
+                if not valor:
+                    continue
+                if tipo is None or tipo == 'n':
+                    valor = float(valor) if '.' in valor or 'E' in valor or 'e' in valor else int(valor)
+                    estilo = celda.get('s')
+                    if estilo and int(estilo) in formatos_fecha:
+                        valor = self._fecha(valor, int(estilo))
+                elif tipo == 's':
+                    valor = strings[int(valor)]
+                elif tipo == 'b':
+                    valor = bool(int(valor))
+                elif tipo == 'd':
+                    valor = from_ISO8601(valor)
+                celdas[columna] = valor
+            nodo.clear()
+
+            # Sin dimensión el ancho llega hasta la última celda, aunque esté vacía
+            fin = ancho or columna
+            yield numero_fila, tuple(celdas.get(posicion) for posicion in range(1, fin + 1))
+
+    def _fecha(self, valor, estilo):
+        """Serial de Excel a datetime/time/timedelta, como openpyxl."""
+        try:
+            return from_excel(valor, self.epoch, timedelta=estilo in self.formatos_duracion)
+        except (OverflowError, ValueError):
+            return '#VALUE!'
+
+
+def _texto(nodo):
+    """Texto plano de un <si>/<is>: el <t> directo y los de cada tramo <r>."""
+    partes = []
+    texto = nodo.find(TAG_TEXTO)
+    if texto is not None and texto.text:
+        partes.append(texto.text)
+    for tramo in nodo.iterfind(TAG_TRAMO):
+        texto = tramo.find(TAG_TEXTO)
+        if texto is not None and texto.text:
+            partes.append(texto.text)
+    return ''.join(partes)
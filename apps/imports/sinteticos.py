@@ -0,0 +1,150 @@
+"""
+Generadores de archivos sintéticos para medir el rendimiento de las importaciones.
+"""
+import csv
+import random
+import openpyxl
+
+
+TIPOS = ['TREFILADA', 'LAMINADA', 'FORJADA']
+MEDIDAS = ['1/4', '5/16', '3/8', '7/16', '1/2', '9/16', '5/8', '3/4', '7/8', '1', '1-1/4', '1-1/2', '2']
+FORMAS = ['CURVA', 'PLANA', 'SEMICURVA', '/S/CURVA']
+MATERIALES = ['ACERO', 'INOX', 'GALV.', 'ZINCADO']
+
+ENCABEZADOS_ABRAZADERAS = ['DESCRIPCION', 'CODIGO', 'PRECIO']
+ENCABEZADOS_PRODUCTOS = ['SKU', 'Nombre', 'Precio', 'Stock', 'filtro_1', 'filtro_2', 'filtro_3']
+ENCABEZADOS_CATEGORIAS = ['Nombre']
+ENCABEZADOS_CLIENTES = [
+    'Usuario', 'Nombre', 'Contraseña', 'Email', 'Provincia', 'Domicilio',
+    'Telefonos', 'CUIT/DNI', 'Descuento', 'Cond.IVA'
+]
+PROVINCIAS = ['Buenos Aires', 'CABA', 'Córdoba', 'Santa Fe', 'Mendoza', 'Tucumán']
+CONDICIONES_IVA = ['Responsable Inscripto', 'Monotributo', 'Exento', 'Consumidor Final']
+
+
+def filas_abrazaderas(cantidad, semilla=0):
+    """
+    Genera filas (descripcion, codigo, precio) con el formato de data/abrazaderas.xlsx.
+
+    Las descripciones se repiten como en las listas de precios reales
+    (pocas combinaciones de tipo/medida/ancho/largo/forma). Un 10% usa un
+    formato libre que cae en la búsqueda por palabras clave del parser y
+    un 0.5% no tiene código, para ejercitar el camino de errores.
+    """
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        tipo = rnd.choice(TIPOS)
+        medida = rnd.choice(MEDIDAS)
+        ancho = rnd.choice((40, 50, 60, 70, 85, 100))
+        largo = rnd.choice((100, 120, 160, 200, 260, 300))
+        forma = rnd.choice(FORMAS)
+
+        if rnd.random() < 0.1:
+            descripcion = f'ABRAZ. {tipo[:5]} {rnd.choice(MATERIALES)} {medida}" X{ancho} X{largo} {forma}'
+        else:
+            descripcion = f'ABRAZADERA {tipo} DE {medida} X {ancho} X {largo} {forma}'
+
+        codigo = '' if rnd.random() < 0.005 else f'AB{i:07d}'
+        precio = round(rnd.uniform(500, 25000), 2)
+        yield (descripcion, codigo, precio)
+
+
+def filas_productos(cantidad, semilla=0):
+    """
+    Genera filas de productos con el formato de ENCABEZADOS_PRODUCTOS.
+
+    Los precios mezclan los formatos que acepta el importador (1234.5,
+    "1.234,50", "$ 1234,50") y un 0.5% no es numérico, para ejercitar el
+    camino de errores.
+    """
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        precio = round(rnd.uniform(100, 250000), 2)
+        formato = rnd.random()
+        if formato < 0.005:
+            precio = 'consultar'
+        elif formato < 0.3:
+            precio = f'{precio:,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.')
+        elif formato < 0.4:
+            precio = f'$ {precio:.2f}'.replace('.', ',')
+        yield (
+            f'P{i:07d}',
+            f'{rnd.choice(TIPOS)} {rnd.choice(MATERIALES)} {rnd.choice(MEDIDAS)}',
+            precio,
+            rnd.randrange(0, 500),
+            rnd.choice(MATERIALES),
+            rnd.choice(MEDIDAS),
+            rnd.choice(FORMAS),
+        )
+
+
+def filas_categorias(cantidad, semilla=0):
+    """Genera filas de categorías; un 5% repite un nombre anterior (se saltea)."""
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        numero = rnd.randrange(i) if i and rnd.random() < 0.05 else i
+        yield (f'Categoría {numero:06d}',)
+
+
+def filas_clientes(cantidad, semilla=0):
+    """
+    Genera filas de clientes con el formato de ENCABEZADOS_CLIENTES.
+
+    Un 20% viene sin contraseña (el importador usa el username) y un 0.5%
+    tiene un email inválido, para ejercitar el camino de errores.
+    """
+    rnd = random.Random(semilla)
+    for i in range(cantidad):
+        username = f'cliente{i:06d}'
+        email = f'{username}@example.com' if rnd.random() >= 0.005 else f'{username}@invalido'
+        yield (
+            username,
+            f'CLIENTE {i}',
+            '' if rnd.random() < 0.2 else f'clave{rnd.randrange(10 ** 6):06d}',
+            email,
+            rnd.choice(PROVINCIAS),
+            f'CALLE {rnd.randrange(1, 200)} N° {rnd.randrange(1, 5000)}',
+            f'011 {rnd.randrange(10 ** 7, 10 ** 8)}',
+            f'20{rnd.randrange(10 ** 8, 10 ** 9)}',
+            rnd.choice((0, 5, 10, '15%')),
+            rnd.choice(CONDICIONES_IVA),
+        )
+
+
+def escribir_xlsx(ruta, encabezados, filas):
+    """Escribe un xlsx en modo write_only (memoria constante)."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(encabezados)
+    for fila in filas:
+        ws.append(fila)
+    wb.save(ruta)
+    return ruta
+
+
+def escribir_csv(ruta, encabezados, filas):
+    """Escribe un CSV UTF-8 separado por comas."""
+    with open(ruta, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(encabezados)
+        writer.writerows(filas)
+    return ruta
+
+
+def escalar_xlsx(origen, destino, veces):
+    """Escribe en destino las filas de datos de origen repetidas, con el mismo header."""
+    wb = openpyxl.load_workbook(origen, data_only=True, read_only=True)
+    filas = wb.active.iter_rows(values_only=True)
+    encabezados = next(filas, ())
+    datos = list(filas)
+    wb.close()
+    return escribir_xlsx(destino, encabezados, (fila for _ in range(veces) for fila in datos))
+
+
+# tipo de importación -> (encabezados, generador de filas)
+GENERADORES = {
+    'productos': (ENCABEZADOS_PRODUCTOS, filas_productos),
+    'clientes': (ENCABEZADOS_CLIENTES, filas_clientes),
+    'categorias': (ENCABEZADOS_CATEGORIAS, filas_categorias),
+    'abrazaderas': (ENCABEZADOS_ABRAZADERAS, filas_abrazaderas),
+}
@@ -5,7 +5,6 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.http import JsonResponse, HttpResponse
 from django.contrib import messages
 from django.core.files.storage import default_storage
-from django.core.files.base import ContentFile
 
 from .models import ImportLog, ImportError
 from .services.products import ProductImporter
@@ -89,9 +88,9 @@ class ImportUploadView(AdminRequiredMixin, View):
             messages.error(request, 'Formato no válido. Use .xlsx o .csv')
             return redirect('imports:upload', tipo=tipo)
         
-        # Guardar archivo temporalmente
+        # Guardar archivo temporalmente (el storage lo copia por chunks)
         path = f'imports/temp/{request.user.id}_{tipo}_{archivo.name}'
-        saved_path = default_storage.save(path, ContentFile(archivo.read()))
+        saved_path = default_storage.save(path, archivo)
         
         # Guardar path en sesión
         request.session[f'import_{tipo}_file'] = saved_path
@@ -129,6 +128,7 @@ class ImportPreviewView(AdminRequiredMixin, View):
             request.session[f'import_{tipo}_preview'] = {
                 'a_crear': preview['a_crear'],
                 'a_actualizar': preview['a_actualizar'],
+                'sin_cambios': preview['sin_cambios'],
                 'total': preview['total'],
                 'errores_count': len(preview['errores'])
             }
@@ -168,7 +168,7 @@ class ImportExecuteView(AdminRequiredMixin, View):
             full_path = default_storage.path(file_path)
             importer_class = IMPORTERS[tipo]['class']
             importer = importer_class(full_path, request.user, opciones)
-            importer.preview()  # Cargar datos primero
+            importer.cargar()  # Filas del preview desde la caché (o relee el archivo)
             log = importer.ejecutar()
             
             # Limpiar sesión
@@ -185,6 +185,7 @@ class ImportExecuteView(AdminRequiredMixin, View):
                 'log_id': log.id,
                 'creados': log.creados,
                 'actualizados': log.actualizados,
+                'sin_cambios': log.sin_cambios,
                 'errores': log.errores
             })
             
@@ -203,6 +204,7 @@ def import_progress(request, log_id):
             'total': log.total_filas,
             'creados': log.creados,
             'actualizados': log.actualizados,
+            'sin_cambios': log.sin_cambios,
             'errores': log.errores
         })
     except ImportLog.DoesNotExist:
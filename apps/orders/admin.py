@@ -1,18 +1,56 @@
 from django.contrib import admin
+from django.db import transaction
 from .models import Pedido, ItemPedido
+from . import services
 
 
 class ItemPedidoInline(admin.TabularInline):
+    """Solo lectura: los items se fijan al crear el pedido y los rollups los suman."""
     model = ItemPedido
     extra = 0
-    readonly_fields = ('subtotal',)
+    fields = ('producto', 'cantidad', 'precio_unitario', 'subtotal')
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(Pedido)
 class PedidoAdmin(admin.ModelAdmin):
+    """
+    Los pedidos se crean desde el carrito. El estado y el borrado pasan por
+    apps.orders.services para mantener los rollups de ventas.
+    """
     list_display = ('id', 'cliente', 'estado', 'total', 'created_at')
     list_filter = ('estado', 'created_at')
     search_fields = ('cliente__nombre', 'id')
     inlines = [ItemPedidoInline]
-    readonly_fields = ('subtotal', 'total', 'created_at', 'updated_at')
+    readonly_fields = ('cliente', 'subtotal', 'total', 'created_at', 'updated_at')
     date_hierarchy = 'created_at'
+
+    def has_add_permission(self, request):
+        return False
+
+    def save_model(self, request, obj, form, change):
+        if 'estado' not in form.changed_data:
+            super().save_model(request, obj, form, change)
+            return
+        nuevo_estado = obj.estado
+        with transaction.atomic():
+            obj.estado = form.initial['estado']
+            super().save_model(request, obj, form, change)
+            services.cambiar_estado(obj, nuevo_estado)
+        obj.estado = nuevo_estado
+
+    def delete_model(self, request, obj):
+        services.borrar_pedido(obj)
+
+    def delete_queryset(self, request, queryset):
+        for pedido in queryset:
+            services.borrar_pedido(pedido)
@@ -0,0 +1,63 @@
+"""
+Django management command to rebuild the daily sales rollups from the orders.
+Usage: python manage.py rebuild_rollups [--desde 2025-01-01] [--hasta 2025-12-31]
+"""
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+from apps.orders.models import Pedido
+from apps.orders.services import reconstruir_ventas
+
+
+class Command(BaseCommand):
+    help = 'Rebuild VentaDiaria / VentaDiariaProducto / VentaDiariaCliente from orders, in batches of days'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--desde',
+            type=date.fromisoformat,
+            help='First day to rebuild (YYYY-MM-DD, default: first order)'
+        )
+        parser.add_argument(
+            '--hasta',
+            type=date.fromisoformat,
+            help='Last day to rebuild (YYYY-MM-DD, default: last order)'
+        )
+        parser.add_argument(
+            '--dias',
+            type=int,
+            default=31,
+            help='Days rebuilt per transaction (default 31)'
+        )
+
+    def handle(self, *args, **options):
+        rango = Pedido.objects.aggregate(primero=Min('created_at'), ultimo=Max('created_at'))
+        if rango['primero'] is None and not (options['desde'] and options['hasta']):
+            self.stdout.write('No orders to roll up.')
+            return
+
+        desde = options['desde'] or timezone.localdate(rango['primero'])
+        hasta = options['hasta'] or timezone.localdate(rango['ultimo'])
+        if desde > hasta:
+            raise CommandError('--desde must not be after --hasta')
+        if options['dias'] < 1:
+            raise CommandError('--dias must be at least 1')
+
+        totales = {'dias': 0, 'productos': 0, 'clientes': 0}
+        inicio = desde
+        while inicio <= hasta:
+            fin = min(inicio + timedelta(days=options['dias'] - 1), hasta)
+            creados = reconstruir_ventas(inicio, fin)
+            for clave, cantidad in creados.items():
+                totales[clave] += cantidad
+            self.stdout.write(
+                f'{inicio} .. {fin}: {creados["dias"]} days, '
+                f'{creados["productos"]} product rows, {creados["clientes"]} client rows'
+            )
+            inicio = fin + timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {desde} .. {hasta}: {totales["dias"]} days, '
+            f'{totales["productos"]} product rows, {totales["clientes"]} client rows'
+        ))
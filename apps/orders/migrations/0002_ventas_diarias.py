@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:31
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0003_productoatributo_catalog_pro_definic_84506a_idx'),
+        ('orders', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiaria',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(unique=True, verbose_name='Fecha')),
+                ('pedidos', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('unidades', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria',
+                'verbose_name_plural': 'Ventas diarias',
+                'ordering': ['-fecha'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VentaDiariaProducto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('unidades', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('producto', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='catalog.producto', verbose_name='Producto')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por producto',
+                'verbose_name_plural': 'Ventas diarias por producto',
+                'unique_together': {('fecha', 'producto')},
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('orders', '0002_ventas_diarias'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VentaDiariaCliente',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('pedidos', models.IntegerField(default=0, verbose_name='Pedidos')),
+                ('unidades', models.IntegerField(default=0, verbose_name='Unidades')),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total')),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ventas_diarias', to='accounts.cliente', verbose_name='Cliente')),
+            ],
+            options={
+                'verbose_name': 'Venta diaria por cliente',
+                'verbose_name_plural': 'Ventas diarias por cliente',
+                'unique_together': {('fecha', 'cliente')},
+            },
+        ),
+    ]
@@ -100,3 +100,66 @@ class ItemPedido(models.Model):
     @property
     def subtotal(self):
         return self.cantidad * self.precio_unitario
+
+
+class VentaDiaria(models.Model):
+    """
+    Ventas por día (rollup). Lo mantiene apps.orders.services al crear un
+    pedido y al cancelarlo o reactivarlo; los pedidos cancelados no suman.
+    manage.py rebuild_rollups lo recalcula desde los pedidos.
+    """
+    fecha = models.DateField(unique=True, verbose_name='Fecha')
+    pedidos = models.IntegerField(default=0, verbose_name='Pedidos')
+    unidades = models.IntegerField(default=0, verbose_name='Unidades')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Venta diaria'
+        verbose_name_plural = 'Ventas diarias'
+        ordering = ['-fecha']
+
+    def __str__(self):
+        return f"{self.fecha}: {self.pedidos} pedidos, ${self.total}"
+
+
+class VentaDiariaProducto(models.Model):
+    """Ventas por día y producto (rollup), mantenido junto con VentaDiaria."""
+    fecha = models.DateField(verbose_name='Fecha')
+    producto = models.ForeignKey(
+        Producto,
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias',
+        verbose_name='Producto'
+    )
+    unidades = models.IntegerField(default=0, verbose_name='Unidades')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Venta diaria por producto'
+        verbose_name_plural = 'Ventas diarias por producto'
+        unique_together = ['fecha', 'producto']
+
+    def __str__(self):
+        return f"{self.fecha} - {self.producto_id}: {self.unidades}"
+
+
+class VentaDiariaCliente(models.Model):
+    """Ventas por día y cliente (rollup), mantenido junto con VentaDiaria."""
+    fecha = models.DateField(verbose_name='Fecha')
+    cliente = models.ForeignKey(
+        Cliente,
+        on_delete=models.CASCADE,
+        related_name='ventas_diarias',
+        verbose_name='Cliente'
+    )
+    pedidos = models.IntegerField(default=0, verbose_name='Pedidos')
+    unidades = models.IntegerField(default=0, verbose_name='Unidades')
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name='Total')
+
+    class Meta:
+        verbose_name = 'Venta diaria por cliente'
+        verbose_name_plural = 'Ventas diarias por cliente'
+        unique_together = ['fecha', 'cliente']
+
+    def __str__(self):
+        return f"{self.fecha} - {self.cliente_id}: ${self.total}"
@@ -0,0 +1,207 @@
+"""
+Servicios de pedidos: creación, cambio de estado y rollups de ventas.
+
+Los rollups (VentaDiaria, VentaDiariaProducto, VentaDiariaCliente) se
+actualizan en la misma transacción que el pedido, sumando o restando con
+UPDATE ... = campo + x, así los reportes no recorren Pedido/ItemPedido.
+reconstruir_ventas() los recalcula desde los pedidos (manage.py
+rebuild_rollups).
+
+Los totales por día y por cliente suman Pedido.total; los por producto
+suman cantidad * precio_unitario de los items. Pedido.total se redondea
+una vez sobre los precios sin redondear, así que la suma por producto de
+un día puede diferir de VentaDiaria.total en algunos centavos.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Pedido, ItemPedido, VentaDiaria, VentaDiariaProducto, VentaDiariaCliente
+
+
+CENTAVO = Decimal('0.01')
+
+
+def suma_ventas(estado):
+    """Si un pedido en este estado cuenta como venta (los cancelados no)."""
+    return estado != Pedido.Estado.CANCELADO
+
+
+def crear_pedido(cliente, carrito, nota=''):
+    """
+    Crea un pedido con los items del carrito y lo suma a los rollups.
+
+    Args:
+        cliente: Cliente que hace el pedido
+        carrito: apps.cart.cart.Carrito con al menos un item
+        nota: Nota del cliente
+
+    Returns:
+        Pedido creado
+    """
+    with transaction.atomic():
+        pedido = Pedido.objects.create(
+            cliente=cliente,
+            nota=nota,
+            descuento_aplicado=cliente.descuento
+        )
+
+        items = []
+        total = Decimal('0')
+        for item in carrito:
+            items.append(ItemPedido(
+                pedido=pedido,
+                producto=item['producto'],
+                cantidad=item['cantidad'],
+                # Redondear acá para que los rollups sumen lo mismo que se guarda
+                precio_unitario=item['precio_con_descuento'].quantize(CENTAVO)
+            ))
+            total += item['subtotal']
+        ItemPedido.objects.bulk_create(items)
+
+        pedido.subtotal = Decimal(carrito.get_total_sin_descuento()).quantize(CENTAVO)
+        pedido.total = total.quantize(CENTAVO)
+        pedido.save(update_fields=['subtotal', 'total', 'updated_at'])
+
+        actualizar_ventas(pedido, items)
+    return pedido
+
+
+def cambiar_estado(pedido, nuevo_estado):
+    """
+    Cambia el estado de un pedido. Cancelar resta el pedido de los rollups
+    y reactivar un pedido cancelado lo vuelve a sumar.
+
+    Returns:
+        Pedido actualizado
+    """
+    with transaction.atomic():
+        # Bloquear la fila: dos cancelaciones simultáneas restarían dos veces
+        pedido = Pedido.objects.select_for_update().get(pk=pedido.pk)
+        anterior = pedido.estado
+        if anterior == nuevo_estado:
+            return pedido
+
+        pedido.estado = nuevo_estado
+        pedido.save(update_fields=['estado', 'updated_at'])
+
+        if suma_ventas(anterior) != suma_ventas(nuevo_estado):
+            actualizar_ventas(pedido, signo=1 if suma_ventas(nuevo_estado) else -1)
+    return pedido
+
+
+def borrar_pedido(pedido):
+    """Borra un pedido y lo resta de los rollups si sumaba."""
+    with transaction.atomic():
+        pedido = Pedido.objects.select_for_update().get(pk=pedido.pk)
+        if suma_ventas(pedido.estado):
+            actualizar_ventas(pedido, signo=-1)
+        pedido.delete()
+
+
+def actualizar_ventas(pedido, items=None, signo=1):
+    """
+    Suma (signo=1) o resta (signo=-1) un pedido en los rollups de su día.
+
+    Crea las filas que falten con bulk_create(ignore_conflicts=True) y
+    actualiza todas las de productos con un único UPDATE con CASE.
+    """
+    if items is None:
+        items = list(pedido.items.all())
+    fecha = timezone.localdate(pedido.created_at)
+
+    por_producto = defaultdict(lambda: [0, Decimal('0')])
+    for item in items:
+        por_producto[item.producto_id][0] += item.cantidad
+        por_producto[item.producto_id][1] += item.cantidad * item.precio_unitario
+    unidades = sum(cantidad for cantidad, _ in por_producto.values())
+
+    for modelo, filtro in (
+        (VentaDiaria, {'fecha': fecha}),
+        (VentaDiariaCliente, {'fecha': fecha, 'cliente_id': pedido.cliente_id}),
+    ):
+        modelo.objects.bulk_create([modelo(**filtro)], ignore_conflicts=True)
+        modelo.objects.filter(**filtro).update(
+            pedidos=F('pedidos') + signo,
+            unidades=F('unidades') + signo * unidades,
+            total=F('total') + signo * pedido.total
+        )
+
+    if not por_producto:
+        return
+    VentaDiariaProducto.objects.bulk_create(
+        [VentaDiariaProducto(fecha=fecha, producto_id=producto_id) for producto_id in por_producto],
+        ignore_conflicts=True
+    )
+    VentaDiariaProducto.objects.filter(fecha=fecha, producto_id__in=list(por_producto)).update(
+        unidades=F('unidades') + Case(
+            *[When(producto_id=producto_id, then=Value(signo * cantidad))
+              for producto_id, (cantidad, _) in por_producto.items()],
+            output_field=IntegerField()
+        ),
+        total=F('total') + Case(
+            *[When(producto_id=producto_id, then=Value(signo * importe))
+              for producto_id, (_, importe) in por_producto.items()],
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )
+    )
+
+
+def reconstruir_ventas(desde, hasta):
+    """
+    Recalcula los rollups de los días desde..hasta (inclusive, fechas
+    locales) a partir de los pedidos no cancelados, en una transacción.
+    Igual que actualizar_ventas: Pedido.total por día y cliente,
+    cantidad * precio_unitario por producto.
+
+    Returns:
+        Dict con la cantidad de filas creadas por rollup
+    """
+    zona = timezone.get_current_timezone()
+    inicio = timezone.make_aware(datetime.combine(desde, time.min), zona)
+    fin = timezone.make_aware(datetime.combine(hasta + timedelta(days=1), time.min), zona)
+    pedidos = Pedido.objects.filter(created_at__gte=inicio, created_at__lt=fin).exclude(
+        estado=Pedido.Estado.CANCELADO
+    ).annotate(dia=TruncDate('created_at', tzinfo=zona)).order_by()
+    items = ItemPedido.objects.filter(
+        pedido__created_at__gte=inicio, pedido__created_at__lt=fin
+    ).exclude(
+        pedido__estado=Pedido.Estado.CANCELADO
+    ).annotate(dia=TruncDate('pedido__created_at', tzinfo=zona)).order_by()
+
+    with transaction.atomic():
+        # Unidades por separado: sumar Pedido.total con un join a los items lo multiplicaría
+        unidades_dia = dict(items.values_list('dia').annotate(Sum('cantidad')))
+        unidades_cliente = {
+            (dia, cliente_id): unidades
+            for dia, cliente_id, unidades in items.values_list('dia', 'pedido__cliente_id').annotate(Sum('cantidad'))
+        }
+
+        for modelo in (VentaDiaria, VentaDiariaProducto, VentaDiariaCliente):
+            modelo.objects.filter(fecha__range=(desde, hasta)).delete()
+
+        dias = VentaDiaria.objects.bulk_create([
+            VentaDiaria(fecha=dia, pedidos=cantidad, unidades=unidades_dia.get(dia, 0), total=total)
+            for dia, cantidad, total in pedidos.values_list('dia').annotate(Count('id'), Sum('total'))
+        ], batch_size=1000)
+        clientes = VentaDiariaCliente.objects.bulk_create([
+            VentaDiariaCliente(
+                fecha=dia, cliente_id=cliente_id, pedidos=cantidad,
+                unidades=unidades_cliente.get((dia, cliente_id), 0), total=total
+            )
+            for dia, cliente_id, cantidad, total in pedidos.values_list('dia', 'cliente_id').annotate(
+                Count('id'), Sum('total')
+            ).iterator()
+        ], batch_size=1000)
+        productos = VentaDiariaProducto.objects.bulk_create([
+            VentaDiariaProducto(fecha=dia, producto_id=producto_id, unidades=unidades, total=total)
+            for dia, producto_id, unidades, total in items.values_list('dia', 'producto_id').annotate(
+                Sum('cantidad'), importe=Sum(F('cantidad') * F('precio_unitario'))
+            ).iterator()
+        ], batch_size=1000)
+
+    return {'dias': len(dias), 'productos': len(productos), 'clientes': len(clientes)}
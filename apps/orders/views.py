@@ -4,7 +4,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 
-from .models import Pedido, ItemPedido
+from .models import Pedido
+from . import services
 from apps.cart.cart import Carrito
 from apps.accounts.models import Cliente
 
@@ -68,29 +69,8 @@ def crear_pedido(request):
         messages.error(request, 'No tienes un perfil de cliente asociado.')
         return redirect('cart:ver')
     
-    # Crear el pedido
-    pedido = Pedido.objects.create(
-        cliente=cliente,
-        nota=request.POST.get('nota', ''),
-        descuento_aplicado=cliente.descuento
-    )
-    
-    # Crear items del pedido
-    subtotal = 0
-    for item in carrito:
-        precio_con_descuento = item['precio_con_descuento']
-        ItemPedido.objects.create(
-            pedido=pedido,
-            producto=item['producto'],
-            cantidad=item['cantidad'],
-            precio_unitario=precio_con_descuento
-        )
-        subtotal += item['subtotal']
-    
-    # Actualizar totales del pedido
-    pedido.subtotal = carrito.get_total_sin_descuento()
-    pedido.total = subtotal
-    pedido.save()
+    # Crear el pedido con sus items (y sumarlo a los rollups de ventas)
+    pedido = services.crear_pedido(cliente, carrito, nota=request.POST.get('nota', ''))
     
     # Limpiar carrito
     carrito.limpiar()
@@ -1,3 +1,9 @@
 from django.contrib import admin
+from .models import BorradoMasivo
 
-# Panel no tiene modelos propios
+
+@admin.register(BorradoMasivo)
+class BorradoMasivoAdmin(admin.ModelAdmin):
+    list_display = ('id', 'tipo', 'estado', 'borrados', 'total', 'protegidos', 'usuario', 'created_at')
+    list_filter = ('tipo', 'estado')
+    readonly_fields = ('created_at', 'updated_at', 'completed_at')
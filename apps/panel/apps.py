@@ -5,3 +5,15 @@ class PanelConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.panel'
     verbose_name = 'Panel de Administración'
+
+    def ready(self):
+        from django.db.models.signals import post_delete, post_save
+        from apps.accounts.models import Cliente
+        from apps.catalog.models import Producto
+        from apps.orders.models import Pedido
+        from .estadisticas import invalidar
+
+        # Estadísticas del dashboard: nueva versión de la caché al guardar o borrar
+        for modelo in (Producto, Cliente, Pedido):
+            post_save.connect(invalidar, sender=modelo, dispatch_uid=f'panel_estadisticas_save_{modelo.__name__}')
+            post_delete.connect(invalidar, sender=modelo, dispatch_uid=f'panel_estadisticas_delete_{modelo.__name__}')
@@ -0,0 +1,166 @@
+"""
+Borrado masivo de productos, clientes y pedidos, por lotes.
+
+QuerySet.delete() junta en memoria todos los objetos relacionados (y, con
+receivers de post_delete, instancia cada fila) antes de borrar: con un
+catálogo grande se pasa del timeout del request. Acá se borra por lotes de
+ids consecutivos, cada lote en su transacción: primero las tablas hijas en
+cascada con un DELETE por conjunto y después la tabla principal. Lo que
+está protegido por pedidos (on_delete=PROTECT) no se borra y se informa.
+
+Desde el panel el borrado corre en un thread y guarda el progreso en
+BorradoMasivo; clear_data usa el mismo generador en primer plano.
+"""
+import logging
+import threading
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Exists, Max, Min, OuterRef
+from django.utils import timezone
+
+from apps.accounts.models import Cliente, Usuario
+from apps.catalog.models import Producto, ProductoAtributo
+from apps.orders.models import ItemPedido, Pedido, VentaDiariaCliente, VentaDiariaProducto
+from apps.orders.services import reconstruir_ventas
+from . import estadisticas
+from .models import BorradoMasivo
+
+logger = logging.getLogger(__name__)
+
+
+LOTE = 1000
+
+# Un borrado activo sin progreso en este tiempo se considera abandonado (p. ej. reinicio del worker)
+ABANDONADO = timedelta(minutes=10)
+
+# Por tipo: modelo, condición de los protegidos por pedidos y (modelo hijo, columna) en cascada
+TIPOS = {
+    BorradoMasivo.Tipo.PRODUCTOS: (
+        Producto,
+        Exists(ItemPedido.objects.filter(producto=OuterRef('pk'))),
+        [(ProductoAtributo, 'producto_id'), (Producto.categorias.through, 'producto_id'),
+         (VentaDiariaProducto, 'producto_id')],
+    ),
+    BorradoMasivo.Tipo.CLIENTES: (
+        Cliente,
+        Exists(Pedido.objects.filter(cliente=OuterRef('pk'))),
+        [(VentaDiariaCliente, 'cliente_id')],
+    ),
+    BorradoMasivo.Tipo.PEDIDOS: (
+        Pedido,
+        None,
+        [(ItemPedido, 'pedido_id')],
+    ),
+}
+
+
+def contar(tipo):
+    """(a borrar, protegidos) de un tipo."""
+    modelo, protegidos, _ = TIPOS[tipo]
+    if protegidos is None:
+        return modelo.objects.count(), 0
+    return modelo.objects.filter(~protegidos).count(), modelo.objects.filter(protegidos).count()
+
+
+def borrar_por_lotes(tipo, lote=LOTE):
+    """
+    Borra todos los registros del tipo que no estén protegidos.
+
+    Generador: hace yield de la cantidad borrada después de cada lote, así
+    quien lo usa puede guardar el progreso o dejar de iterar para cortar.
+    Con clientes también borra sus usuarios (salvo los administradores).
+    Con pedidos recalcula los rollups de ventas de los días de cada lote en
+    su misma transacción: cortar o fallar a mitad no los deja desfasados.
+    """
+    modelo, protegidos, hijos = TIPOS[tipo]
+    candidatos = modelo.objects.filter(~protegidos) if protegidos is not None else modelo.objects.all()
+    qn = connection.ops.quote_name
+    tabla = qn(modelo._meta.db_table)
+    pk = qn(modelo._meta.pk.column)
+
+    ultimo = 0
+    while True:
+        ids = list(candidatos.filter(pk__gt=ultimo).order_by('pk').values_list('pk', flat=True)[:lote])
+        if not ids:
+            break
+
+        with transaction.atomic():
+            usuario_ids = []
+            if modelo is Cliente:
+                usuario_ids = list(Cliente.objects.filter(pk__in=ids).values_list('usuario_id', flat=True))
+            dias = None
+            if modelo is Pedido:
+                dias = Pedido.objects.filter(pk__in=ids).aggregate(desde=Min('created_at'), hasta=Max('created_at'))
+            # Los hijos no tienen relaciones ni receivers: delete() es un solo DELETE por conjunto
+            for hijo, columna in hijos:
+                hijo.objects.filter(**{f'{columna}__in': ids}).delete()
+            with connection.cursor() as cursor:
+                # Sin el Collector, que instanciaría cada fila por los receivers de post_delete
+                cursor.execute(f'DELETE FROM {tabla} WHERE {pk} IN ({", ".join(["%s"] * len(ids))})', ids)
+            if usuario_ids:
+                # Los usuarios tienen relaciones de auth/admin: borrado normal, acotado al lote
+                Usuario.objects.filter(pk__in=usuario_ids, is_superuser=False).exclude(
+                    rol=Usuario.Rol.ADMIN
+                ).delete()
+            if dias:
+                # Los ids son consecutivos: los días del lote son pocos y casi no tienen otros pedidos
+                reconstruir_ventas(timezone.localdate(dias['desde']), timezone.localdate(dias['hasta']))
+
+        ultimo = ids[-1]
+        yield len(ids)
+
+
+def iniciar(tipo, usuario):
+    """
+    Crea un BorradoMasivo y lo ejecuta en un thread después del commit.
+    Si ya hay uno activo del mismo tipo, retorna ese.
+    """
+    activo = BorradoMasivo.objects.filter(
+        tipo=tipo,
+        estado__in=[BorradoMasivo.Estado.PENDIENTE, BorradoMasivo.Estado.PROCESANDO],
+        updated_at__gte=timezone.now() - ABANDONADO
+    ).first()
+    if activo:
+        return activo
+
+    borrado = BorradoMasivo.objects.create(tipo=tipo, usuario=usuario)
+    transaction.on_commit(
+        lambda: threading.Thread(target=_ejecutar_en_thread, args=(borrado.pk,), name=f'borrado-{borrado.pk}').start()
+    )
+    return borrado
+
+
+def _ejecutar_en_thread(borrado_id):
+    try:
+        ejecutar(borrado_id)
+    finally:
+        # El thread abrió su propia conexión
+        connection.close()
+
+
+def ejecutar(borrado_id):
+    """Ejecuta un BorradoMasivo guardando el progreso después de cada lote."""
+    borrado = BorradoMasivo.objects.get(pk=borrado_id)
+    try:
+        borrado.total, borrado.protegidos = contar(borrado.tipo)
+        borrado.estado = BorradoMasivo.Estado.PROCESANDO
+        borrado.save(update_fields=['total', 'protegidos', 'estado', 'updated_at'])
+
+        for cantidad in borrar_por_lotes(borrado.tipo):
+            borrado.borrados += cantidad
+            borrado.save(update_fields=['borrados', 'updated_at'])
+            if BorradoMasivo.objects.filter(pk=borrado.pk, estado=BorradoMasivo.Estado.CANCELADO).exists():
+                borrado.estado = BorradoMasivo.Estado.CANCELADO
+                break
+        else:
+            borrado.estado = BorradoMasivo.Estado.COMPLETADO
+    except Exception as e:
+        logger.exception('Error en el borrado masivo %s', borrado_id)
+        borrado.estado = BorradoMasivo.Estado.ERROR
+        borrado.error = str(e)
+    finally:
+        borrado.completed_at = timezone.now()
+        borrado.save(update_fields=['estado', 'error', 'completed_at', 'updated_at'])
+        # Una sola invalidación de las estadísticas del dashboard por borrado
+        estadisticas.invalidar()
+    return borrado
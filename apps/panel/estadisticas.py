@@ -0,0 +1,99 @@
+"""
+Estadísticas del dashboard del panel, cacheadas.
+
+Los contadores salen de un aggregate por tabla (Count con filter) y las
+ventas de los rollups diarios de apps.orders. El resultado se cachea
+PANEL_ESTADISTICAS_TTL segundos bajo una clave con versión; guardar o
+borrar un producto, cliente o pedido incrementa la versión (ver
+PanelConfig.ready). Las escrituras con bulk_create/update (importaciones)
+no mandan señales: esas se ven al vencer el TTL.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from apps.accounts.models import Cliente
+from apps.catalog.models import Producto
+from apps.orders.models import Pedido, VentaDiaria, VentaDiariaProducto
+
+
+CLAVE_VERSION = 'panel:estadisticas:version'
+
+
+def _version():
+    version = cache.get(CLAVE_VERSION)
+    if version is None:
+        # Arrancar en un valor nuevo: si la clave se desalojó, no reusar entradas viejas
+        cache.add(CLAVE_VERSION, time.time_ns(), None)
+        version = cache.get(CLAVE_VERSION, 0)
+    return version
+
+
+def invalidar(**kwargs):
+    """Descarta las estadísticas cacheadas (receiver de post_save/post_delete)."""
+    # Después del commit: antes, otro request podría cachear los datos viejos con la versión nueva
+    transaction.on_commit(_incrementar_version)
+
+
+def _incrementar_version():
+    try:
+        cache.incr(CLAVE_VERSION)
+    except ValueError:
+        cache.set(CLAVE_VERSION, time.time_ns(), None)
+
+
+def dashboard(dias=30, top=10):
+    """
+    Estadísticas del dashboard.
+
+    Returns:
+        Dict con total_productos, total_clientes, total_pedidos,
+        pedidos_pendientes, ventas_por_dia (últimos `dias` días, con los
+        días sin ventas en cero) y top_productos (los `top` de más
+        facturación en ese período)
+    """
+    clave = f'panel:estadisticas:{_version()}:{dias}:{top}'
+    datos = cache.get(clave)
+    if datos is None:
+        datos = _calcular(dias, top)
+        cache.set(clave, datos, getattr(settings, 'PANEL_ESTADISTICAS_TTL', 60))
+    return datos
+
+
+def _calcular(dias, top):
+    datos = {}
+    datos.update(Producto.objects.aggregate(total_productos=Count('id', filter=Q(activo=True))))
+    datos.update(Cliente.objects.aggregate(total_clientes=Count('id')))
+    datos.update(Pedido.objects.aggregate(
+        total_pedidos=Count('id'),
+        pedidos_pendientes=Count('id', filter=Q(estado=Pedido.Estado.PENDIENTE))
+    ))
+
+    hoy = timezone.localdate()
+    desde = hoy - timedelta(days=dias - 1)
+    ventas = {
+        venta['fecha']: venta
+        for venta in VentaDiaria.objects.filter(fecha__gte=desde).values('fecha', 'pedidos', 'unidades', 'total')
+    }
+    ventas_por_dia = []
+    for i in range(dias):
+        fecha = desde + timedelta(days=i)
+        ventas_por_dia.append(ventas.get(fecha) or {'fecha': fecha, 'pedidos': 0, 'unidades': 0, 'total': 0})
+    maximo = max((venta['total'] for venta in ventas_por_dia), default=0)
+    for venta in ventas_por_dia:
+        venta['porcentaje'] = round(venta['total'] * 100 / maximo) if maximo else 0
+    datos['ventas_por_dia'] = ventas_por_dia
+    datos['ventas_periodo'] = sum(venta['total'] for venta in ventas_por_dia)
+
+    datos['top_productos'] = list(
+        VentaDiariaProducto.objects.filter(fecha__gte=desde)
+        .values('producto_id', 'producto__sku', 'producto__nombre')
+        .annotate(unidades=Sum('unidades'), total=Sum('total'))
+        .filter(unidades__gt=0)
+        .order_by('-total')[:top]
+    )
+    return datos
@@ -0,0 +1,141 @@
+"""
+Exportación de productos, clientes y pedidos a CSV o xlsx.
+
+Las filas salen de .values_list().iterator(chunk_size=...), sin instanciar
+modelos, y se escriben a medida que se leen: el CSV se manda en streaming
+y el xlsx se arma con openpyxl en modo write_only en un archivo temporal.
+En ambos casos la memoria no crece con la cantidad de filas.
+
+Las columnas de productos y clientes son las que aceptan los
+importadores, así un archivo exportado se puede editar y volver a importar.
+
+Los textos vienen de planillas importadas: los que empiezan como una
+fórmula (=, +, -, @, tab, CR) se escriben con un apóstrofo adelante para
+que Excel no los ejecute al abrir el archivo. Los importadores lo quitan.
+"""
+import csv
+import tempfile
+from django.db.models import OuterRef, Q, Subquery
+from django.utils import timezone
+import openpyxl
+
+from apps.accounts.models import Cliente
+from apps.catalog.models import DefinicionAtributo, Producto, ProductoAtributo
+from apps.orders.models import ItemPedido, Pedido
+
+
+CHUNK = 2000
+
+# Comienzos que Excel / LibreOffice interpretan como fórmula
+PREFIJOS_FORMULA = ('=', '+', '-', '@', '\t', '\r')
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: write() devuelve la línea en lugar de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _celda(valor):
+    """Valor para una celda: los textos que empiezan como fórmula van con ' adelante."""
+    if isinstance(valor, str) and valor.startswith(PREFIJOS_FORMULA):
+        return "'" + valor
+    return valor
+
+
+def _fila(fila):
+    return [_celda(valor) for valor in fila]
+
+
+def productos(busqueda='', categoria=None):
+    """
+    (encabezados, filas) de productos. Con categoría, solo sus productos
+    (y los de sus subcategorías activas) con una columna por atributo.
+    """
+    encabezados = ['SKU', 'Nombre', 'Precio', 'Stock', 'filtro_1', 'filtro_2', 'filtro_3',
+                   'filtro_4', 'filtro_5', 'Activo']
+    campos = ['sku', 'nombre', 'precio', 'stock', 'filtro_1', 'filtro_2', 'filtro_3',
+              'filtro_4', 'filtro_5', 'activo']
+    queryset = Producto.objects.all()
+    if busqueda:
+        queryset = queryset.filter(Q(nombre__icontains=busqueda) | Q(sku__icontains=busqueda))
+
+    if categoria:
+        cat_ids = [categoria.id, *categoria.subcategorias.filter(activa=True).values_list('id', flat=True)]
+        # distinct por subquery: un producto en dos subcategorías saldría repetido con un join
+        queryset = queryset.filter(
+            id__in=Producto.categorias.through.objects.filter(categoria_id__in=cat_ids).values('producto_id')
+        )
+        definiciones = DefinicionAtributo.objects.filter(
+            categoria_id__in=[categoria.id, categoria.padre_id], activo=True
+        ).order_by('orden', 'id')
+        # Pivot: una subconsulta por definición (índice único producto+definición)
+        for definicion in definiciones:
+            alias = f'atributo_{definicion.id}'
+            queryset = queryset.annotate(**{alias: Subquery(
+                ProductoAtributo.objects.filter(producto=OuterRef('pk'), definicion=definicion).values('valor__valor')[:1]
+            )})
+            encabezados.append(definicion.etiqueta)
+            campos.append(alias)
+
+    filas = queryset.order_by('sku').values_list(*campos).iterator(chunk_size=CHUNK)
+    return encabezados, ((*fila[:9], 'SI' if fila[9] else 'NO', *fila[10:]) for fila in filas)
+
+
+def clientes(busqueda=''):
+    """(encabezados, filas) de clientes, sin contraseñas."""
+    encabezados = ['Usuario', 'Nombre', 'Email', 'Provincia', 'Domicilio', 'Telefonos',
+                   'CUIT/DNI', 'Descuento', 'Cond.IVA']
+    queryset = Cliente.objects.all()
+    if busqueda:
+        queryset = queryset.filter(
+            Q(nombre__icontains=busqueda) |
+            Q(cuit_dni__icontains=busqueda) |
+            Q(usuario__username__icontains=busqueda)
+        )
+    condiciones = dict(Cliente.CondicionIVA.choices)
+    filas = queryset.order_by('usuario__username').values_list(
+        'usuario__username', 'nombre', 'usuario__email', 'provincia', 'domicilio', 'telefonos',
+        'cuit_dni', 'descuento', 'condicion_iva'
+    ).iterator(chunk_size=CHUNK)
+    return encabezados, ((*fila[:8], condiciones.get(fila[8], fila[8])) for fila in filas)
+
+
+def pedidos(estado=''):
+    """(encabezados, filas) de pedidos, una fila por item."""
+    encabezados = ['Pedido', 'Fecha', 'Cliente', 'Estado', 'SKU', 'Producto', 'Cantidad',
+                   'Precio unitario', 'Total pedido']
+    queryset = ItemPedido.objects.all()
+    if estado:
+        queryset = queryset.filter(pedido__estado=estado)
+    estados = dict(Pedido.Estado.choices)
+    filas = queryset.order_by('-pedido_id', 'id').values_list(
+        'pedido_id', 'pedido__created_at', 'pedido__cliente__nombre', 'pedido__estado',
+        'producto__sku', 'producto__nombre', 'cantidad', 'precio_unitario', 'pedido__total'
+    ).iterator(chunk_size=CHUNK)
+    return encabezados, (
+        (pedido, timezone.localtime(fecha).replace(tzinfo=None), cliente, estados.get(codigo, codigo), *resto)
+        for pedido, fecha, cliente, codigo, *resto in filas
+    )
+
+
+def csv_streaming(encabezados, filas):
+    """Generador de líneas CSV (UTF-8 con BOM, para que Excel lea los acentos)."""
+    writer = csv.writer(_Eco())
+    yield '\ufeff' + writer.writerow(_fila(encabezados))
+    for fila in filas:
+        yield writer.writerow(_fila(fila))
+
+
+def xlsx_temporal(encabezados, filas):
+    """Escribe un xlsx en modo write_only a un archivo temporal y lo devuelve abierto al inicio."""
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(_fila(encabezados))
+    for fila in filas:
+        ws.append(_fila(fila))
+    archivo = tempfile.TemporaryFile()
+    wb.save(archivo)
+    archivo.seek(0)
+    return archivo
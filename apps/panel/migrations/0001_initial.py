@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BorradoMasivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('productos', 'Productos'), ('clientes', 'Clientes'), ('pedidos', 'Pedidos')], max_length=20)),
+                ('estado', models.CharField(choices=[('pendiente', 'Pendiente'), ('procesando', 'Procesando'), ('completado', 'Completado'), ('cancelado', 'Cancelado'), ('error', 'Error')], default='pendiente', max_length=20)),
+                ('total', models.IntegerField(default=0)),
+                ('borrados', models.IntegerField(default=0)),
+                ('protegidos', models.IntegerField(default=0, help_text='Registros que no se borran porque tienen pedidos')),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('usuario', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='borrados_masivos', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Borrado masivo',
+                'verbose_name_plural': 'Borrados masivos',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -1 +1,62 @@
-# Panel no tiene modelos propios (usa los de otras apps)
+from django.conf import settings
+from django.db import models
+
+
+class BorradoMasivo(models.Model):
+    """
+    Borrado de todos los productos, clientes o pedidos, ejecutado en
+    segundo plano por lotes (ver apps.panel.borrado). Guarda el progreso
+    para mostrarlo en el panel.
+    """
+
+    class Tipo(models.TextChoices):
+        PRODUCTOS = 'productos', 'Productos'
+        CLIENTES = 'clientes', 'Clientes'
+        PEDIDOS = 'pedidos', 'Pedidos'
+
+    class Estado(models.TextChoices):
+        PENDIENTE = 'pendiente', 'Pendiente'
+        PROCESANDO = 'procesando', 'Procesando'
+        COMPLETADO = 'completado', 'Completado'
+        CANCELADO = 'cancelado', 'Cancelado'
+        ERROR = 'error', 'Error'
+
+    tipo = models.CharField(max_length=20, choices=Tipo.choices)
+    estado = models.CharField(max_length=20, choices=Estado.choices, default=Estado.PENDIENTE)
+    usuario = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='borrados_masivos'
+    )
+
+    total = models.IntegerField(default=0)
+    borrados = models.IntegerField(default=0)
+    protegidos = models.IntegerField(
+        default=0,
+        help_text='Registros que no se borran porque tienen pedidos'
+    )
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Borrado masivo'
+        verbose_name_plural = 'Borrados masivos'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} - {self.created_at.strftime('%d/%m/%Y %H:%M')}"
+
+    @property
+    def progreso(self):
+        """Retorna el porcentaje de progreso."""
+        if self.total == 0:
+            return 100 if self.estado == self.Estado.COMPLETADO else 0
+        return int((self.borrados / self.total) * 100)
+
+    @property
+    def activo(self):
+        return self.estado in (self.Estado.PENDIENTE, self.Estado.PROCESANDO)
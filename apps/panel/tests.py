@@ -0,0 +1,55 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from apps.accounts.models import Usuario
+from apps.catalog import sinteticos
+from apps.catalog.models import Categoria
+from .views import ProductosListView
+
+
+class ProductosListViewConsultasTests(TestCase):
+    """
+    El listado de productos del panel hace la misma cantidad de consultas en
+    cualquier página, orden y filtro: categorías y atributos salen de
+    subconsultas de la consulta de la página, no de una consulta por fila.
+    """
+
+    # Sesión y usuario, cliente del context processor, COUNT del paginador,
+    # categorías del filtro, la página y el guardado de la sesión (3)
+    CONSULTAS = 9
+    # Con categoría: la categoría y sus definiciones para el filtro por atributo
+    CONSULTAS_CATEGORIA = CONSULTAS + 2
+
+    @classmethod
+    def setUpTestData(cls):
+        sinteticos.poblar_catalogo(productos=90, atributos_por_producto=3, clientes=0, categorias=2, subcategorias=2)
+        cls.admin = Usuario.objects.create_user(username='admin', password='admin', rol=Usuario.Rol.ADMIN)
+        cls.subcategoria = Categoria.objects.filter(padre__isnull=False).order_by('id').first()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def assertConsultasConstantes(self, params, consultas=CONSULTAS):
+        with self.assertNumQueries(consultas):
+            respuesta = self.client.get(reverse('panel:productos'), params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta
+
+    def test_paginas(self):
+        for pagina in (1, 3):
+            with self.subTest(pagina=pagina):
+                respuesta = self.assertConsultasConstantes({'page': pagina})
+                self.assertEqual(len(respuesta.context['productos']), ProductosListView.paginate_by)
+
+    def test_ordenes(self):
+        for campo in ProductosListView.ORDENES:
+            for orden in (campo, f'-{campo}'):
+                with self.subTest(orden=orden):
+                    self.assertConsultasConstantes({'orden': orden, 'page': 2})
+
+    def test_filtro_categoria(self):
+        respuesta = self.assertConsultasConstantes(
+            {'categoria': self.subcategoria.padre_id, 'orden': 'precio', 'page': 2}, self.CONSULTAS_CATEGORIA
+        )
+        self.assertTrue(respuesta.context['productos'])
+        self.assertTrue(all(producto.categorias_nombres for producto in respuesta.context['productos']))
@@ -13,6 +13,7 @@ urlpatterns = [
     path('productos/<int:pk>/', views.ProductoUpdateView.as_view(), name='producto_editar'),
     path('productos/<int:pk>/eliminar/', views.ProductoDeleteView.as_view(), name='producto_eliminar'),
     path('productos/eliminar-todos/', views.delete_all_products, name='eliminar_todos_productos'),
+    path('productos/edicion-masiva/', views.edicion_masiva_productos, name='productos_edicion_masiva'),
     
     # Clientes
     path('clientes/', views.ClientesListView.as_view(), name='clientes'),
@@ -27,6 +28,17 @@ urlpatterns = [
     path('pedidos/<int:pk>/', views.PedidoDetailView.as_view(), name='pedido_detalle'),
     path('pedidos/<int:pk>/estado/', views.cambiar_estado_pedido, name='pedido_cambiar_estado'),
     
+    # Borrados masivos (en segundo plano)
+    path('borrados/<int:pk>/', views.BorradoDetailView.as_view(), name='borrado_detalle'),
+    path('borrados/<int:pk>/progreso/', views.borrado_progreso, name='borrado_progreso'),
+    path('borrados/<int:pk>/cancelar/', views.cancelar_borrado, name='borrado_cancelar'),
+    
+    # Exportar (CSV / xlsx)
+    path('exportar/<str:tipo>/', views.exportar, name='exportar'),
+    
+    # Reportes
+    path('reportes/ventas/', views.ReporteVentasView.as_view(), name='reporte_ventas'),
+    
     # Categorías
     path('categorias/', views.CategoriasListView.as_view(), name='categorias'),
     path('categorias/nueva/', views.CategoriaCreateView.as_view(), name='categoria_crear'),
@@ -1,14 +1,28 @@
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
 from django.shortcuts import redirect, get_object_or_404, render
-from django.urls import reverse_lazy
+from django.http import FileResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.urls import reverse, reverse_lazy
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.contrib import messages
-from django.db.models import Count, Sum, Q
-
-from apps.catalog.models import Producto, Categoria
+from django.core.exceptions import ValidationError
+from django.db.models import Count, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.http import urlencode
+
+from apps.catalog.models import Producto, Categoria, DefinicionAtributo, ProductoAtributo
+from apps.catalog import services as catalog_services
 from apps.accounts.models import Cliente
-from apps.orders.models import Pedido
+from apps.core.db import Concatenar
+from apps.orders.models import Pedido, VentaDiaria, VentaDiariaProducto, VentaDiariaCliente
+from apps.orders import services as order_services
+from . import borrado as borrado_masivo
+from . import estadisticas
+from . import exportar as exportacion
+from .models import BorradoMasivo
 
 
 class AdminRequiredMixin(LoginRequiredMixin, UserPassesTestMixin):
@@ -25,11 +39,8 @@ class DashboardView(AdminRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Estadísticas
-        context['total_productos'] = Producto.objects.filter(activo=True).count()
-        context['total_clientes'] = Cliente.objects.count()
-        context['total_pedidos'] = Pedido.objects.count()
-        context['pedidos_pendientes'] = Pedido.objects.filter(estado='pendiente').count()
+        # Estadísticas (cacheadas; ventas desde los rollups diarios)
+        context.update(estadisticas.dashboard())
         
         # Últimos pedidos
         context['ultimos_pedidos'] = Pedido.objects.select_related('cliente')[:5]
@@ -45,26 +56,135 @@ class ProductosListView(AdminRequiredMixin, ListView):
     template_name = 'panel/productos/lista.html'
     context_object_name = 'productos'
     paginate_by = 20
-    
+
+    # Columnas ordenables (cada una con un índice campo + id, ver Producto.Meta)
+    ORDENES = ['sku', 'nombre', 'precio', 'stock', 'updated_at']
+
     def get_queryset(self):
-        queryset = Producto.objects.all()
-        
-        # Búsqueda
-        busqueda = self.request.GET.get('q', '')
-        if busqueda:
-            queryset = queryset.filter(
-                Q(nombre__icontains=busqueda) |
-                Q(sku__icontains=busqueda)
-            )
-        
-        return queryset
-    
+        self.orden = self.request.GET.get('orden', 'nombre')
+        if self.orden.lstrip('-') not in self.ORDENES:
+            self.orden = 'nombre'
+        desempate = '-id' if self.orden.startswith('-') else 'id'
+
+        # Categorías y cantidad de atributos con una subconsulta por fila de la
+        # página, no una consulta por producto desde el template
+        categorias = catalog_services.ProductoCategoria.objects.filter(
+            producto_id=OuterRef('pk')
+        ).order_by().values('producto_id').annotate(nombres=Concatenar('categoria__nombre')).values('nombres')
+        atributos = ProductoAtributo.objects.filter(
+            producto_id=OuterRef('pk')
+        ).order_by().values('producto_id').annotate(cantidad=Count('id')).values('cantidad')
+        return _productos_filtrados(self.request.GET).only(
+            'id', 'sku', 'nombre', 'precio', 'stock', 'activo', 'updated_at'
+        ).annotate(
+            categorias_nombres=Subquery(categorias),
+            cantidad_atributos=Coalesce(Subquery(atributos), 0)
+        ).order_by(self.orden, desempate)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context['orden'] = self.orden
+        # Query string de cada encabezado: invierte el orden si ya es la columna actual
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['orden_links'] = {}
+        for campo in self.ORDENES:
+            params['orden'] = f'-{campo}' if self.orden == campo else campo
+            context['orden_links'][campo] = params.urlencode()
         context['busqueda'] = self.request.GET.get('q', '')
+        context['categoria_actual'] = self.request.GET.get('categoria', '')
+        context['atributo_actual'] = self.request.GET.get('atributo', '')
+        context['valor_actual'] = self.request.GET.get('valor', '')
+        context['categorias'] = Categoria.objects.select_related('padre').order_by('padre__nombre', 'nombre')
+        # Atributos de la categoría elegida (y de su rubro) para filtrar por valor
+        categoria = Categoria.objects.filter(pk=context['categoria_actual']).first() \
+            if context['categoria_actual'].isdigit() else None
+        context['definiciones'] = DefinicionAtributo.objects.filter(
+            categoria_id__in=[categoria.id, categoria.padre_id]
+        ).order_by('orden', 'id') if categoria else []
+        context['ediciones'] = catalog_services.EDICIONES
+        # Filtros actuales para la paginación y la edición masiva
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['query_params'] = params.urlencode()
         return context
 
 
+def _productos_filtrados(params):
+    """
+    Productos según los filtros del listado: q (nombre o SKU), categoria
+    (incluye sus subcategorías activas) y atributo (id de definición) = valor.
+    """
+    queryset = Producto.objects.all()
+
+    # Búsqueda
+    busqueda = params.get('q', '')
+    if busqueda:
+        queryset = queryset.filter(
+            Q(nombre__icontains=busqueda) |
+            Q(sku__icontains=busqueda)
+        )
+
+    # Por subconsulta y no por join: sin duplicados ni distinct()
+    categoria_id = params.get('categoria', '')
+    if categoria_id.isdigit():
+        cat_ids = Categoria.objects.filter(Q(id=categoria_id) | Q(padre_id=categoria_id, activa=True)).values('id')
+        queryset = queryset.filter(id__in=catalog_services.ProductoCategoria.objects.filter(
+            categoria_id__in=cat_ids
+        ).values('producto_id'))
+
+    atributo_id = params.get('atributo', '')
+    valor = params.get('valor', '')
+    if atributo_id.isdigit() and valor:
+        queryset = queryset.filter(id__in=ProductoAtributo.objects.filter(
+            valor__definicion_id=atributo_id, valor__valor=valor
+        ).values('producto_id'))
+
+    return queryset
+
+
+@login_required
+@user_passes_test(lambda u: u.es_admin)
+def edicion_masiva_productos(request):
+    """
+    Edición masiva de los productos que coinciden con los filtros del
+    listado (en el query string). Primero muestra cuántos cambiarían y una
+    muestra; al confirmar aplica el UPDATE por lotes.
+    """
+    volver = reverse('panel:productos') + '?' + request.GET.urlencode()
+    if request.method != 'POST':
+        return redirect(volver)
+
+    operacion = request.POST.get('operacion', '')
+    texto = request.POST.get('valor', '').strip().replace(',', '.')
+    try:
+        valor = Decimal(texto) if texto else None
+        productos = _productos_filtrados(request.GET)
+        if request.POST.get('confirmar'):
+            cantidad = catalog_services.editar_productos(productos, operacion, valor)
+        else:
+            cantidad, muestra = catalog_services.vista_previa_edicion(productos, operacion, valor)
+    except (InvalidOperation, ValueError, ValidationError) as e:
+        messages.error(request, str(e) if isinstance(e, ValueError) else 'Valor inválido.')
+        return redirect(volver)
+
+    if not request.POST.get('confirmar'):
+        return render(request, 'panel/productos/edicion_masiva.html', {
+            'operacion': operacion,
+            'operacion_nombre': catalog_services.EDICIONES[operacion],
+            'valor': texto,
+            'cantidad': cantidad,
+            'muestra': muestra,
+            'query_params': request.GET.urlencode(),
+            'volver': volver,
+        })
+
+    # Una sola invalidación al final, no una por producto
+    estadisticas.invalidar()
+    messages.success(request, f'{cantidad} productos actualizados ({catalog_services.EDICIONES[operacion].lower()}).')
+    return redirect(volver)
+
+
 class ProductoCreateView(AdminRequiredMixin, CreateView):
     """Crear producto."""
     model = Producto
@@ -223,22 +343,10 @@ def change_client_password(request, pk):
 @login_required
 @user_passes_test(lambda u: u.es_admin)
 def delete_all_clients(request):
-    """Elimina todos los clientes y sus usuarios asociados."""
+    """Elimina todos los clientes sin pedidos y sus usuarios, en segundo plano."""
     if request.method == 'POST':
-        # Obtener IDs de usuarios asociados a clientes
-        clientes = Cliente.objects.all()
-        user_ids = clientes.values_list('usuario_id', flat=True)
-        
-        # Eliminar clientes
-        count_clientes = clientes.count()
-        clientes.delete()
-        
-        # Eliminar usuarios (excepto el propio admin si tuviera cliente, aunque raro)
-        from django.contrib.auth import get_user_model
-        User = get_user_model()
-        users_deleted = User.objects.filter(id__in=user_ids).exclude(id=request.user.id).delete()
-        
-        messages.success(request, f'Se eliminaron {count_clientes} clientes y sus usuarios asociados.')
+        borrado = borrado_masivo.iniciar(BorradoMasivo.Tipo.CLIENTES, request.user)
+        return redirect('panel:borrado_detalle', pk=borrado.pk)
     
     return redirect('panel:clientes')
 
@@ -246,15 +354,52 @@ def delete_all_clients(request):
 @login_required
 @user_passes_test(lambda u: u.es_admin)
 def delete_all_products(request):
-    """Elimina todos los productos."""
+    """Elimina todos los productos sin pedidos, en segundo plano."""
     if request.method == 'POST':
-        count = Producto.objects.count()
-        Producto.objects.all().delete()
-        messages.success(request, f'Se eliminaron {count} productos.')
+        borrado = borrado_masivo.iniciar(BorradoMasivo.Tipo.PRODUCTOS, request.user)
+        return redirect('panel:borrado_detalle', pk=borrado.pk)
     
     return redirect('panel:productos')
 
 
+class BorradoDetailView(AdminRequiredMixin, DetailView):
+    """Progreso de un borrado masivo."""
+    model = BorradoMasivo
+    template_name = 'panel/borrado.html'
+    context_object_name = 'borrado'
+
+
+@login_required
+@user_passes_test(lambda u: u.es_admin)
+def borrado_progreso(request, pk):
+    """Retorna el progreso de un borrado masivo (AJAX)."""
+    borrado = get_object_or_404(BorradoMasivo, pk=pk)
+    return JsonResponse({
+        'estado': borrado.estado,
+        'estado_display': borrado.get_estado_display(),
+        'activo': borrado.activo,
+        'progreso': borrado.progreso,
+        'borrados': borrado.borrados,
+        'total': borrado.total,
+        'protegidos': borrado.protegidos,
+        'error': borrado.error,
+    })
+
+
+@login_required
+@user_passes_test(lambda u: u.es_admin)
+def cancelar_borrado(request, pk):
+    """Cancela un borrado masivo en proceso (se detiene al terminar el lote actual)."""
+    if request.method == 'POST':
+        cancelados = BorradoMasivo.objects.filter(
+            pk=pk, estado__in=[BorradoMasivo.Estado.PENDIENTE, BorradoMasivo.Estado.PROCESANDO]
+        ).update(estado=BorradoMasivo.Estado.CANCELADO)
+        if cancelados:
+            messages.success(request, 'Borrado cancelado. Lo ya borrado no se recupera.')
+    
+    return redirect('panel:borrado_detalle', pk=pk)
+
+
 # ===================== PEDIDOS =====================
 
 class PedidosListView(AdminRequiredMixin, ListView):
@@ -308,13 +453,115 @@ def cambiar_estado_pedido(request, pk):
     if request.method == 'POST':
         nuevo_estado = request.POST.get('estado')
         if nuevo_estado in dict(Pedido.Estado.choices):
-            pedido.estado = nuevo_estado
-            pedido.save()
+            # Cancelar resta el pedido de los rollups de ventas; reactivarlo lo vuelve a sumar
+            pedido = order_services.cambiar_estado(pedido, nuevo_estado)
             messages.success(request, f'Estado del pedido #{pedido.id} actualizado a {pedido.get_estado_display()}.')
     
     return redirect('panel:pedido_detalle', pk=pk)
 
 
+# ===================== REPORTES =====================
+
+class ReporteVentasView(AdminRequiredMixin, ListView):
+    """
+    Ventas por producto, cliente o provincia en un rango de fechas.
+    Lee solo los rollups diarios (ver apps.orders.services).
+    """
+    template_name = 'panel/reportes/ventas.html'
+    context_object_name = 'filas'
+    paginate_by = 50
+    
+    AGRUPACIONES = {
+        'producto': ('Producto', VentaDiariaProducto, ['producto_id', 'producto__sku', 'producto__nombre']),
+        'cliente': ('Cliente', VentaDiariaCliente, ['cliente_id', 'cliente__nombre']),
+        'provincia': ('Provincia', VentaDiariaCliente, ['cliente__provincia']),
+    }
+    
+    def _rango(self):
+        """(desde, hasta) de los parámetros GET; por defecto los últimos 30 días."""
+        hasta = _fecha(self.request.GET.get('hasta')) or timezone.localdate()
+        desde = _fecha(self.request.GET.get('desde')) or hasta - timedelta(days=29)
+        return desde, hasta
+    
+    def get_queryset(self):
+        self.agrupar = self.request.GET.get('agrupar')
+        if self.agrupar not in self.AGRUPACIONES:
+            self.agrupar = 'producto'
+        self.desde, self.hasta = self._rango()
+        
+        _, modelo, campos = self.AGRUPACIONES[self.agrupar]
+        agregados = {'unidades': Sum('unidades'), 'total': Sum('total')}
+        if modelo is VentaDiariaCliente:
+            agregados['pedidos'] = Sum('pedidos')
+        return (
+            modelo.objects.filter(fecha__range=(self.desde, self.hasta))
+            .values(*campos)
+            .annotate(**agregados)
+            .order_by('-total', *campos)
+        )
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['agrupar'] = self.agrupar
+        context['agrupaciones'] = [(clave, datos[0]) for clave, datos in self.AGRUPACIONES.items()]
+        context['desde'] = self.desde
+        context['hasta'] = self.hasta
+        context['totales'] = VentaDiaria.objects.filter(fecha__range=(self.desde, self.hasta)).aggregate(
+            pedidos=Sum('pedidos'), unidades=Sum('unidades'), total=Sum('total')
+        )
+        # Filtros actuales para los links de paginación
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['query_params'] = params.urlencode()
+        return context
+
+
+def _fecha(valor):
+    """Fecha ISO (YYYY-MM-DD) o None si falta o es inválida."""
+    try:
+        return date.fromisoformat(valor) if valor else None
+    except ValueError:
+        return None
+
+
+# ===================== EXPORTAR =====================
+
+@login_required
+@user_passes_test(lambda u: u.es_admin)
+def exportar(request, tipo):
+    """
+    Exporta productos, clientes o pedidos (con los filtros del listado) a
+    CSV en streaming o a xlsx (?formato=xlsx). Productos acepta
+    ?categoria=<id> para agregar una columna por atributo de la categoría.
+    """
+    if tipo == 'productos':
+        categoria_id = request.GET.get('categoria', '')
+        categoria = get_object_or_404(Categoria, pk=categoria_id) if categoria_id.isdigit() else None
+        encabezados, filas = exportacion.productos(request.GET.get('q', ''), categoria)
+    elif tipo == 'clientes':
+        encabezados, filas = exportacion.clientes(request.GET.get('q', ''))
+    elif tipo == 'pedidos':
+        encabezados, filas = exportacion.pedidos(request.GET.get('estado', ''))
+    else:
+        raise Http404('Exportación inválida')
+    
+    nombre = f'{tipo}_{timezone.localdate():%Y%m%d}'
+    if request.GET.get('formato') == 'xlsx':
+        return FileResponse(
+            exportacion.xlsx_temporal(encabezados, filas),
+            as_attachment=True,
+            filename=f'{nombre}.xlsx',
+            content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        )
+    
+    response = StreamingHttpResponse(
+        exportacion.csv_streaming(encabezados, filas),
+        content_type='text/csv; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{nombre}.csv"'
+    return response
+
+
 # ===================== CATEGORÍAS =====================
 
 class CategoriasListView(AdminRequiredMixin, ListView):
@@ -375,29 +622,39 @@ class CategoriaProductosView(AdminRequiredMixin, ListView):
         context = super().get_context_data(**kwargs)
         self.categoria = get_object_or_404(Categoria, pk=self.kwargs['pk'])
         context['categoria'] = self.categoria
-        # Set de IDs que ya están en la categoría para marcar checkboxes
-        context['productos_en_categoria_ids'] = set(self.categoria.productos.values_list('id', flat=True))
+        # IDs de la página actual que ya están en la categoría, para marcar las filas
+        context['productos_en_categoria_ids'] = set(
+            catalog_services.ProductoCategoria.objects.filter(
+                categoria=self.categoria,
+                producto_id__in=[producto.id for producto in context['productos']]
+            ).values_list('producto_id', flat=True)
+        )
         context['busqueda'] = self.request.GET.get('q', '')
         return context
 
     def post(self, request, pk):
         categoria = get_object_or_404(Categoria, pk=pk)
         action = request.POST.get('action')
-        product_ids = request.POST.getlist('productos')
-        
-        if not product_ids:
-            messages.warning(request, 'No se seleccionaron productos.')
-            return redirect(request.path_info + f'?q={request.GET.get("q", "")}&page={request.GET.get("page", 1)}')
+        volver = request.path_info + '?' + urlencode({
+            'q': request.GET.get('q', ''), 'page': request.GET.get('page', 1)
+        })
 
-        products = Producto.objects.filter(id__in=product_ids)
-        count = products.count()
-
-        if action == 'add_selected':
-            categoria.productos.add(*products)
+        if action in ('add_all', 'remove_all'):
+            # Todos los que coinciden con la búsqueda actual, no solo la página
+            products = self.get_queryset()
+        else:
+            product_ids = request.POST.getlist('productos')
+            if not product_ids:
+                messages.warning(request, 'No se seleccionaron productos.')
+                return redirect(volver)
+            products = Producto.objects.filter(id__in=product_ids)
+
+        if action in ('add_selected', 'add_all'):
+            count = catalog_services.asignar_categoria(categoria, products)
             messages.success(request, f'{count} productos agregados a {categoria.nombre}.')
             
-        elif action == 'remove_selected':
-            categoria.productos.remove(*products)
+        elif action in ('remove_selected', 'remove_all'):
+            count = catalog_services.quitar_categoria(categoria, products)
             messages.success(request, f'{count} productos quitados de {categoria.nombre}.')
             
-        return redirect(request.path_info + f'?q={request.GET.get("q", "")}&page={request.GET.get("page", 1)}')
+        return redirect(volver)
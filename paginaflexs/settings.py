@@ -53,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.core.middleware.MetricasRequestMiddleware',  # Solo activo con METRICAS_REQUEST_MUESTREO > 0
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Para servir estáticos en producción
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -122,6 +123,17 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Hashers: el primero es el preferido. PBKDF2ImportacionHasher solo se usa
+# en altas masivas (IMPORTS_HASH_RAPIDO) y se reemplaza en el primer login.
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'apps.accounts.hashers.PBKDF2ImportacionHasher',
+]
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.0/topics/i18n/
@@ -169,3 +181,28 @@ LOGOUT_REDIRECT_URL = 'core:home'
 # Configuración de sesión para el carrito
 SESSION_ENGINE = 'django.contrib.sessions.backends.db'
 SESSION_COOKIE_AGE = 86400 * 30  # 30 días
+
+
+# Importaciones
+# Procesos para normalizar filas y hashear contraseñas en paralelo (0 o 1 = en el mismo proceso)
+IMPORTS_WORKERS = int(os.getenv('IMPORTS_WORKERS', '0'))
+# Hashear las contraseñas importadas con pocas iteraciones (se rehashean en el primer login)
+IMPORTS_HASH_RAPIDO = os.getenv('IMPORTS_HASH_RAPIDO', 'False').lower() in ('true', '1', 'yes')
+# Desde cuántas filas se importa con tabla de staging y SQL por conjuntos (productos)
+IMPORTS_STAGING_MIN_FILAS = int(os.getenv('IMPORTS_STAGING_MIN_FILAS', '50000'))
+# Caché de archivos ya parseados (por SHA-256 del contenido). Vacío = desactivada
+# Directorio propio del proyecto (se crea 0700), fuera de MEDIA_ROOT y no compartido como /tmp
+IMPORTS_CACHE_DIR = os.getenv('IMPORTS_CACHE_DIR', str(BASE_DIR / 'cache' / 'imports'))
+
+
+# Segundos que se cachean las estadísticas del dashboard del panel
+PANEL_ESTADISTICAS_TTL = int(os.getenv('PANEL_ESTADISTICAS_TTL', '60'))
+
+
+# Métricas de requests (Server-Timing y log de requests lentos)
+# Fracción de requests medidos (0 = desactivado, 1 = todos)
+METRICAS_REQUEST_MUESTREO = float(os.getenv('METRICAS_REQUEST_MUESTREO', '0'))
+# Umbrales para loguear un request medido como lento, con sus consultas más lentas
+METRICAS_REQUEST_LENTO_MS = int(os.getenv('METRICAS_REQUEST_LENTO_MS', '1000'))
+METRICAS_REQUEST_MAX_CONSULTAS = int(os.getenv('METRICAS_REQUEST_MAX_CONSULTAS', '100'))
+METRICAS_REQUEST_TOP_CONSULTAS = 5